@@ -0,0 +1,51 @@
+"""Execution order benchmark.
+
+Time determine_execution_order() for generated patches of growing size. Each
+patch consists of parallel chains of blocks which get mixed together, with a
+feedback connection in every chain. Time per block should stay roughly
+constant (linear scaling).
+"""
+import time
+
+from klang.block import Block
+from klang.execution import determine_execution_order
+
+
+CHAIN_LENGTH = 10
+"""int: Number of blocks per chain."""
+
+SIZES = [250, 500, 1000, 2000, 4000]
+"""list: Network sizes (number of blocks)."""
+
+
+def generate_patch(nBlocks):
+    """Generate block network with nBlocks blocks (approx). Return sink."""
+    nChains = max(1, nBlocks // CHAIN_LENGTH)
+    sink = Block(nInputs=nChains)
+    for input_ in sink.inputs:
+        chain = [Block(nInputs=2, nOutputs=2) for _ in range(CHAIN_LENGTH)]
+        for src, dst in zip(chain, chain[1:]):
+            src.outputs[0].connect(dst.inputs[0])
+
+        # Feedback
+        chain[-1].outputs[1].connect(chain[0].inputs[1])
+        chain[-1].outputs[0].connect(input_)
+
+    return sink
+
+
+def main():
+    print('%8s %12s %16s' % ('blocks', 'time [ms]', 'per block [us]'))
+    for size in SIZES:
+        sink = generate_patch(size)
+        start = time.perf_counter()
+        execOrder = determine_execution_order([sink])
+        duration = time.perf_counter() - start
+        nBlocks = len(execOrder)
+        print('%8d %12.2f %16.2f' % (
+            nBlocks, 1e3 * duration, 1e6 * duration / nBlocks
+        ))
+
+
+if __name__ == '__main__':
+    main()
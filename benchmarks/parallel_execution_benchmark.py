@@ -0,0 +1,64 @@
+"""Parallel execution benchmark.
+
+Time serial vs. level-parallel execution of a mix with N parallel synth +
+effect chains (Oscillator -> Filter -> PitchShifter) feeding one Mixer.
+"""
+import time
+
+from klang.audio.effects import Filter, PitchShifter
+from klang.audio.mixer import Mixer
+from klang.audio.oscillators import Oscillator
+from klang.execution import (
+    ExecutionPlan,
+    ParallelExecutionPlan,
+    determine_execution_order,
+)
+
+
+N_CHAINS = [4, 8, 16]
+"""list: Number of parallel chains."""
+
+N_WORKERS = 4
+"""int: Number of worker threads."""
+
+N_CYCLES = 200
+"""int: Number of buffer cycles to time."""
+
+
+def generate_patch(nChains):
+    """Generate mix with nChains parallel chains. Return mixer."""
+    mixer = Mixer(nInputs=0)
+    for _ in range(nChains):
+        mixer += Oscillator() | Filter(frequency=1000.) | PitchShifter()
+
+    return mixer
+
+
+def time_plan(plan):
+    """Mean duration of one execution plan cycle."""
+    plan()  # Warm up
+    start = time.perf_counter()
+    for _ in range(N_CYCLES):
+        plan()
+
+    return (time.perf_counter() - start) / N_CYCLES
+
+
+def main():
+    print('%8s %12s %14s %9s' % ('chains', 'serial [us]', 'parallel [us]', 'speedup'))
+    for nChains in N_CHAINS:
+        execOrder = determine_execution_order([generate_patch(nChains)])
+        serial = time_plan(ExecutionPlan(execOrder))
+        parallel = ParallelExecutionPlan(execOrder, nWorkers=N_WORKERS)
+        try:
+            duration = time_plan(parallel)
+        finally:
+            parallel.close()
+
+        print('%8d %12.1f %14.1f %9.2f' % (
+            nChains, 1e6 * serial, 1e6 * duration, serial / duration
+        ))
+
+
+if __name__ == '__main__':
+    main()
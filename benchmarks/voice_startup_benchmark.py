@@ -0,0 +1,65 @@
+"""Polyphonic synthesizer startup benchmark.
+
+Time patch construction with N polyphonic synthesizers. Eager voice
+duplication (all MAX_VOICES voices up front, the former behavior) vs. lazy
+voice instantiation (voices get cloned on demand).
+"""
+import time
+import tracemalloc
+
+from klang.audio.envelopes import ADSR
+from klang.audio.oscillators import Oscillator
+from klang.audio.synthesizer import PolyphonicSynthesizer, duplicate_voice
+from klang.audio.voices import Voice
+
+
+N_SYNTHESIZERS = [1, 4, 16]
+"""list: Number of polyphonic synthesizers in the patch."""
+
+
+def build_eager(nSynthesizers):
+    """Synthesizers with all voices instantiated up front."""
+    synthesizers = []
+    for _ in range(nSynthesizers):
+        synth = PolyphonicSynthesizer(Voice(Oscillator(), ADSR()))
+        synth.voices = duplicate_voice(synth.template, synth.maxVoices)
+        synth.freeVoices = list(synth.voices)
+        synthesizers.append(synth)
+
+    return synthesizers
+
+
+def build_lazy(nSynthesizers):
+    """Synthesizers with on demand voices."""
+    return [
+        PolyphonicSynthesizer(Voice(Oscillator(), ADSR()))
+        for _ in range(nSynthesizers)
+    ]
+
+
+def measure(build, nSynthesizers):
+    """Construction duration and peak memory."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    build(nSynthesizers)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duration, peak
+
+
+def main():
+    print('%6s %11s %10s %11s %10s %9s' % (
+        'synths', 'eager [ms]', 'eager [kB]', 'lazy [ms]', 'lazy [kB]', 'speedup'
+    ))
+    for nSynthesizers in N_SYNTHESIZERS:
+        eager, eagerMem = measure(build_eager, nSynthesizers)
+        lazy, lazyMem = measure(build_lazy, nSynthesizers)
+        print('%6d %11.1f %10.1f %11.1f %10.1f %9.1f' % (
+            nSynthesizers, 1e3 * eager, eagerMem / 1e3, 1e3 * lazy,
+            lazyMem / 1e3, eager / lazy,
+        ))
+
+
+if __name__ == '__main__':
+    main()
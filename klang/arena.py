@@ -0,0 +1,165 @@
+"""Buffer arena.
+
+Preallocated, reusable output buffers for blocks which process audio in place
+(class attribute IN_PLACE). Each output of such a block owns a buffer slot.
+A slot holds one array per shape / dtype which gets reused every buffer cycle
+(blocks write with out= ufuncs). No steady-state allocations.
+
+On top of this a liveness analysis over the execution order lets outputs with
+non-overlapping lifetimes share the same slot (interval coloring). An output
+is alive from its writer until its last reader. Outputs get pinned to their
+own slot if any reader
+  - comes earlier in the execution order (feedback, previous cycle value),
+  - does not process in place itself (might keep or pass on the array),
+  - is not part of the execution order (e.g. read by the audio engine).
+"""
+import numpy as np
+
+from klang.connections import Output
+
+
+__all__ = ['BufferSlot', 'output_buffer', 'allocate_buffers']
+
+
+class BufferSlot:
+
+    """Physical buffer storage. One array per shape / dtype.
+
+    Attributes:
+        arrays (dict): (shape, dtype) -> array.
+    """
+
+    def __init__(self):
+        self.arrays = {}
+
+    def get(self, shape, dtype=float):
+        """Get buffer array of a given shape / dtype. Allocated on first
+        request.
+        """
+        key = (shape, dtype)
+        try:
+            return self.arrays[key]
+        except KeyError:
+            arr = self.arrays[key] = np.empty(shape, dtype)
+            return arr
+
+    def __len__(self):
+        return len(self.arrays)
+
+
+def output_buffer(output, *operands):
+    """Get reusable buffer of output for the result of an element-wise
+    operation on operands (broadcast shape, result dtype).
+
+    Args:
+        output (Output): Output connection.
+        operands: Scalars and / or arrays.
+
+    Returns:
+        array: Output buffer. None if output has no buffer slot or there are no
+            array operands (result is a scalar).
+    """
+    slot = output.slot
+    if slot is None:
+        return None
+
+    shape = None
+    for operand in operands:
+        if isinstance(operand, np.ndarray):
+            if shape is None:
+                shape = operand.shape
+            elif operand.shape != shape:
+                shape = np.broadcast_shapes(shape, operand.shape)
+
+    if shape is None:
+        return None
+
+    return slot.get(shape, np.result_type(*operands))
+
+
+def buffered_outputs(block):
+    """Value outputs of an in-place block."""
+    if not block.IN_PLACE:
+        return []
+
+    return [output for output in block.outputs if isinstance(output, Output)]
+
+
+def lifetime(step, steps, readers):
+    """Lifetime of an output value within one buffer cycle.
+
+    Args:
+        step (int): Schedule step of the writer.
+        steps (dict): Block -> schedule step.
+        readers (list): Blocks reading from output.
+
+    Returns:
+        int: Schedule step of the last reader. None if output has to be pinned
+            to its own slot.
+    """
+    if not readers:
+        return None
+
+    last = step
+    for reader in readers:
+        if reader not in steps or not reader.IN_PLACE:
+            return None
+
+        if steps[reader] <= step:
+            return None
+
+        last = max(last, steps[reader])
+
+    return last
+
+
+def allocate_buffers(blocks, steps=None):
+    """Assign buffer slots to the outputs of in-place blocks of a flat
+    execution order. Greedy interval coloring: a slot can be reused by a
+    writer which runs strictly after the last reader of the previous owner.
+
+    Args:
+        blocks (list): Flat execution order.
+
+    Kwargs:
+        steps (dict): Block -> schedule step. Outputs can only share a slot
+            if the steps are strictly ordered. Execution order positions by
+            default (dependency levels for parallel execution).
+
+    Returns:
+        int: Number of shared slots in use.
+    """
+    from klang.execution import downstream_inputs  # Circular import for comforts
+    if steps is None:
+        steps = {block: idx for idx, block in enumerate(blocks)}
+
+    members = set(blocks)
+    intervals = []
+    for block in blocks:
+        step = steps[block]
+        for output in buffered_outputs(block):
+            readers = list({
+                input_.owner
+                for input_ in downstream_inputs(output, members)
+            })
+            end = lifetime(step, steps, readers)
+            if end is None:
+                output.slot = BufferSlot()  # Pinned
+            else:
+                intervals.append((step, end, output))
+
+    intervals.sort(key=lambda interval: interval[:2])
+    slots = []  # (end, slot) of shared slots
+    for start, end, output in intervals:
+        for idx, (prevEnd, slot) in enumerate(slots):
+            if prevEnd < start:
+                break
+        else:
+            idx = len(slots)
+            slot = BufferSlot()
+            slots.append(None)
+
+        output.slot = slot
+        slots[idx] = (end, slot)
+
+    return len(slots)
@@ -10,11 +10,15 @@ import itertools
 import math
 import random
 
+from klang.audio.helpers import phase_crossings
 from klang.audio.oscillators import Phasor
 from klang.composite import Composite
 from klang.connections import MessageInput, MessageOutput
+from klang.constants import TAU
+from klang.context import get_context
+from klang.execution import execute_one
 from klang.messages import Note
-from klang.music.tempo import compute_duration
+from klang.music.tempo import compute_duration, compute_rate
 
 
 VALID_ORDERS = ['up', 'down', 'upDown', 'downUp', 'alternating', 'random']
@@ -167,7 +171,6 @@ class Arpeggiator(Composite):
         interval = compute_duration(interval)
         self.inputs = [MessageInput(owner=self)]
         self.outputs = [MessageOutput(owner=self)]
-        self.prevPhase = 0.
         self.prevNote = None
         self.phasor = Phasor(1./interval)
         self.arpeggio = Arpeggio(*args, **kwargs)
@@ -179,16 +182,20 @@ class Arpeggiator(Composite):
             elif newNote in self.arpeggio:
                 self.arpeggio.remove_note(newNote)
 
-        self.phasor.update()
+        execute_one(self.phasor)
+        ctx = get_context()
         phase = self.phasor.output.value
-        if phase <= self.prevPhase:
-            if self.prevNote:
-                noteOff = self.prevNote.silence()
-                self.output.send(noteOff)
-
-            if self.arpeggio:
-                note = next(self.arpeggio)
-                self.output.send(note)
-                self.prevNote = note
-
-        self.prevPhase = phase
+        increment = TAU * compute_rate(self.phasor.frequency.value) * ctx.dt
+        for offset in phase_crossings(phase, increment, ctx.bufferSize):
+            self.step(offset)
+
+    def step(self, offset):
+        """Next arpeggio step at sample offset."""
+        if self.prevNote:
+            noteOff = self.prevNote.silence().at(offset)
+            self.output.send(noteOff)
+
+        if self.arpeggio:
+            note = next(self.arpeggio).at(offset)
+            self.output.send(note)
+            self.prevNote = note
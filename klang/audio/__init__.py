@@ -1,4 +1,5 @@
 """All things audio."""
+from klang.audio.backends import *
 from klang.audio.effects import *
 from klang.audio.envelopes import *
 from klang.audio.filters import *
@@ -10,6 +11,7 @@ from klang.audio.panning import *
 from klang.audio.sampling import *
 from klang.audio.sync import *
 from klang.audio.synthesizer import *
+from klang.audio.telemetry import *
 from klang.audio.voices import *
 from klang.audio.waves import *
 from klang.audio.wavfile import *
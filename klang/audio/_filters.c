@@ -245,10 +245,12 @@ ForwardCombFilter_filter(RingBufferFilterObject *self, PyObject *args)
 
     double *x = PyArray_DATA(inArray);
     double *y = PyArray_DATA(outArray);
+    Py_BEGIN_ALLOW_THREADS
     for (int i = 0; i < dims[0]; ++i) {
         y[i] = x[i] + self->alpha * RingBuffer_peek(self->ringBuffer);
         RingBuffer_append(self->ringBuffer, x[i]);
     }
+    Py_END_ALLOW_THREADS
 
     return PyArray_Return(outArray);
 }
@@ -271,10 +273,12 @@ BackwardCombFilter_filter(RingBufferFilterObject *self, PyObject *args)
 
     double *x = PyArray_DATA(inArray);
     double *y = PyArray_DATA(outArray);
+    Py_BEGIN_ALLOW_THREADS
     for (int i = 0; i < dims[0]; ++i) {
         y[i] = x[i] + self->alpha * RingBuffer_peek(self->ringBuffer);
         RingBuffer_append(self->ringBuffer, y[i]);
     }
+    Py_END_ALLOW_THREADS
 
     return PyArray_Return(outArray);
 }
@@ -297,10 +301,12 @@ EchoFilter_filter(RingBufferFilterObject *self, PyObject *args)
 
     double *x = PyArray_DATA(inArray);
     double *y = PyArray_DATA(outArray);
+    Py_BEGIN_ALLOW_THREADS
     for (int i = 0; i < dims[0]; ++i) {
         y[i] = RingBuffer_peek(self->ringBuffer);
         RingBuffer_append(self->ringBuffer, self->alpha * y[i] + x[i]);
     }
+    Py_END_ALLOW_THREADS
 
     return PyArray_Return(outArray);
 }
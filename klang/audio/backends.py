@@ -0,0 +1,452 @@
+"""Audio backends for the live audio engine.
+
+run_audio_engine() only talks to the sound card through a small backend
+interface. Besides the default PyAudio backend there is a headless null device
+which calls the stream callback paced by the wall clock. It can inject
+scheduling jitter and flags callbacks which returned after their deadline as
+output underflows. Sound card input can be simulated by a WAV file. This
+reproduces the real-time scheduling behaviour on machines without any audio
+hardware (CI, servers).
+
+Input and output channel counts are independent. Input samples get delivered
+as (frames, channels) shaped arrays or as raw float32 bytes.
+
+Usage:
+    >>> backend = NullBackend(inputDevice=WaveInput('input.wav'), jitter=.002)
+    ... run_klang(dac, backend=backend, duration=10., telemetry=Telemetry())
+
+    >>> # Mono microphone into a stereo effects chain
+    ... backend = PyAudioBackend(inputDevice='USB', outputDevice='USB')
+    ... run_klang(adc, dac, backend=backend)
+"""
+import logging
+import random
+import threading
+import time
+
+import numpy as np
+import pyaudio
+
+from klang.audio.wavfile import load_wave
+
+
+__all__ = [
+    'AudioBackend', 'PyAudioBackend', 'SplitStream', 'NullBackend', 'WaveInput',
+]
+
+
+def find_device(pa, device, kind: str) -> dict:
+    """Look up device info. Default device if device is None.
+
+    Args:
+        pa (pyaudio): PyAudio instance.
+        device (int or str): Device index or part of the device name.
+        kind: 'input' or 'output'.
+
+    Returns:
+        PyAudio device info.
+    """
+    if device is None:
+        if kind == 'input':
+            return pa.get_default_input_device_info()
+
+        return pa.get_default_output_device_info()
+
+    if isinstance(device, int):
+        return pa.get_device_info_by_index(device)
+
+    key = 'maxInputChannels' if kind == 'input' else 'maxOutputChannels'
+    for index in range(pa.get_device_count()):
+        info = pa.get_device_info_by_index(index)
+        if device in info['name'] and info[key] > 0:
+            return info
+
+    raise ValueError('No %s device matching %r!' % (kind, device))
+
+
+def validate_sound_card_channels(pa, adc, dac, inputDevice=None,
+                                 outputDevice=None):
+    """Given the audio input and output blocks determine if we have enough audio
+    channels on the selected (default) devices.
+
+    Args:
+        pa (pyaudio): PyAudio instance.
+        adc (Adc): Audio input block.
+        dac (dac): Audio output block.
+
+    Kwargs:
+        inputDevice (int or str): Input device index / name.
+        outputDevice (int or str): Output device index / name.
+    """
+    if adc.nChannels > 0:
+        inputDeviceInfo = find_device(pa, inputDevice, 'input')
+        if adc.nChannels > inputDeviceInfo['maxInputChannels']:
+            raise ValueError('Not enough sound card inputs!')
+
+    if dac.nChannels > 0:
+        outputDeviceInfo = find_device(pa, outputDevice, 'output')
+        if dac.nChannels > outputDeviceInfo['maxOutputChannels']:
+            raise ValueError('Not enough sound card outputs!')
+
+
+class AudioBackend:
+
+    """Audio backend interface. Streams returned by open() follow the PyAudio
+    stream interface (start_stream(), is_active(), stop_stream(), close()) and
+    the stream callback gets called with the PyAudio stream callback
+    signature.
+    """
+
+    def validate_channels(self, adc, dac):
+        """Check if the backend can serve the audio input and output blocks.
+        Raises ValueError otherwise.
+        """
+        raise NotImplementedError
+
+    def open(self, rate: int, framesPerBuffer: int, nInputs: int, nOutputs:
+             int, callback):
+        """Open an audio stream.
+
+        Args:
+            rate: Sampling rate.
+            framesPerBuffer: Buffer size.
+            nInputs: Number of input channels.
+            nOutputs: Number of output channels.
+            callback: PyAudio stream callback. in_data is either raw float32
+                bytes or a (frames, nInputs) shaped array.
+
+        Returns:
+            Audio stream.
+        """
+        raise NotImplementedError
+
+    def terminate(self):
+        """Release backend resources."""
+
+
+class PyAudioBackend(AudioBackend):
+
+    """Sound card devices via PyAudio. Default devices if not specified
+    otherwise.
+
+    PyAudio streams only have a single channel count. Different input /
+    output channel counts get served by two separate streams (see
+    SplitStream).
+
+    Attributes:
+        inputDevice (int or str): Input device index / name.
+        outputDevice (int or str): Output device index / name.
+    """
+
+    def __init__(self, inputDevice=None, outputDevice=None):
+        """Kwargs:
+            inputDevice (int or str): Input device index or part of the device
+                name.
+            outputDevice (int or str): Output device index or part of the
+                device name.
+        """
+        self.pa = pyaudio.PyAudio()
+        self.inputDevice = inputDevice
+        self.outputDevice = outputDevice
+
+    def validate_channels(self, adc, dac):
+        validate_sound_card_channels(
+            self.pa, adc, dac, self.inputDevice, self.outputDevice,
+        )
+
+    def open(self, rate, framesPerBuffer, nInputs, nOutputs, callback):
+        inputIndex = outputIndex = None
+        if nInputs > 0:
+            inputIndex = find_device(self.pa, self.inputDevice, 'input')['index']
+
+        if nOutputs > 0:
+            outputIndex = find_device(self.pa, self.outputDevice, 'output')['index']
+
+        kwargs = dict(
+            rate=rate,
+            frames_per_buffer=framesPerBuffer,
+            format=pyaudio.paFloat32,
+        )
+        if nInputs > 0 and nOutputs > 0 and nInputs != nOutputs:
+            return SplitStream(
+                self.pa, callback, nInputs, nOutputs, inputIndex, outputIndex,
+                **kwargs,
+            )
+
+        return self.pa.open(
+            channels=max(nInputs, nOutputs),
+            input=(nInputs > 0),
+            output=(nOutputs > 0),
+            input_device_index=inputIndex,
+            output_device_index=outputIndex,
+            stream_callback=callback,
+            **kwargs,
+        )
+
+    def terminate(self):
+        self.pa.terminate()
+
+
+class SplitStream:
+
+    """Separate PyAudio input and output streams for different input / output
+    channel counts (a PyAudio stream only has a single channel count for both
+    directions). The input stream gets read from within the stream callback
+    of the output stream.
+
+    Attributes:
+        inputStream: Blocking PyAudio input stream.
+        outputStream: PyAudio output stream in callback mode.
+    """
+
+    def __init__(self, pa, callback, nInputs: int, nOutputs: int,
+                 inputDeviceIndex: int = None, outputDeviceIndex: int = None,
+                 **kwargs):
+        """Args:
+            pa (pyaudio): PyAudio instance.
+            callback: Stream callback for nInputs / nOutputs channels.
+            nInputs: Number of input channels.
+            nOutputs: Number of output channels.
+
+        Kwargs:
+            inputDeviceIndex: Input device index.
+            outputDeviceIndex: Output device index.
+            kwargs: Common stream arguments (rate, frames_per_buffer, format).
+        """
+        self.inputStream = pa.open(
+            channels=nInputs,
+            input=True,
+            input_device_index=inputDeviceIndex,
+            start=False,
+            **kwargs,
+        )
+
+        def output_callback(in_data, frame_count, time_info, status):
+            """Fetch input frames and render output frames."""
+            in_data = self.inputStream.read(frame_count, exception_on_overflow=False)
+            return callback(in_data, frame_count, time_info, status)
+
+        self.outputStream = pa.open(
+            channels=nOutputs,
+            output=True,
+            output_device_index=outputDeviceIndex,
+            stream_callback=output_callback,
+            start=False,
+            **kwargs,
+        )
+
+    def start_stream(self):
+        self.inputStream.start_stream()
+        self.outputStream.start_stream()
+
+    def is_active(self) -> bool:
+        return self.outputStream.is_active()
+
+    def stop_stream(self):
+        self.outputStream.stop_stream()
+        self.inputStream.stop_stream()
+
+    def close(self):
+        self.outputStream.close()
+        self.inputStream.close()
+
+
+class WaveInput:
+
+    """File backed audio input device. Delivers the samples of a WAV file
+    buffer by buffer (silence when exhausted).
+
+    Attributes:
+        filepath (str): WAV file path.
+        samplingRate (int): Sampling rate of the WAV file.
+        samples (array): Float samples (nFrames, nChannels) shaped.
+        loop (bool): Start over when exhausted.
+        cursor (int): Current frame position.
+    """
+
+    def __init__(self, filepath: str, loop: bool = False):
+        """Args:
+            filepath: WAV file path.
+
+        Kwargs:
+            loop: Start over when exhausted.
+        """
+        self.filepath = filepath
+        self.samplingRate, samples = load_wave(filepath)
+        self.samples = samples.astype(np.float32)
+        self.loop = loop
+        self.cursor = 0
+
+    @property
+    def nChannels(self) -> int:
+        """Number of channels in WAV file."""
+        return self.samples.shape[1]
+
+    def read(self, nFrames: int, nChannels: int) -> bytes:
+        """Read the next buffer as raw float32 bytes (like PyAudio in_data).
+
+        Args:
+            nFrames: Number of frames.
+            nChannels: Number of channels (first nChannels of the file).
+
+        Returns:
+            Interleaved float32 samples.
+        """
+        out = np.zeros((nFrames, nChannels), np.float32)
+        total = len(self.samples)
+        pos = 0
+        while pos < nFrames and self.cursor < total:
+            n = min(nFrames - pos, total - self.cursor)
+            out[pos:pos+n] = self.samples[self.cursor:self.cursor+n, :nChannels]
+            pos += n
+            self.cursor += n
+            if self.loop and self.cursor == total:
+                self.cursor = 0
+
+        return out.tobytes()
+
+
+class NullStream:
+
+    """Headless audio stream. Calls the stream callback from a separate thread
+    paced by the wall clock.
+
+    Attributes:
+        nCallbacks (int): Number of stream callbacks.
+        nUnderflows (int): Callbacks which returned after their deadline.
+    """
+
+    def __init__(self, callback, interval: float, framesPerBuffer: int,
+                 nInputs: int, inputDevice: WaveInput = None, jitter: float = 0.,
+                 seed: int = None):
+        """Args:
+            callback: PyAudio stream callback.
+            interval: Buffer interval.
+            framesPerBuffer: Buffer size.
+            nInputs: Number of input channels.
+
+        Kwargs:
+            inputDevice: File backed input device.
+            jitter: Maximum random wake up delay in seconds.
+            seed: Jitter random seed.
+        """
+        self.callback = callback
+        self.interval = interval
+        self.framesPerBuffer = framesPerBuffer
+        self.nInputs = nInputs
+        self.inputDevice = inputDevice
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+        self.nCallbacks = 0
+        self.nUnderflows = 0
+        self._active = False
+        self._stopped = False
+        self._thread = None
+
+    def start_stream(self):
+        self._active = True
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self.run,
+            name='KlangNullStream',
+            daemon=True,
+        )
+        self._thread.start()
+
+    def is_active(self) -> bool:
+        return self._active
+
+    def stop_stream(self):
+        self._stopped = True
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def close(self):
+        self.stop_stream()
+
+    def read_input(self):
+        """Raw input samples for the next callback."""
+        if self.nInputs == 0 or self.inputDevice is None:
+            return None
+
+        return self.inputDevice.read(self.framesPerBuffer, self.nInputs)
+
+    def run(self):
+        """Stream thread main loop."""
+        status = 0
+        start = time.perf_counter()
+        try:
+            while not self._stopped:
+                wakeUp = start + self.nCallbacks * self.interval
+                if self.jitter:
+                    wakeUp += self.rng.uniform(0., self.jitter)
+
+                time.sleep(max(0., wakeUp - time.perf_counter()))
+                _, flag = self.callback(
+                    self.read_input(), self.framesPerBuffer, None, status,
+                )
+                self.nCallbacks += 1
+
+                # Output buffer is due at the end of the buffer interval
+                deadline = start + self.nCallbacks * self.interval
+                status = 0
+                if time.perf_counter() > deadline:
+                    self.nUnderflows += 1
+                    status = pyaudio.paOutputUnderflow
+
+                if flag != pyaudio.paContinue:
+                    break
+
+        finally:
+            self._active = False
+
+
+class NullBackend(AudioBackend):
+
+    """Headless null device. Output gets discarded, input comes from an
+    optional WaveInput.
+
+    Attributes:
+        inputDevice (WaveInput): File backed input device.
+        jitter (float): Maximum random wake up delay in seconds.
+        seed (int): Jitter random seed.
+        streams (list): Opened streams (for inspecting their counters).
+    """
+
+    def __init__(self, inputDevice: WaveInput = None, jitter: float = 0.,
+                 seed: int = None):
+        """Kwargs:
+            inputDevice: File backed input device.
+            jitter: Maximum random wake up delay in seconds.
+            seed: Jitter random seed.
+        """
+        self.inputDevice = inputDevice
+        self.jitter = jitter
+        self.seed = seed
+        self.streams = []
+
+    def validate_channels(self, adc, dac):
+        if self.inputDevice is None or adc.nChannels == 0:
+            return
+
+        if adc.nChannels > self.inputDevice.nChannels:
+            raise ValueError('Not enough channels in %r!' % self.inputDevice.filepath)
+
+    def open(self, rate, framesPerBuffer, nInputs, nOutputs, callback):
+        if self.inputDevice and self.inputDevice.samplingRate != rate:
+            logging.getLogger('NullBackend').warning(
+                'Sampling rate mismatch %d Hz for %r. Playing at %d Hz',
+                self.inputDevice.samplingRate, self.inputDevice.filepath, rate,
+            )
+
+        stream = NullStream(
+            callback,
+            interval=framesPerBuffer / rate,
+            framesPerBuffer=framesPerBuffer,
+            nInputs=nInputs,
+            inputDevice=self.inputDevice,
+            jitter=self.jitter,
+            seed=self.seed,
+        )
+        self.streams.append(stream)
+        return stream
@@ -7,16 +7,21 @@ import numpy as np
 import scipy.signal
 import samplerate
 
-from klang.audio.filters import BackwardCombFilter
+from klang.arena import BufferSlot, output_buffer
+from klang.audio.filters import (
+    BackwardCombFilter, PyRingBufferFilter, USE_PYTHON_FALLBACK,
+)
 from klang.audio.helpers import NYQUIST_FREQUENCY, get_silence
 from klang.audio.oscillators import Oscillator, PwmOscillator
 from klang.audio.waves import square
 from klang.audio.wavfile import convert_samples_to_float, convert_samples_to_int
 from klang.block import Block
 from klang.composite import Composite
-from klang.config import BUFFER_SIZE, SAMPLING_RATE, KAMMERTON
+from klang.config import SAMPLING_RATE, KAMMERTON
 from klang.connections import Input, Relay
 from klang.constants import PI, TAU, INF, MONO, STEREO
+from klang.context import get_context
+from klang.execution import execute_one
 from klang.math import clip, blend, linear_mapping
 from klang.music.tempo import compute_duration, TimeOrNoteValue
 from klang.primes import find_next_primes
@@ -31,13 +36,17 @@ __all__ = [
 
 
 @functools.lru_cache()
-def low_pass_coefficients(frequency: float) -> Tuple[list, list]:
+def low_pass_coefficients(frequency: float, samplingRate: int = SAMPLING_RATE
+                          ) -> Tuple[list, list]:
     """Filter coefficients for single pole low pass IIR filter. For decay use
     frequency = 1. / decay. 0 and INF are supported as well.
 
     Args:
         frequency: Unnormalized cutoff frequency.
 
+    Kwargs:
+        samplingRate: Sampling rate.
+
     Returns:
         Numerator / denominator coefficients.
 
@@ -50,7 +59,7 @@ def low_pass_coefficients(frequency: float) -> Tuple[list, list]:
     if frequency == INF:
         return [1.], [1., 0.]
 
-    a1 = -math.exp(-TAU * frequency / SAMPLING_RATE)
+    a1 = -math.exp(-TAU * frequency / samplingRate)
     b0 = 1. - abs(a1)
     return [b0], [1., a1]
 
@@ -59,6 +68,10 @@ class Gain(Block):
 
     """Simple gain block."""
 
+    IN_PLACE = True
+
+    SILENCE_POLICY = 'stateless'
+
     def __init__(self, gain=1.):
         super().__init__(nInputs=2, nOutputs=1)
         _, self.gain = self.inputs
@@ -67,7 +80,11 @@ class Gain(Block):
     def update(self):
         gain = self.gain.value
         samples = self.input.value
-        self.output.set_value(gain * samples)
+        out = output_buffer(self.output, gain, samples)
+        if out is None:
+            self.output.set_value(gain * samples)
+        else:
+            self.output.set_value(np.multiply(gain, samples, out=out))
 
 
 class Tremolo(Composite):
@@ -122,10 +139,11 @@ class Tremolo(Composite):
 
         # Calculate AM-envelope
         decay = max(1e-6, smoothness * min(dutyCycle, 1. - dutyCycle))
-        coeffs = low_pass_coefficients(1. / decay)
-        self.lfo.update()
+        coeffs = low_pass_coefficients(1. / decay, get_context().samplingRate)
+        execute_one(self.lfo)
         pwm = self.lfo.output.value
         filteredPwm, self.zi = scipy.signal.lfilter(*coeffs, pwm, zi=self.zi)
+        filteredPwm = filteredPwm.astype(pwm.dtype, copy=False)
         env = (1. - depth) + depth * (.5 + .5 * filteredPwm)
 
         # Apply
@@ -140,6 +158,10 @@ class Delay(Block):
     MAX_TIME = 2.
     """float: Max delay time / max buffer size."""
 
+    IN_PLACE = True
+
+    SILENCE_POLICY = 'tail'
+
     def __init__(self, time=1., feedback=.1, drywet=.5):
         """Kwargs:
             time (float or Note): Delay time.
@@ -150,12 +172,25 @@ class Delay(Block):
         super().__init__(nInputs=1, nOutputs=1)
         self.feedback = feedback
         self.drywet = drywet
-
-        time = compute_duration(time)
-        length = int(time * SAMPLING_RATE)
-        capacity = int(self.MAX_TIME * SAMPLING_RATE)
-
-        self.ring = RingBuffer(length, capacity)
+        self.delayTime = compute_duration(time)
+        self.ring = self.create_ring_buffer(self.context)
+        self.downmix = BufferSlot()
+        self.feedbackBuffer = BufferSlot()
+
+    def create_ring_buffer(self, context):
+        """Create delay line for engine context."""
+        length = int(self.delayTime * context.samplingRate)
+        capacity = int(self.MAX_TIME * context.samplingRate)
+        return RingBuffer(length, capacity, bufferSize=context.bufferSize,
+                          dtype=context.dtype)
+
+    def prepare(self, context):
+        super().prepare(context)
+        self.ring = self.create_ring_buffer(context)
+
+    def max_block_size(self):
+        # Feedback has to be written before it gets read again
+        return self.ring.length
 
     def validate_delay_time(self, time):
         if time > self.MAX_TIME:
@@ -166,12 +201,23 @@ class Delay(Block):
     def update(self):
         new = self.input.get_value()
         if new.ndim != MONO:
-            nChannels, _ = new.shape
-            new = new.sum(axis=0) / nChannels
+            nChannels, bufferSize = new.shape
+            mono = self.downmix.get((bufferSize,), new.dtype)
+            np.sum(new, axis=0, out=mono)
+            mono /= nChannels
+            new = mono
+
+        old = self.ring.peek(len(new))
+        feedback = self.feedbackBuffer.get(new.shape, np.result_type(new, old))
+        np.multiply(self.feedback, old, out=feedback)
+        feedback += new
+        self.ring.extend(feedback)
+        out = output_buffer(self.output, new, old)
+        self.output.set_value(blend(new, old, self.drywet, out=out))
 
-        old = self.ring.peek()
-        self.ring.extend(new + self.feedback * old)
-        self.output.set_value(blend(new, old, self.drywet))
+    def decayed(self, threshold):
+        # Echos still in the pipe
+        return np.max(np.abs(self.ring.data)) < threshold
 
 
 class AudioSplitter(Block):
@@ -198,7 +244,11 @@ class AudioCombiner(Block):
 
     def __init__(self, nInputs):
         super().__init__(nInputs, nOutputs=1)
-        silence = get_silence((nInputs, BUFFER_SIZE)).copy()
+        self.prepare(self.context)
+
+    def prepare(self, context):
+        super().prepare(context)
+        silence = get_silence((self.nInputs, context.bufferSize), context.dtype).copy()
         self.output.set_value(silence)
 
     def update(self):
@@ -246,10 +296,15 @@ class FilterCoefficients:
     F_MAX = 20000.
     """float: Maximum frequency."""
 
-    def __init__(self, design_func, *args, **kwargs):
+    def __init__(self, design_func, *args, nyquistFrequency=NYQUIST_FREQUENCY,
+                 **kwargs):
         """Args:
             design_func (function): scipy.signal filter design function.
 
+        Kwargs:
+            nyquistFrequency (float): Nyquist frequency. F_MAX gets lowered if
+                needed.
+
         *args, **kwargs:
             Arguments for the design function. All args beside Wn. This will be
             set by FilterCoefficients.
@@ -259,12 +314,12 @@ class FilterCoefficients:
         self.kwargs = kwargs
         self.frequencies = np.logspace(
             np.log2(self.F_MIN),
-            np.log2(self.F_MAX),
+            np.log2(min(self.F_MAX, .95 * nyquistFrequency)),
             num=1000,
             base=2,
         )
         self.coefficients = [
-            design_func(*args, Wn=f / NYQUIST_FREQUENCY, **kwargs)
+            design_func(*args, Wn=f / nyquistFrequency, **kwargs)
             for f in self.frequencies
         ]
 
@@ -290,11 +345,14 @@ class _Filter:
       - We use scipy.signal ba coefficients and not sos (10x faster).
     """
 
-    def __init__(self, design_func, *args, **kwargs):
-        self.coefficients = FilterCoefficients(design_func, *args, **kwargs)
+    def __init__(self, design_func, *args, nyquistFrequency=NYQUIST_FREQUENCY,
+                 **kwargs):
+        self.coefficients = FilterCoefficients(
+            design_func, *args, nyquistFrequency=nyquistFrequency, **kwargs
+        )
         self.currentCoeffs = ([], [])
         self.state = []
-        freq = kwargs.get('Wn', .5) * NYQUIST_FREQUENCY
+        freq = kwargs.get('Wn', .5) * nyquistFrequency
         self.set_frequency(freq)
         self.reset()
 
@@ -307,13 +365,15 @@ class _Filter:
         self.state = scipy.signal.lfiltic(*self.currentCoeffs, y=[])
 
     def filter(self, signal):
-        """Filter some signal chunk."""
+        """Filter some signal chunk. Coefficients and filter state stay in
+        double precision, output has the datatype of the signal.
+        """
         filteredSignal, self.state = scipy.signal.lfilter(
             *self.currentCoeffs,
             x=signal,
             zi=self.state,
         )
-        return filteredSignal
+        return filteredSignal.astype(signal.dtype, copy=False)
 
     def __str__(self):
         ret = str(self.coefficients)
@@ -350,17 +410,36 @@ class Filter(Block):
     MAX_CHANNELS = STEREO
     """int: Maximum number of channels (for filter initialization)."""
 
+    CONCURRENT = True
+    """bool: scipy.signal.lfilter() releases the GIL."""
+
+    SILENCE_POLICY = 'tail'
+
     def __init__(self, *args, frequency=KAMMERTON,
                  design_func=scipy.signal.butter, N=2, btype='lowpass',
                  **kwargs):
         super().__init__(nInputs=2, nOutputs=1)
         _, self.frequency = self.inputs
         self.frequency.set_value(frequency)
-        self.filters = [
-            _Filter(design_func, *args, N=N, btype=btype, *args, **kwargs)
+        self.design = (design_func, args, dict(N=N, btype=btype, **kwargs))
+        self.filters = self.create_filters(self.context)
+        self.listener = Observer(connection=self.frequency)
+
+    def create_filters(self, context):
+        """Create channel filters for engine context."""
+        design_func, args, kwargs = self.design
+        return [
+            _Filter(
+                design_func, *args,
+                nyquistFrequency=context.nyquistFrequency, **kwargs
+            )
             for _ in range(self.MAX_CHANNELS)
         ]
-        self.listener = Observer(connection=self.frequency)
+
+    def prepare(self, context):
+        super().prepare(context)
+        self.filters = self.create_filters(context)
+        self.listener.prevValue = None  # Re-apply cutoff frequency
 
     def update_frequency(self):
         """Update all internal frequencies to a new cutoff frequency."""
@@ -389,16 +468,24 @@ class Subsampler(Block):
 
     """Sub sample audio buffer. Soft bit crusher effect."""
 
-    VALID_FACTORS = set(2**i for i in range(1, int(math.log2(BUFFER_SIZE))))
-    """set: Valid skip factors. Power of 2."""
+    SILENCE_POLICY = 'stateless'
 
     def __init__(self, factor):
         """Args:
             factor (int): Sub-sample skip factor. Power of 2.
         """
-        assert factor in self.VALID_FACTORS
         super().__init__(nInputs=1, nOutputs=1)
         self.factor = factor
+        self.prepare(self.context)
+
+    @staticmethod
+    def valid_factors(bufferSize):
+        """Valid skip factors for a given buffer size. Power of 2."""
+        return set(2**i for i in range(1, int(math.log2(bufferSize))))
+
+    def prepare(self, context):
+        assert self.factor in self.valid_factors(context.bufferSize)
+        super().prepare(context)
 
     @staticmethod
     def sub_sample(array, skip):
@@ -424,6 +511,8 @@ class Bitcrusher(Block):
     Reduce bit depth resolution.
     """
 
+    SILENCE_POLICY = 'stateless'
+
     def __init__(self, nBits=16):
         """Kwargs:
             nBits (int): Bit reduction.
@@ -470,6 +559,8 @@ class TanhDistortion(Block):
 
     """Tanh distorter."""
 
+    SILENCE_POLICY = 'stateless'
+
     def __init__(self, drive=1.):
         """Kwargs:
             drive (float): Overdrive gain factor.
@@ -491,8 +582,12 @@ class PitchShifter(Block):
 
     """Simple resampler based pitch shifter."""
 
-    WINDOW = np.hanning(BUFFER_SIZE)
-    """array: Window samples."""
+    CONCURRENT = True
+    """bool: Resampling happens in libsamplerate."""
+
+    IN_PLACE = True
+
+    SILENCE_POLICY = 'tail'
 
     def __init__(self, shift=2., dryWet=.5, mode='sinc_fastest'):
         """Kwargs:
@@ -509,20 +604,30 @@ class PitchShifter(Block):
             channels=MONO,
         )
 
+    @staticmethod
+    @functools.lru_cache()
+    def window(size):
+        """Window samples. Cached."""
+        return np.hanning(size)
+
     def callback(self):
         """Resampler callback function."""
-        return self.input.value * self.WINDOW
+        samples = self.input.value
+        return samples * self.window(samples.shape[-1])
 
     def update(self):
         orig = self.input.value
-        shifted = self.resampler.read(BUFFER_SIZE)
-        self.output.set_value(blend(orig, shifted, self.dryWet))
+        shifted = self.resampler.read(get_context().bufferSize)
+        out = output_buffer(self.output, orig, shifted)
+        self.output.set_value(blend(orig, shifted, self.dryWet, out=out))
 
 
 class Transformer(Block):
 
     """Linear signal transformer (scale and offset)."""
 
+    IN_PLACE = True
+
     def __init__(self, scale, offset):
         """Args:
             scale (float): Scale factor.
@@ -556,9 +661,13 @@ class Transformer(Block):
         return cls(scale, offset)
 
     def update(self):
-        self.output.set_value(
-            self.scale * self.input.value + self.offset
-        )
+        value = self.input.value
+        out = output_buffer(self.output, self.scale, value, self.offset)
+        if out is None:
+            self.output.set_value(self.scale * value + self.offset)
+        else:
+            np.multiply(self.scale, value, out=out)
+            self.output.set_value(np.add(out, self.offset, out=out))
 
 
 class Reverb(Block):
@@ -567,11 +676,26 @@ class Reverb(Block):
 
     Prime number delay taps.
 
+    Attributes:
+        dryWet (float): Amount of dry and effected audio portion.
+        design (tuple): Reverb parameters (decay, preDelay, nEchos,
+            echoType).
+        filters (list): Echo taps.
+        tailLength (int): Longest delay tap in samples.
+        quietSamples (int): Number of quiet output samples (silence policy).
+
     TODO:
       - Different gain policies.
       - Bandpass in feedback path of filters
     """
 
+    CONCURRENT = not USE_PYTHON_FALLBACK
+    """bool: Comb filter C-extensions release the GIL."""
+
+    IN_PLACE = True
+
+    SILENCE_POLICY = 'tail'
+
     def __init__(self, decay: float = 1.5, preDelay: float = .03, dryWet: float
                  = .7, nEchos: int = 10, echoType: type = BackwardCombFilter):
         """Kwargs:
@@ -584,10 +708,24 @@ class Reverb(Block):
         assert nEchos > 0
         super().__init__(nInputs=1, nOutputs=1)
         self.dryWet = clip(dryWet, 0., 1.)
+        self.design = (decay, preDelay, nEchos, echoType)
+        self.filters = []
+        self.tailLength = 0
+        self.quietSamples = 0
+        self.prepare(self.context)
+
+    def prepare(self, context):
+        # Delay taps in samples
+        super().prepare(context)
+        decay, preDelay, nEchos, echoType = self.design
+        rate = context.samplingRate
+        delays = find_next_primes(nEchos, int(preDelay * rate))
         self.filters = [
-            echoType(k, self.compute_alpha(k / SAMPLING_RATE, decay))
-            for k in find_next_primes(nEchos, int(preDelay * SAMPLING_RATE))
+            echoType(k, self.compute_alpha(k / rate, decay))
+            for k in delays
         ]
+        self.tailLength = max(delays)
+        self.quietSamples = 0
 
     @staticmethod
     def compute_alpha(delayTime: float, decay: float) -> float:
@@ -605,6 +743,14 @@ class Reverb(Block):
 
         return math.exp(-PI * delayTime / decay)
 
+    def max_block_size(self):
+        # Python ring buffer filters can not look ahead of their tap
+        return min((
+            fil.ring.length
+            for fil in self.filters
+            if isinstance(fil, PyRingBufferFilter)
+        ), default=None)
+
     def update(self):
         x = self.input.value
         y = self.filters[0].filter(x)
@@ -612,7 +758,19 @@ class Reverb(Block):
             y += fil.filter(x)
 
         y /= len(self.filters)
-        self.output.set_value(blend(x, y, self.dryWet))
+        y = y.astype(x.dtype, copy=False)  # C-extensions work in double
+        out = output_buffer(self.output, x, y)
+        self.output.set_value(blend(x, y, self.dryWet, out=out))
+
+    def decayed(self, threshold):
+        # Echo taps are not accessible. Output has to stay quiet for at least
+        # the longest tap
+        if not super().decayed(threshold):
+            self.quietSamples = 0
+            return False
+
+        self.quietSamples += self.output.value.shape[-1]
+        return self.quietSamples > self.tailLength
 
 
 class RingModulator(Composite):
@@ -647,12 +805,12 @@ class RingModulator(Composite):
 
     def update(self):
         # Frequency with modulation from lfo
-        self.lfo.update()
+        execute_one(self.lfo)
         freqs = self.frequency.value + self.amount.value * self.lfo.output.value
 
         # AM envelope from modulator
         self.modulator.frequency.set_value(freqs)
-        self.modulator.update()
+        execute_one(self.modulator)
         amSignal = self.modulator.output.value
 
         # Blend signals
@@ -5,7 +5,7 @@ generators. These generators yield the next envelope samples and the current
 envelope state / current value (so that we can switch to another generator
 whenever we want). The constant_samples() generator will run forever but the
 curve_samples() generators signals that it is depletetd by outputing a samples
-array which is less than BUFFER_SIZE long.
+array which is less than bufferSize long.
 
 We use exponential envelope curves with overshoot for curve shaping. overshoot
 values close to 0. result in an exponential shape, >1 is more linear.
@@ -45,8 +45,6 @@ LOWER = 0.
 SENTINEL_ARRAY = np.zeros(0)
 """array: Empty array signaling the end of sample generators."""
 
-UNUSED = 'Unused'
-
 
 @functools.lru_cache()
 def full(shape, fill_value):
@@ -140,25 +138,29 @@ def calculate_transfer_function(duration, overshoot=DEFAULT_OVERSHOOT):
     return numerator, denominator
 
 
-def generator_finished(samples):
+def generator_finished(samples, bufferSize=BUFFER_SIZE):
     """Check if sample generator finished by inspecting its sample output. If
-    length < BUFFER_SIZE there are no more new samples and we reached the end of
+    length < bufferSize there are no more new samples and we reached the end of
     associated the generator (next next() call would raise StopIteration).
 
     Args:
         samples (array): Sample buffer.
 
+    Kwargs:
+        bufferSize (int): Buffer size.
+
     Returns:
         bool: Generator has finished.
     """
-    return samples.size < BUFFER_SIZE
+    return samples.size < bufferSize
 
 
-def curve_samples(start, target, duration, overshoot=DEFAULT_OVERSHOOT, prepend=None):
+def curve_samples(start, target, duration, overshoot=DEFAULT_OVERSHOOT,
+                  prepend=None, bufferSize=BUFFER_SIZE, samplingRate=SAMPLING_RATE):
     """Curve sample generator. Get exponential envelope samples leading from
     `start` -> `target`. Previously generated samples can be incorporated via
     prepend. These values will be prepended to the first yield samples.
-    Generator is depleted when it yields an array which is less than BUFFER_SIZE
+    Generator is depleted when it yields an array which is less than bufferSize
     long (can be checked via generator_finished(samples)). After this last array
     curve_samples() will raise a StopIteration error.
 
@@ -171,26 +173,28 @@ def curve_samples(start, target, duration, overshoot=DEFAULT_OVERSHOOT, prepend=
             shape (exponential <-> linear).
         prepend (array): Samples to prepend in first call. Last, incomplete
             sample buffer from another sample generator.
+        bufferSize (int): Buffer size.
+        samplingRate (int): Sampling rate.
 
     Yields:
         tuple: Samples array and last filter state (or target value if there was
         no crossover).
     """
-    rate = SAMPLING_RATE * duration
+    rate = samplingRate * duration
     nSamples = int(time_needed(start, target, rate, overshoot))  # rate -> samples
 
     # Arguments for lfilter
     tf = calculate_transfer_function(rate, overshoot)
-    targetArr = full(BUFFER_SIZE, target + sign(target - start) * overshoot)
+    targetArr = full(bufferSize, target + sign(target - start) * overshoot)
     zi = [start]
 
     # Prepend samples to first output
     if prepend is not None:
-        missing = BUFFER_SIZE - prepend.size
+        missing = bufferSize - prepend.size
         available = min(nSamples, missing)
         tail, zi = lfilter(*tf, targetArr[:available], zi=zi)
         samples = np.concatenate([prepend, tail])
-        if generator_finished(samples):
+        if generator_finished(samples, bufferSize):
             yield samples, target
             return
 
@@ -199,7 +203,7 @@ def curve_samples(start, target, duration, overshoot=DEFAULT_OVERSHOOT, prepend=
 
     assert nSamples >= 0
 
-    fullCycles, remainder = divmod(nSamples, BUFFER_SIZE)
+    fullCycles, remainder = divmod(nSamples, bufferSize)
     for _ in range(fullCycles):
         samples, zi = lfilter(*tf, targetArr, zi=zi)
         yield samples, zi[0]
@@ -211,7 +215,7 @@ def curve_samples(start, target, duration, overshoot=DEFAULT_OVERSHOOT, prepend=
         yield SENTINEL_ARRAY, target
 
 
-def constant_samples(value, prepend=None):
+def constant_samples(value, prepend=None, bufferSize=BUFFER_SIZE):
     """Constant value sample generator. Yields a full buffer with `value`
     (besides prepend values). Forever.
 
@@ -221,14 +225,15 @@ def constant_samples(value, prepend=None):
     Kwargs:
         prepend (array): Samples to prepend. Previously generated, incomplete
             sample buffer (from another terminated generator).
+        bufferSize (int): Buffer size.
     """
     if prepend is not None:
-        missing = BUFFER_SIZE - prepend.size
+        missing = bufferSize - prepend.size
         tail = full(missing, value)
         samples = np.concatenate([prepend, tail])
         yield samples, value
 
-    samples = full(BUFFER_SIZE, value)
+    samples = full(bufferSize, value)
     while True:
         yield samples, value
 
@@ -256,13 +261,15 @@ class Envelope:
         sampleGenerator (generator): Current sample source.
         enabled (bool): Additional flag for being able to differentiate envelope
             on / off while looping.
+        samplingRate (int): Sampling rate.
+        bufferSize (int): Current buffer size.
 
     TODO:
       - attack, decay, sustain, release getters and setters (with
         update_sample_generator() call?)
     """
 
-    def __init__(self, attack, decay, sustain, release, dt=UNUSED,
+    def __init__(self, attack, decay, sustain, release, dt=None,
                  overshoot=DEFAULT_OVERSHOOT, retrigger=False, loop=False):
         """Args:
             attack (float): Attack time duration.
@@ -271,7 +278,7 @@ class Envelope:
             release (float): Release time duration.
 
         Kwargs:
-            dt (float): UNUSED sampling interval. For same API as C Envelope.
+            dt (float): Sampling interval. 1 / SAMPLING_RATE by default.
             overshoot (float): Overshoot amount.
             retrigger (bool): Allow envelope retrigger on repeated note-ons.
             loop (bool): Loop envelope (skip SUSTAINING and OFF stages if
@@ -286,6 +293,9 @@ class Envelope:
         self.retrigger = retrigger
         self.loop = loop
 
+        self.samplingRate = SAMPLING_RATE if dt is None else round(1. / dt)
+        self.bufferSize = BUFFER_SIZE
+
         self.stage = Stage.OFF
         self.value = 0.
         self.sampleGenerator = None
@@ -304,28 +314,30 @@ class Envelope:
         Kwargs:
             prepend (array): Samples to prepend on first generator call.
         """
+        size = {'bufferSize': self.bufferSize}
+        curve = dict(size, samplingRate=self.samplingRate)
         if self.stage is Stage.OFF:
             self.sampleGenerator = constant_samples(
-                value=LOWER, prepend=prepend
+                value=LOWER, prepend=prepend, **size
             )
         elif self.stage is Stage.ATTACKING:
             self.sampleGenerator = curve_samples(
                 start=self.value, target=UPPER, duration=self.attack,
-                overshoot=self.overshoot, prepend=prepend
+                overshoot=self.overshoot, prepend=prepend, **curve
             )
         elif self.stage is Stage.DECAYING:
             self.sampleGenerator = curve_samples(
                 start=self.value, target=self.sustain, duration=self.decay,
-                overshoot=self.overshoot, prepend=prepend
+                overshoot=self.overshoot, prepend=prepend, **curve
             )
         elif self.stage is Stage.SUSTAINING:
             self.sampleGenerator = constant_samples(
-                value=self.sustain, prepend=prepend
+                value=self.sustain, prepend=prepend, **size
             )
         elif self.stage is Stage.RELEASING:
             self.sampleGenerator = curve_samples(
                 start=self.value, target=LOWER, duration=self.release,
-                overshoot=self.overshoot, prepend=prepend
+                overshoot=self.overshoot, prepend=prepend, **curve
             )
 
     def switch_stage(self, stage, prepend=None):
@@ -371,23 +383,230 @@ class Envelope:
         else:
             return self.stage
 
-    def go_to_next_stage(self):
-        """Advance to next envelope stage."""
+    def go_to_next_stage(self, prepend=None):
+        """Advance to next envelope stage.
+
+        Kwargs:
+            prepend (array): Samples to prepend on first generator call.
+        """
         nextStage = self.determine_next_stage()
-        self.switch_stage(nextStage)
+        self.switch_stage(nextStage, prepend)
 
-    def sample(self, bufferSize=UNUSED):
-        """Get next BUFFER_SIZE envelope samples.
+    def sample(self, bufferSize=BUFFER_SIZE):
+        """Get next bufferSize envelope samples.
 
         Kwargs:
-            bufferSize (float): UNUSED buffer length. For same API as C Envelope.
+            bufferSize (int): Buffer length. Current curve gets restarted from
+                the current value on change.
 
         Returns:
             array: Envelope samples.
         """
+        if bufferSize != self.bufferSize:
+            self.bufferSize = bufferSize
+            self.update_sample_generator()
+
         samples, self.value = next(self.sampleGenerator)
-        while generator_finished(samples):
-            self.go_to_next_stage()
+        while generator_finished(samples, self.bufferSize):
+            self.go_to_next_stage(prepend=samples)
             samples, self.value = next(self.sampleGenerator)
 
         return samples
+
+
+class EnvelopeBank:
+
+    """Vectorized ADSR envelopes for multiple voices. Struct of arrays: stage
+    and level of every envelope live in arrays and all envelopes get sampled
+    in one batched pass.
+
+    Same exponential curves and stage transitions as Envelope (one pole filter
+    towards the target +/- overshoot). Within a buffer an envelope follows the
+    closed form solution of the filter for the number of samples Envelope
+    would render (time_needed()) and then switches to the next stage. No
+    looping.
+
+    Attributes:
+        stage (array): Stage.value per envelope.
+        level (array): Current filter state per envelope.
+        countdown (array): Remaining curve samples of the current stage per
+            envelope (-1 if not known yet).
+        retrigger (bool): Restart attack on repeated note-ons.
+        bufferSize (int): Current buffer size.
+        targets (array): Stage.value -> target level.
+        rates (array): Stage.value -> duration in samples.
+        coefficients (array): Stage.value -> filter coefficient.
+        ratios (array): Stage.value -> filter pole (1. for constant stages).
+    """
+
+    CURVES = np.array([False, True, True, False, True])
+    """array: Stage.value -> curve / constant stage."""
+
+    NEXT = np.array([
+        Stage.OFF.value, Stage.DECAYING.value, Stage.SUSTAINING.value,
+        Stage.SUSTAINING.value, Stage.OFF.value,
+    ])
+    """array: Stage.value -> next stage value."""
+
+    def __init__(self, nEnvelopes, attack, decay, sustain, release,
+                 overshoot=DEFAULT_OVERSHOOT, retrigger=False,
+                 samplingRate=SAMPLING_RATE):
+        """Args:
+            nEnvelopes (int): Number of envelopes.
+            attack (float): Attack time duration.
+            decay (float): Decay time duration.
+            sustain (float): Sustain value.
+            release (float): Release time duration.
+
+        Kwargs:
+            overshoot (float): Overshoot amount.
+            retrigger (bool): Allow envelope retrigger on repeated note-ons.
+            samplingRate (int): Sampling rate.
+        """
+        self.attack = attack
+        self.decay = decay
+        self.sustain = sustain
+        self.release = release
+        self.overshoot = overshoot
+        self.retrigger = retrigger
+        self.bufferSize = BUFFER_SIZE
+        self.stage = np.full(nEnvelopes, Stage.OFF.value, dtype=np.int8)
+        self.level = np.zeros(nEnvelopes)
+        self.countdown = np.full(nEnvelopes, -1.)
+        self.targets = np.array([LOWER, UPPER, sustain, sustain, LOWER])
+        self.rates = np.zeros(len(Stage))
+        self.coefficients = np.full(len(Stage), INF)
+        self.ratios = np.ones(len(Stage))
+        self.set_sampling_rate(samplingRate)
+
+    def __len__(self):
+        return len(self.level)
+
+    @property
+    def active(self):
+        """Boolean mask of active envelopes."""
+        return self.stage != Stage.OFF.value
+
+    def set_sampling_rate(self, samplingRate):
+        """Recompute stage durations and filter poles for another sampling
+        rate.
+        """
+        for stage, duration in [
+                (Stage.ATTACKING, self.attack),
+                (Stage.DECAYING, self.decay),
+                (Stage.RELEASING, self.release),
+        ]:
+            rate = samplingRate * duration
+            coeff = calculate_coefficient(rate, self.overshoot)
+            self.rates[stage.value] = rate
+            self.coefficients[stage.value] = coeff
+            self.ratios[stage.value] = 1. - coeff if coeff < INF else 0.
+
+        self.countdown.fill(-1.)
+
+    def gate(self, index, triggered):
+        """Turn envelope(s) on / off.
+
+        Args:
+            index (int or array): Envelope index / indices.
+            triggered (bool): Note on or off.
+        """
+        index = np.atleast_1d(index)
+        stage = self.stage[index]
+        if triggered:
+            if not self.retrigger:
+                off = (stage == Stage.OFF.value) | (stage == Stage.RELEASING.value)
+                index = index[off]
+
+            self.stage[index] = Stage.ATTACKING.value
+            self.countdown[index] = -1.
+        else:
+            holding = (stage != Stage.OFF.value) & (stage != Stage.RELEASING.value)
+            self.stage[index[holding]] = Stage.RELEASING.value
+            self.countdown[index[holding]] = -1.
+
+    def samples_until_target(self, level, target, stage):
+        """Number of curve samples until reaching the target level. Vectorized
+        time_needed() (INF for constant stages).
+        """
+        rate = self.rates[stage]
+        err = np.abs(target - level)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tStart = np.log(1. - (1. - err) / (1. + self.overshoot)) \
+                / -self.coefficients[stage]
+            nSamples = np.floor(np.maximum(0., rate - tStart))
+
+        nSamples[rate <= 0] = 0.
+        nSamples[~self.CURVES[stage]] = INF
+        return nSamples
+
+    def sample(self, bufferSize=BUFFER_SIZE, out=None):
+        """Get next bufferSize samples of all envelopes.
+
+        Kwargs:
+            bufferSize (int): Buffer length. Current curves get restarted from
+                the current levels on change.
+            out (array): Output buffer (nEnvelopes, bufferSize).
+
+        Returns:
+            array: Envelope samples (nEnvelopes, bufferSize).
+        """
+        if out is None:
+            out = np.empty((len(self), bufferSize))
+
+        if bufferSize != self.bufferSize:
+            self.bufferSize = bufferSize
+            self.countdown.fill(-1.)
+
+        k = np.arange(1, bufferSize + 1)
+        pos = np.zeros(len(self), dtype=int)
+        rows = np.arange(len(self))
+        entered = np.zeros(len(self), dtype=bool)
+        while len(rows):
+            stage = self.stage[rows]
+            level = self.level[rows]
+            start = pos[rows]
+            target = self.targets[stage]
+            ratio = self.ratios[stage]
+            unknown = rows[self.countdown[rows] < 0]
+            self.countdown[unknown] = self.samples_until_target(
+                self.level[unknown],
+                self.targets[self.stage[unknown]],
+                self.stage[unknown],
+            )
+            nSamples = self.countdown[rows]
+            remaining = bufferSize - start
+            length = np.minimum(remaining, nSamples).astype(int)
+
+            # Segment samples. Step n (1-based) within the segment. Constant
+            # stages hold their target
+            n = k - start[:, np.newaxis]
+            inside = (n >= 1) & (n <= length[:, np.newaxis])
+            curve = self.CURVES[stage]
+            values = np.repeat(target[:, np.newaxis], bufferSize, axis=1)
+            if curve.any():
+                c = np.flatnonzero(curve)
+                curveTarget = target[c] + np.sign(target[c] - level[c]) * self.overshoot
+                delta = level[c] - ratio[c] * curveTarget
+                step = np.clip(n[c] - 1, 0, None)
+                values[c] = curveTarget[:, np.newaxis] \
+                    + delta[:, np.newaxis] * ratio[c, np.newaxis] ** step
+
+            out[rows] = np.where(inside, values, out[rows])
+
+            # Advance envelopes. Like curve_samples(): A stage finishing in the
+            # buffer it was entered in (or without any samples) lands on its
+            # target, otherwise we carry on from the last filter state
+            end = np.clip(start + length - 1, 0, bufferSize - 1)
+            last = values[np.arange(len(rows)), end]
+            state = np.where(length > 0, ratio * last, level)
+            reached = nSamples < remaining
+            settled = reached & (entered[rows] | (nSamples == 0))
+            self.level[rows] = np.where(settled, target, state)
+            self.stage[rows] = np.where(reached, self.NEXT[stage], stage)
+            self.countdown[rows] = np.where(reached, -1., nSamples - length)
+            entered[rows] = reached
+            pos[rows] = start + length
+            rows = rows[reached]
+
+        return out
@@ -1,15 +1,17 @@
 """Envelope generator blocks."""
-from klang.config import BUFFER_SIZE
-from klang.audio.helpers import DT
 try:
     # C Envelope
     from klang.audio._envelope import Envelope
 except ImportError:
     # Pure Python fallback
     from klang.audio.envelope import Envelope
+import numpy as np
+
 from klang.audio.envelope import DEFAULT_OVERSHOOT
+from klang.audio.helpers import timed_notes
 from klang.block import Block
 from klang.connections import MessageInput
+from klang.context import get_context
 
 
 __all__ = ['ADSR', 'AR', 'D', 'R']
@@ -26,23 +28,51 @@ class EnvelopeBase(Block, Envelope):
             decay=decay,
             sustain=sustain,
             release=release,
-            dt=DT,
+            dt=self.context.dt,
             overshoot=overshoot,
             retrigger=retrigger,
             loop=loop,
         )
 
+    def prepare(self, context):
+        # Reinitialize envelope with new sampling interval
+        super().prepare(context)
+        Envelope.__init__(
+            self,
+            attack=self.attack,
+            decay=self.decay,
+            sustain=self.sustain,
+            release=self.release,
+            dt=context.dt,
+            overshoot=self.overshoot,
+            retrigger=self.retrigger,
+            loop=self.loop,
+        )
+
     @property
     def current_level(self):
         """Get current / latest envelope level."""
         return self.output.get_value()[-1]
 
     def update(self):
-        for note in self.input.receive():
+        # Split buffer at the note offsets
+        ctx = get_context()
+        segments = []
+        cursor = 0
+        for offset, note in timed_notes(self.input.receive(), ctx.bufferSize):
+            if offset > cursor:
+                segments.append(self.sample(offset - cursor))
+                cursor = offset
+
             self.gate(note.on)
 
-        samples = self.sample(BUFFER_SIZE)
-        self.output.set_value(samples)
+        segments.append(self.sample(ctx.bufferSize - cursor))
+        if len(segments) == 1:
+            samples, = segments
+        else:
+            samples = np.concatenate(segments)
+
+        self.output.set_value(samples.astype(ctx.dtype, copy=False))
 
     def __str__(self):
         infos = []
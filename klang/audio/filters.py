@@ -5,6 +5,7 @@ import warnings
 import numpy as np
 
 from klang.config import SAMPLING_RATE, BUFFER_SIZE
+from klang.context import get_context
 from klang.ring_buffer import RingBuffer
 
 
@@ -35,15 +36,17 @@ class PyRingBufferFilter:
 
     """Base class of Python ring buffer filters."""
 
-    def __init__(self, k: int, alpha: float = DEFAULT_ALPHA):
+    def __init__(self, k: int, alpha: float = DEFAULT_ALPHA, dtype: type =
+                 None):
         """Args:
             k: Ring buffer length.
 
         Kwargs:
             alpha: Gain factor.
+            dtype: Sample datatype. Engine context datatype by default.
         """
         self.alpha = alpha
-        self.ring = RingBuffer(k)
+        self.ring = RingBuffer(k, dtype=dtype or get_context().dtype)
 
     def filter(self, x: Sequence) -> np.ndarray:
         """Process input samples x."""
@@ -1,9 +1,17 @@
-"""Array helper functions and constants."""
+"""Array helper functions and constants.
+
+Note:
+  - DT, INTERVAL, MONO_SILENCE, ... correspond to the default engine context
+    (klang.config). Blocks use klang.context.get_context() at runtime.
+"""
 import functools
+import math
 
 import numpy as np
 
 from klang.config import SAMPLING_RATE, BUFFER_SIZE
+from klang.constants import TAU
+from klang.context import get_context
 
 
 DT = 1. / SAMPLING_RATE
@@ -16,14 +24,37 @@ NYQUIST_FREQUENCY = SAMPLING_RATE // 2
 """int: Nyquist frequency."""
 
 
-@functools.lru_cache()
-def get_silence(shape, dtype=float):
-    """Get some silence. All zero array. Cached."""
+@functools.lru_cache(maxsize=None)
+def _cached_silence(shape, dtype):
     arr = np.zeros(shape, dtype)
     arr.setflags(write=False)
     return arr
 
 
+def get_silence(shape, dtype=None):
+    """Get some silence. All zero array. Cached, there is only one read-only
+    silence array per shape / dtype (see is_silence()). Sample datatype of the
+    active engine context by default.
+    """
+    if dtype is None:
+        dtype = get_context().dtype
+
+    if np.ndim(shape) == 0:
+        shape = (shape,)
+
+    return _cached_silence(tuple(shape), np.dtype(dtype))
+
+
+def is_silence(value):
+    """Check if value is one of the shared silence arrays from get_silence().
+    Identity check, the samples do not get inspected.
+    """
+    if not isinstance(value, np.ndarray) or value.flags.writeable:
+        return False
+
+    return value is _cached_silence(value.shape, value.dtype)
+
+
 @functools.lru_cache()
 def get_time(length, dt=DT):
     """Get time values. Cached."""
@@ -32,6 +63,75 @@ def get_time(length, dt=DT):
     return arr
 
 
+def timed_notes(notes, bufferSize):
+    """Sort notes by sample offset (stable) and clip the offsets to the
+    buffer. Note-offs come before note-ons at the same offset.
+
+    Args:
+        notes (iterable): Note messages.
+        bufferSize (int): Current buffer size.
+
+    Returns:
+        list: (offset, note) tuples.
+    """
+    return sorted(
+        ((min(note.offset, bufferSize - 1), note) for note in notes),
+        key=lambda item: (item[0], item[1].on),
+    )
+
+
+def step_signal(current, value, offset, bufferSize, dtype=float):
+    """Switch signal to a new value at sample offset.
+
+    Args:
+        current (float or array): Current value or signal for the buffer.
+        value (float): New value from offset onwards.
+        offset (int): Sample offset inside the buffer.
+        bufferSize (int): Current buffer size.
+
+    Kwargs:
+        dtype (type): Datatype of the stepped signal.
+
+    Returns:
+        float or array: Value if offset is zero. Otherwise stepped signal.
+    """
+    if offset == 0:
+        return value
+
+    signal = np.empty(bufferSize, dtype)
+    signal[:offset] = current[:offset] if np.ndim(current) else current
+    signal[offset:] = value
+    return signal
+
+
+def phase_crossings(phase, increment, bufferSize, period=TAU):
+    """Sample offsets inside the buffer where a linear phase ramp reaches a
+    multiple of period. A phase right on a multiple counts at offset 0.
+
+    Args:
+        phase (float): Phase at the start of the buffer.
+        increment (float): Phase increment per sample.
+        bufferSize (int): Current buffer size.
+
+    Kwargs:
+        period (float): Phase period.
+
+    Yields:
+        int: Sample offset.
+    """
+    if increment <= 0:
+        return
+
+    n = math.ceil(phase / period)
+    while True:
+        offset = math.ceil((n * period - phase) / increment)
+        if offset >= bufferSize:
+            return
+
+        yield offset
+        n += 1
+
+
 MONO_SILENCE = get_silence(BUFFER_SIZE)
 """array: Default array for mono silence."""
 
@@ -1,19 +1,24 @@
 """Klang sound engine object."""
-from typing import Callable, List
+from typing import Callable
 import logging
 import time
 
 import numpy as np
 import pyaudio
 
-from klang.audio.helpers import INTERVAL, get_silence, get_time
-from klang.audio.wavfile import write_wave
+from klang.audio.backends import AudioBackend, PyAudioBackend
+from klang.audio.helpers import get_silence, get_time
+from klang.audio.render_ahead import RenderAhead
+from klang.audio.telemetry import Telemetry
+from klang.audio.wavfile import WaveWriter
 from klang.block import Block
 from klang.clock import ClockMixin
-from klang.config import BUFFER_SIZE, SAMPLING_RATE
 from klang.constants import INF
 from klang.constants import MONO
+from klang.connections import PatchRevision
+from klang.context import get_context
 from klang.errors import KlangError
+from klang.profiling import Profiler
 from klang.progress_bar import ProgressBar
 
 
@@ -60,41 +65,27 @@ def look_for_audio_blocks(blocks):
     return adc, dac
 
 
-def validate_sound_card_channels(pa, adc, dac):
-    """Given the audio input and output blocks determine if we have enough audio
-    channels on the default devices.
+def input_samples(in_data, frame_count, nChannels):
+    """Sound card input samples from stream callback in_data.
 
     Args:
-        pa (pyaudio): PyAudio instance.
-        adc (Adc): Audio input block.
-        dac (dac): Audio output block.
-    """
-    inputDeviceInfo = pa.get_default_input_device_info()
-    if adc.nChannels > inputDeviceInfo['maxInputChannels']:
-        raise ValueError('Not enough sound card inputs!')
-
-    outputDeviceInfo = pa.get_default_output_device_info()
-    if dac.nChannels > outputDeviceInfo['maxOutputChannels']:
-        raise ValueError('Not enough sound card outputs!')
-
-
-def pack_signals(signals):
-    """Interleave samples from multiple mono signals. C contiguous for audio
-    card (transposing signals does not work).
+        in_data (bytes or array): Raw float32 samples or an already
+            (frames, channels) shaped array.
+        frame_count (int): Number of frames.
+        nChannels (int): Number of input channels.
 
-    Packed format:
-        [[L0, R0]
-         [L1, R1]
-         [L2, R3]
-            ...
-         [LN, RN]]
+    Returns:
+        array: Input samples (frame_count, nChannels) shaped. None if there is
+            no input.
     """
-    shape = (BUFFER_SIZE, len(signals))
-    ret = np.empty(shape, dtype=D_TYPE)
-    for col, samples in enumerate(signals):
-        ret[:, col] = samples
+    if in_data is None:
+        return None
+
+    if isinstance(in_data, np.ndarray):
+        return in_data
 
-    return ret
+    raw = np.frombuffer(in_data, dtype=D_TYPE)
+    return raw.reshape((frame_count, nChannels))
 
 
 class ChannelMismatch(KlangError):
@@ -111,74 +102,133 @@ class Adc(Block):
         self.nChannels = nChannels
         self.mute_outputs()
 
+    def prepare(self, context):
+        super().prepare(context)
+        self.mute_outputs()
+
     def mute_outputs(self):
         """Mute all output connections."""
-        silence = get_silence(BUFFER_SIZE)
+        silence = get_silence(self.context.bufferSize, self.context.dtype)
         for output in self.outputs:
             output.set_value(silence)
 
     def inject_samples(self, samples):
-        """Inject audio samples into network."""
-        for signal, output in zip(samples.T, self.outputs):
-            output.set_value(signal)
+        """Inject audio samples into network. Outputs get column views of the
+        (frames, channels) shaped samples (no copy). Surplus columns are
+        ignored.
+        """
+        for col, output in enumerate(self.outputs):
+            output.set_value(samples[:, col])
 
 
 class Dac(Block):
 
-    """Sound card audio output."""
+    """Sound card audio output. Owns a persistent interleaved output buffer.
+    The channel layout (which input goes to which output channels) gets
+    resolved once and only re-resolved when the network gets re-patched or an
+    input changes its shape.
+    """
 
     def __init__(self, nChannels=MONO):
         super().__init__(nInputs=nChannels)
         self.nChannels = nChannels
+        self.buffer = None
+        self.layout = None
+        self.layoutRevision = -1
+        self.mute_inputs()
+        self.allocate_buffer()
+
+    def prepare(self, context):
+        super().prepare(context)
         self.mute_inputs()
+        self.allocate_buffer()
 
     def mute_inputs(self):
         """Mute all input connections."""
-        silence = get_silence(BUFFER_SIZE)
+        silence = get_silence(self.context.bufferSize, self.context.dtype)
         for input_ in self.inputs:
             input_.set_value(silence)
 
-    def iterate_channels(self):
-        """Iterate over all incoming audio channels (no matter if value
-        connections provides a MONO, STEREO or multichannel signal).
+    def allocate_buffer(self):
+        """Allocate interleaved output buffer for the current context."""
+        shape = (self.context.bufferSize, self.nChannels)
+        self.buffer = np.zeros(shape, dtype=D_TYPE)
+        self.layout = None
+
+    def resolve_layout(self):
+        """Map incoming values to strided views of the output buffer.
+
+        Layout entries:
+            (input, value shape, destination view, number of rows). Value
+            shape is None for non-array values. Number of rows
+            is None for mono values (whole value gets copied) and 0 for
+            non-audio values which get skipped.
         """
-        # ndim check implementation is a little faster than iterating over
-        # np.atleast_2d(...)
-        channelCount = 0
+        layout = []
+        channel = 0
+        columns = self.buffer.T  # (nChannels, bufferSize) view
         for input_ in self.inputs:
+            if channel == self.nChannels:
+                break
+
             val = input_.get_value()
+            shape = getattr(val, 'shape', None)
             ndim = np.ndim(val)
             if ndim == MONO:
-                yield val
-                channelCount += 1
-                if channelCount == self.nChannels:
-                    return
-
+                layout.append((input_, shape, columns[channel], None))
+                channel += 1
             elif ndim > MONO:
-                for channel in val:
-                    yield channel
-                    channelCount += 1
-                    if channelCount == self.nChannels:
-                        return
+                nRows = min(len(val), self.nChannels - channel)
+                dst = columns[channel:channel+nRows]
+                layout.append((input_, shape, dst, nRows))
+                channel += nRows
+            else:
+                layout.append((input_, shape, None, 0))
+
+        if channel != self.nChannels:
+            msg = 'Got %d channels. Need %d!' % (channel, self.nChannels)
+            raise ChannelMismatch(msg)
+
+        self.layout = layout
+        self.layoutRevision = PatchRevision.current
 
     def collect_samples(self):
-        """Collect audio samples from all incoming connections. Pack them
-        together for audio card.
+        """Collect audio samples from all incoming connections. Interleave
+        them into the output buffer for the audio card.
 
         Returns:
-            array: Audio samples (BUFFER_SIZE, nChannels) shaped.
+            array: Audio samples (bufferSize, nChannels) shaped. Persistent
+                buffer, gets overwritten by the next call.
         """
-        signals = list(self.iterate_channels())
-        if len(signals) != self.nChannels:
-            msg = 'Got %d channels. Need %d!' % (len(signals), self.nChannels)
-            raise ChannelMismatch(msg)
+        if self.layout is None or self.layoutRevision != PatchRevision.current:
+            self.resolve_layout()
+
+        for input_, shape, dst, nRows in self.layout:
+            val = input_.get_value()
+            if getattr(val, 'shape', None) != shape:
+                # Layout outdated
+                self.resolve_layout()
+                return self.collect_samples()
+
+            if nRows is None:
+                np.copyto(dst, val)
+            elif nRows:
+                np.copyto(dst, val[:nRows])
 
-        return pack_signals(signals)
+        return self.buffer
+
+
+def offline_cycles(duration: float) -> int:
+    """Number of buffer cycles for an offline bounce of a given duration."""
+    ctx = get_context()
+    return int(duration * ctx.samplingRate // ctx.bufferSize)
 
 
 def run_audio_engine(adc: Adc, dac: Dac, execute_all_blocks: Callable, duration:
                      float = INF, fadeout: float = 0., filepath: str = '',
-                     offline: bool = False):
+                     offline: bool = False, profiler: Profiler = None,
+                     telemetry: Telemetry = None, renderAhead: int = 0,
+                     backend: AudioBackend = None):
     """Run klang audio engine from adc / dac blocks. Ex-KlangGeber. Can work
     offline and dump the generated audio to a WAV file by the end.
 
@@ -190,40 +240,58 @@ def run_audio_engine(adc: Adc, dac: Dac, execute_all_blocks: Callable, duration:
     Kwargs:
         duration: Maximum running duration.
         fadeout: Fadeout time for WAV export.
-        filepath: WAV file path. Dumpy audio output to WAV file.
+        filepath: WAV file path. Stream audio output to WAV file (gets
+            normalized when finished).
         offline: Render audio offline.
+        profiler: Record buffer cycle durations.
+        telemetry: Record deadline misses and PyAudio status flags. Can be
+            polled from another thread.
+        renderAhead: Live mode only. Execute the blocks in a separate thread
+            up to renderAhead buffers ahead of the sound card (see
+            klang.audio.render_ahead). Adds renderAhead buffer intervals of
+            latency.
+        backend: Live mode only. Audio backend (default sound card devices via
+            PyAudio). See klang.audio.backends for a headless null device.
     """
     logger = logging.getLogger('KlangGeber')
+    ctx = get_context()
 
     # Setup stream callback
     playTime = 0.
     """Current play time."""
 
-    capturedFrames: List[np.ndarray] = []
-    """Captured audio chunks for WAV dump."""
+    writer = None
+    """Streaming WAV writer for audio dump."""
+
+    if filepath:
+        writer = WaveWriter(
+            filepath,
+            samplingRate=ctx.samplingRate,
+            nChannels=dac.nChannels,
+            normalize=True,
+        )
 
     fadeOutStart = duration - fadeout
     """Start time of fade out."""
 
-    T = get_time(BUFFER_SIZE)
+    T = get_time(ctx.bufferSize, ctx.dt)
 
     def fade_out_envelope(t):
         """Create fade-out envelope for a given timestamp."""
         env = np.interp(t + T, [fadeOutStart, duration], [1., 0.], left=1., right=0.)
         return env.reshape(-1, 1)
 
-    def stream_callback(in_data, frame_count, time_info, status):
-        """Audio stream callback for PyAudio."""
-        nonlocal playTime, capturedFrames
-        if status:
-            name = PY_AUDIO_CODE_NAMES.get(status, status)
-            logger.warning('PyAudio status changed to %s', name)
+    def process(samples=None):
+        """Execute all blocks for one buffer cycle.
 
-        # Process input audio samples
-        if in_data:
-            # TODO: Make me, test me
-            raw = np.frombuffer(in_data, dtype=D_TYPE)
-            samples = raw.reshape((frame_count, adc.nChannels))
+        Kwargs:
+            samples (array): Sound card input samples.
+
+        Returns:
+            tuple: Output frames and if it was the last buffer cycle.
+        """
+        nonlocal playTime
+        if samples is not None:
             adc.inject_samples(samples)
 
         # Trigger global block execution / propagate audio stream callback
@@ -233,68 +301,140 @@ def run_audio_engine(adc: Adc, dac: Dac, execute_all_blocks: Callable, duration:
         execute_all_blocks()
 
         # Fetch output audio samples from block network
-        try:
-            outData = dac.collect_samples()
-        except ChannelMismatch as err:
-            logger.error(err, exc_info=True)
-            silence = get_silence((frame_count, dac.nChannels), D_TYPE)
-            return silence, pyaudio.paAbort
-
+        outData = dac.collect_samples()
         if playTime >= fadeOutStart:
             outData *= fade_out_envelope(playTime)
 
-        if filepath:
-            capturedFrames.append(outData)
+        if writer:
+            writer.write(outData)
 
-        playTime += INTERVAL
-        if playTime >= duration:
-            return outData, pyaudio.paComplete
-
-        return outData, pyaudio.paContinue
+        playTime += ctx.interval
+        return outData, playTime >= duration
 
-    if offline:
-        logger.info('Offline bouncing.')
-        if duration == INF:
-            msg = 'Offline mode and duration set to INF. You will never get anything.'
-            logger.warning(msg)
+    if profiler:
+        process = profiler.time_cycles(process)
 
-        nCycles = int(duration * SAMPLING_RATE // BUFFER_SIZE)
-        for _ in ProgressBar.range(nCycles, prefix='Bouncing'):
-            stream_callback(None, BUFFER_SIZE, None, 0)
+    def warn_status(status):
+        """Log PyAudio status flags."""
+        name = PY_AUDIO_CODE_NAMES.get(status, status)
+        logger.warning('PyAudio status changed to %s', name)
 
-    else:
-        # Example: Callback Mode Audio I/O from
-        # https://people.csail.mit.edu/hubert/pyaudio/docs/
-        pa = pyaudio.PyAudio()
-        validate_sound_card_channels(pa, adc, dac)
-        assert D_TYPE is np.float32
-        capturedFrames = []
-        stream = pa.open(
-            rate=SAMPLING_RATE,
-            frames_per_buffer=BUFFER_SIZE,
-            channels=dac.nChannels,  # TODO: How to 1x input, 2x outputs?
-            format=pyaudio.paFloat32,
-            input=(adc.nChannels > 0),
-            output=(dac.nChannels > 0),
-            stream_callback=stream_callback,
-        )
+    def stream_callback(in_data, frame_count, time_info, status):
+        """Audio stream callback for PyAudio."""
+        if status:
+            warn_status(status)
 
+        # Process input audio samples
+        samples = input_samples(in_data, frame_count, adc.nChannels)
         try:
-            logger.info('Starting up audio engine with default devices')
-            stream.start_stream()
-            while stream.is_active():
-                time.sleep(0.1)
+            outData, done = process(samples)
+        except ChannelMismatch as err:
+            logger.error(err, exc_info=True)
+            silence = get_silence((frame_count, dac.nChannels), D_TYPE)
+            return silence, pyaudio.paAbort
 
-        except KeyboardInterrupt:
-            pass
+        if done:
+            return outData, pyaudio.paComplete
 
-        finally:
-            logger.info('Shutting down audio engine')
-            stream.stop_stream()
-            stream.close()
-            pa.terminate()
+        return outData, pyaudio.paContinue
 
-    if filepath:
-        logger.info('Writing audio dump to WAV file %r', filepath)
-        samples = np.concatenate(capturedFrames)
-        write_wave(samples, filepath)
+    renderer = None
+    """Render-ahead thread."""
+
+    if renderAhead and offline:
+        logger.info('Ignoring renderAhead for offline bouncing')
+    elif renderAhead:
+        renderer = RenderAhead(
+            process,
+            nBuffers=renderAhead,
+            outputShape=(ctx.bufferSize, dac.nChannels),
+            inputShape=(ctx.bufferSize, adc.nChannels) if adc.nChannels else None,
+        )
+        outBuffer = np.zeros((ctx.bufferSize, dac.nChannels), D_TYPE)
+
+        def render_ahead_callback(in_data, frame_count, time_info, status):
+            """Audio stream callback for PyAudio. Only copies out the frames
+            rendered by the render-ahead thread.
+            """
+            if status:
+                warn_status(status)
+
+            samples = input_samples(in_data, frame_count, adc.nChannels)
+            if samples is not None:
+                renderer.push_input(samples)
+
+            if not renderer.pop_output(outBuffer):
+                outBuffer.fill(0.)
+
+            if renderer.drained:
+                return outBuffer, pyaudio.paComplete
+
+            return outBuffer, pyaudio.paContinue
+
+        stream_callback = render_ahead_callback
+
+    if telemetry:
+        stream_callback = telemetry.monitor(stream_callback)
+
+    try:
+        if offline:
+            logger.info('Offline bouncing.')
+            if duration == INF:
+                msg = 'Offline mode and duration set to INF. You will never get anything.'
+                logger.warning(msg)
+
+            nCycles = offline_cycles(duration)
+            for _ in ProgressBar.range(nCycles, prefix='Bouncing'):
+                stream_callback(None, ctx.bufferSize, None, 0)
+
+        else:
+            # Example: Callback Mode Audio I/O from
+            # https://people.csail.mit.edu/hubert/pyaudio/docs/
+            if backend is None:
+                backend = PyAudioBackend()
+
+            backend.validate_channels(adc, dac)
+            assert D_TYPE is np.float32
+            stream = backend.open(
+                rate=ctx.samplingRate,
+                framesPerBuffer=ctx.bufferSize,
+                nInputs=adc.nChannels,
+                nOutputs=dac.nChannels,
+                callback=stream_callback,
+            )
+
+            try:
+                if renderer:
+                    logger.info('Rendering %d buffers ahead', renderAhead)
+                    renderer.start()
+
+                logger.info('Starting up audio engine with %s', type(backend).__name__)
+                stream.start_stream()
+                while stream.is_active():
+                    time.sleep(0.1)
+
+            except KeyboardInterrupt:
+                pass
+
+            finally:
+                logger.info('Shutting down audio engine')
+                stream.stop_stream()
+                stream.close()
+                backend.terminate()
+                if renderer:
+                    renderer.stop()
+                    logger.info(
+                        'Render-ahead underruns: %d, input overruns: %d',
+                        renderer.nUnderruns, renderer.nOverruns,
+                    )
+
+            if renderer and renderer.error:
+                if isinstance(renderer.error, ChannelMismatch):
+                    logger.error(renderer.error)
+                else:
+                    raise renderer.error
+
+    finally:
+        if writer:
+            logger.info('Finishing audio dump WAV file %r', filepath)
+            writer.close()
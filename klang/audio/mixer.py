@@ -1,8 +1,12 @@
 """Mono and stereo audio signal mixer."""
-from klang.audio.helpers import MONO_SILENCE, STEREO_SILENCE
+import numpy as np
+
+from klang.arena import BufferSlot
 from klang.audio.panning import CENTER, panning_amplitudes
 from klang.block import fetch_output, Block
 from klang.connections import Input
+from klang.constants import MONO, STEREO
+from klang.context import get_context
 
 
 __all__ = ['Mixer', 'StereoMixer']
@@ -18,8 +22,16 @@ class Mixer(Block):
 
     Attributes:
         gains (list): Gain levels.
+        scratch (BufferSlot): Buffer for the weighted channel signal.
     """
 
+    IN_PLACE = True
+
+    SILENCE_POLICY = 'stateless'
+
+    N_CHANNELS = MONO
+    """int: Number of output channels."""
+
     def __init__(self, nInputs=0, gains=None):
         """Kwargs:
             nInputs (int): Number of inputs.
@@ -31,6 +43,7 @@ class Mixer(Block):
         assert len(gains) == nInputs
         super().__init__(nInputs=nInputs, nOutputs=1)
         self.gains = gains
+        self.scratch = BufferSlot()
 
     def add_new_channel(self, gain=DEFAULT_GAIN):
         """Add a new input channel to the mixer."""
@@ -38,13 +51,24 @@ class Mixer(Block):
         self.inputs.append(Input(owner=self))
         self.gains.append(gain)
 
+    def prepare_buffers(self):
+        """Get zeroed output buffer and scratch buffer."""
+        ctx = get_context()
+        shape = (ctx.bufferSize,)
+        if self.N_CHANNELS != MONO:
+            shape = (self.N_CHANNELS,) + shape
+
+        signalSum = self.output.slot.get(shape, ctx.dtype)
+        signalSum.fill(0.)
+        return signalSum, self.scratch.get(shape, ctx.dtype)
+
     def update(self):
-        signalSum = MONO_SILENCE.copy()
+        signalSum, weighted = self.prepare_buffers()
         for gain, channel in zip(self.gains, self.inputs):
-            signalSum += gain * channel.value
+            signalSum += np.multiply(gain, channel.value, out=weighted)
 
         if self.nInputs > 1:
-            signalSum = signalSum / self.nInputs
+            np.divide(signalSum, self.nInputs, out=signalSum)
 
         self.output.set_value(signalSum)
 
@@ -69,6 +93,8 @@ class StereoMixer(Mixer):
         pannings (list): Panning levels.
     """
 
+    N_CHANNELS = STEREO
+
     def __init__(self, nInputs=0, gains=None, pannings=None,
                  mode='constant_power', panLaw=None):
         """Kwargs:
@@ -93,12 +119,12 @@ class StereoMixer(Mixer):
         self.pannings.append(panning)
 
     def update(self):
-        signalSum = STEREO_SILENCE.copy()
+        signalSum, weighted = self.prepare_buffers()
         for gain, panning, channel in zip(self.gains, self.pannings, self.inputs):
             pan = panning_amplitudes(panning, self.mode, self.panLaw)
-            signalSum += gain * pan * channel.get_value()
+            signalSum += np.multiply(gain * pan, channel.get_value(), out=weighted)
 
         if self.nInputs > 1:
-            signalSum = signalSum / self.nInputs
+            np.divide(signalSum, self.nInputs, out=signalSum)
 
         self.output.set_value(signalSum)
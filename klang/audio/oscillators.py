@@ -2,17 +2,20 @@
 import numpy as np
 from scipy.signal.waveforms import _chirp_phase
 
-from klang.audio.helpers import DT, INTERVAL, get_time
+from klang.audio.helpers import get_time
 from klang.audio.waves import sine
 from klang.connections import Input
 from klang.block import Block
-from klang.config import BUFFER_SIZE
 from klang.constants import TAU, SCALAR
+from klang.context import get_context
 from klang.math import linear_mapping
 from klang.music.tempo import compute_rate
 
 
-__all__ = ['FmOscillator', 'Lfo', 'Oscillator', 'Phasor', 'PwmOscillator']
+__all__ = [
+    'FmOscillator', 'Lfo', 'Oscillator', 'OscillatorBank', 'Phasor',
+    'PwmOscillator',
+]
 
 
 def chirp_phase(t, freqStart, tEnd, freqEnd, method='linear', vertex_zero=True):
@@ -52,19 +55,50 @@ def sample_phase(frequency, startPhase=0.):
         startPhase (float): Value of first phase sample.
 
     Returns:
-        tuple: Phase array and next starting phase.
+        tuple: Phase array (sample datatype of the engine context) and next
+            starting phase (double precision).
     """
+    ctx = get_context()
     constFrequency = (np.ndim(frequency) == 0)
     if constFrequency:
-        t = get_time(BUFFER_SIZE + 1, DT)
+        t = get_time(ctx.bufferSize + 1, ctx.dt)
         phase = TAU * frequency * t + startPhase
     else:
-        phase = np.empty(BUFFER_SIZE + 1)
+        phase = np.empty(ctx.bufferSize + 1)
         phase[0] = startPhase
-        phase[1:] = TAU * DT * np.cumsum(frequency) + startPhase
+        phase[1:] = TAU * ctx.dt * np.cumsum(frequency) + startPhase
 
     phase = np.mod(phase, TAU)
-    return phase[:-1], phase[-1]
+    return phase[:-1].astype(ctx.dtype, copy=False), phase[-1]
+
+
+def sample_phases(frequencies, startPhases):
+    """Vectorized sample_phase() for multiple oscillators at once.
+
+    Args:
+        frequencies (array): Frequency per oscillator (N,) or varying
+            frequencies (N, bufferSize).
+        startPhases (array): Start phase per oscillator (N,).
+
+    Returns:
+        tuple: Phase array (N, bufferSize) (sample datatype of the engine
+            context) and next start phases (N,) (double precision).
+    """
+    ctx = get_context()
+    frequencies = np.asarray(frequencies, dtype=float)
+    startPhases = np.asarray(startPhases, dtype=float)
+    if frequencies.ndim < 2:
+        t = get_time(ctx.bufferSize + 1, ctx.dt)
+        phase = np.multiply.outer(TAU * frequencies, t)
+    else:
+        phase = np.empty((len(frequencies), ctx.bufferSize + 1))
+        phase[:, 0] = 0.
+        np.cumsum(frequencies, axis=1, out=phase[:, 1:])
+        phase *= TAU * ctx.dt
+
+    phase += startPhases[:, np.newaxis]
+    np.mod(phase, TAU, out=phase)
+    return phase[:, :-1].astype(ctx.dtype, copy=False), phase[:, -1].copy()
 
 
 class Phasor(Block):
@@ -78,6 +112,8 @@ class Phasor(Block):
         currentPhase (float): Current phase state of the phasor.
     """
 
+    CONTROL_RATE = True
+
     def __init__(self, frequency=1., startPhase=0.):
         """Kwargs:
             frequency (float): Initial frequency value..
@@ -92,7 +128,8 @@ class Phasor(Block):
         """Get next sample and step phasor further."""
         phase = self.currentPhase
         freq = compute_rate(self.frequency.value)
-        self.currentPhase = (TAU * freq * INTERVAL + self.currentPhase) % TAU
+        interval = get_context().interval
+        self.currentPhase = (TAU * freq * interval + self.currentPhase) % TAU
         return phase
 
     def update(self):
@@ -118,6 +155,8 @@ class Oscillator(Phasor):
         wave_func (function): Circular phase -> value wave from function.
     """
 
+    CONTROL_RATE = False
+
     def __init__(self, frequency=440., wave_func=sine, startPhase=0.):
         """Kwargs:
             frequency (float): Initial frequency value..
@@ -130,7 +169,7 @@ class Oscillator(Phasor):
     def sample(self):
         freq = compute_rate(self.frequency.value)
         phase, self.currentPhase = sample_phase(freq, self.currentPhase)
-        return self.wave_func(phase)
+        return self.wave_func(phase).astype(phase.dtype, copy=False)
 
     def __deepcopy__(self, memo):
         return type(self)(
@@ -159,11 +198,11 @@ class Lfo(Phasor):
             frequency (float): Initial frequency value.
             wave_func (function): Wave shape function. Phase -> waveform sample lookup.
             shape (int): Sample output shape. Either 1 (scalar / one sample per
-                buffer) or BUFFER_SIZE (full buffer of samples).
+                buffer) or the buffer size (full buffer of samples).
             outputRange (tuple): Output value range (ymin, ymax).
             startPhase (float): Initial phase value.
         """
-        assert shape in {SCALAR, BUFFER_SIZE}
+        assert shape in {SCALAR, get_context().bufferSize}
         super().__init__(frequency, startPhase)
         self.wave_func = wave_func
         self.shape = shape
@@ -174,9 +213,12 @@ class Lfo(Phasor):
         freq = compute_rate(self.frequency.value)
         if self.shape == SCALAR:
             phase = self.currentPhase
-            self.currentPhase = (TAU * freq * INTERVAL + self.currentPhase) % TAU
+            interval = get_context().interval
+            self.currentPhase = (TAU * freq * interval + self.currentPhase) % TAU
         else:
             phase, self.currentPhase = sample_phase(freq, self.currentPhase)
+            values = self.wave_func(phase).astype(phase.dtype, copy=False)
+            return self.scale * values + self.offset
 
         return self.scale * self.wave_func(phase) + self.offset
 
@@ -217,7 +259,8 @@ class FmOscillator(Oscillator):
         freq = compute_rate(self.frequency.value)
         phase, self.currentPhase = sample_phase(freq, startPhase=self.currentPhase)
         modSamples = self.modulator.output.value
-        return self.wave_func(phase + self.intensity * modSamples)
+        values = self.wave_func(phase + self.intensity * modSamples)
+        return values.astype(phase.dtype, copy=False)
 
     def update(self):
         self.modulator.update()
@@ -242,6 +285,8 @@ class PwmOscillator(Phasor):
         dutyCycle (Input): Duty cycle value input.
     """
 
+    CONTROL_RATE = False
+
     def __init__(self, frequency=440., dutyCycle=.5, startPhase=0.):
         """Kwargs:
             frequency (float): Initial frequency value (carrier frequency).
@@ -257,7 +302,7 @@ class PwmOscillator(Phasor):
         freq = compute_rate(self.frequency.value)
         phase, self.currentPhase = sample_phase(freq, startPhase=self.currentPhase)
         active = (phase < TAU * self.dutyCycle.value)
-        return 2. * active - 1.
+        return np.where(active, phase.dtype.type(1.), phase.dtype.type(-1.))
 
     def __deepcopy__(self, memo):
         return type(self)(
@@ -267,6 +312,82 @@ class PwmOscillator(Phasor):
         )
 
 
+class OscillatorBank(Block):
+
+    """Bank of N oscillators sharing the same wave function. Phases and
+    frequencies are held in arrays and all oscillators get sampled in one
+    vectorized pass. Outputs a (N, bufferSize) block. Disabled oscillators
+    output zeros and keep their phase.
+
+    Attributes:
+        frequency (Input): Frequency input. Scalar, (N,) array or varying
+            (N, bufferSize) frequencies.
+        wave_func (function): Circular phase -> value wave from function.
+        phases (array): Current phase state per oscillator (double precision).
+        enabled (array): Boolean enable mask per oscillator.
+    """
+
+    IN_PLACE = True
+
+    def __init__(self, nOscillators, frequency=440., wave_func=sine,
+                 startPhase=0.):
+        """Args:
+            nOscillators (int): Number of oscillators.
+
+        Kwargs:
+            frequency (float or array): Initial frequency value(s).
+            wave_func (function): Wave shape function. Phase -> waveform sample lookup.
+            startPhase (float or array): Initial phase value(s).
+        """
+        super().__init__(nInputs=1, nOutputs=1)
+        self.frequency, = self.inputs
+        self.frequency.set_value(np.full(nOscillators, frequency, dtype=float))
+        self.wave_func = wave_func
+        self.phases = np.full(nOscillators, startPhase, dtype=float)
+        self.enabled = np.ones(nOscillators, dtype=bool)
+
+    def __len__(self):
+        return len(self.phases)
+
+    def sample(self):
+        """Get next samples of all oscillators and step phases further."""
+        ctx = get_context()
+        shape = (len(self), ctx.bufferSize)
+        out = self.output.slot.get(shape, ctx.dtype)
+        freqs = self.frequency.value
+        frequencies = np.broadcast_to(freqs, shape[:1] + np.shape(freqs)[1:])
+        if self.enabled.all():
+            phase, self.phases = sample_phases(frequencies, self.phases)
+            out[...] = self.wave_func(phase)
+            return out
+
+        out.fill(0.)
+        active = np.flatnonzero(self.enabled)
+        if len(active):
+            phase, self.phases[active] = sample_phases(
+                frequencies[active], self.phases[active],
+            )
+            out[active] = self.wave_func(phase)
+
+        return out
+
+    def update(self):
+        self.output.set_value(self.sample())
+
+    def __str__(self):
+        return '%s(%d oscillators)' % (type(self).__name__, len(self))
+
+    def __deepcopy__(self, memo):
+        bank = type(self)(
+            len(self),
+            wave_func=self.wave_func,
+            startPhase=self.phases,
+        )
+        bank.frequency.set_value(np.copy(self.frequency.value))
+        bank.enabled[:] = self.enabled
+        return bank
+
+
 class WavetableOscillator(Oscillator):
     # TODO(atheler): Make me!
     pass
@@ -289,11 +410,21 @@ class Chirper(Block):
         self.endFrequency = endFrequency
         self.method = method
         self.wave_func = wave_func
-        self.t = get_time(BUFFER_SIZE).copy()
+        self.t = self.start_times()
+
+    @staticmethod
+    def start_times(t0=0.):
+        """Time values of the first buffer (starting at t0)."""
+        ctx = get_context()
+        return t0 + get_time(ctx.bufferSize, ctx.dt)
+
+    def prepare(self, context):
+        super().prepare(context)
+        self.t = self.start_times(self.t[0])
 
     def reset(self):
         """Reset chirper to start state."""
-        self.t = get_time(BUFFER_SIZE).copy()
+        self.t = self.start_times()
 
     def update(self):
         phase = chirp_phase(
@@ -304,5 +435,5 @@ class Chirper(Block):
             self.method,
         )
         values = self.wave_func(phase)
-        self.output.set_value(values)
-        self.t += DT * BUFFER_SIZE
+        self.output.set_value(values.astype(get_context().dtype, copy=False))
+        self.t += get_context().interval
@@ -0,0 +1,215 @@
+"""Render-ahead playback.
+
+By default the whole block network gets executed inside the PyAudio stream
+callback. Any hiccup (garbage collection, a slow buffer, other processes on a
+shared host) directly results in an audible dropout. In render-ahead mode a
+dedicated thread executes the blocks up to N buffers ahead of the sound card
+and puts the packed frames into a preallocated ring of float32 buffers. The
+stream callback only copies the next buffer out.
+
+Latency / safety tradeoff: N buffers absorb hiccups of up to N buffer
+intervals but also delay the output by N buffer intervals. Sound card input
+samples go through a ring as well and get the same additional latency.
+
+Usage:
+    >>> run_klang(dac, renderAhead=4)
+"""
+import threading
+import time
+
+import numpy as np
+
+
+__all__ = ['FrameRing', 'RenderAhead']
+
+
+class FrameRing:
+
+    """Lock free single producer / single consumer ring of preallocated frame
+    buffers. Producer and consumer only advance their own counter.
+
+    Attributes:
+        buffers (array): Frame buffers (capacity, nFrames, nChannels) shaped.
+        capacity (int): Number of frame buffers.
+        writeCount (int): Total number of pushed buffers.
+        readCount (int): Total number of popped buffers.
+    """
+
+    def __init__(self, capacity: int, shape: tuple, dtype: type = np.float32):
+        """Args:
+            capacity: Number of frame buffers.
+            shape: Frame buffer shape (nFrames, nChannels).
+
+        Kwargs:
+            dtype: Sample datatype.
+        """
+        if capacity < 1:
+            raise ValueError('Capacity has to be at least one buffer!')
+
+        self.buffers = np.zeros((capacity,) + tuple(shape), dtype)
+        self.capacity = capacity
+        self.writeCount = 0
+        self.readCount = 0
+
+    def __len__(self) -> int:
+        return self.writeCount - self.readCount
+
+    @property
+    def empty(self) -> bool:
+        """If there is nothing to pop."""
+        return self.writeCount == self.readCount
+
+    @property
+    def full(self) -> bool:
+        """If there is no space left to push."""
+        return self.writeCount - self.readCount >= self.capacity
+
+    def push(self, frames) -> bool:
+        """Copy frames into the next free buffer (producer side).
+
+        Returns:
+            If there was space left.
+        """
+        if self.full:
+            return False
+
+        self.buffers[self.writeCount % self.capacity] = frames
+        self.writeCount += 1  # Publish after copying
+        return True
+
+    def pop(self, out: np.ndarray) -> bool:
+        """Copy the oldest buffer into out (consumer side).
+
+        Returns:
+            If there was a buffer to pop.
+        """
+        if self.empty:
+            return False
+
+        np.copyto(out, self.buffers[self.readCount % self.capacity])
+        self.readCount += 1  # Release after copying
+        return True
+
+
+class RenderAhead:
+
+    """Render thread which executes the block network ahead of the stream
+    callback.
+
+    Attributes:
+        process (callable): Renders one buffer. Takes the input samples and
+            returns the output frames and if it was the last buffer.
+        outputRing (FrameRing): Rendered output frames.
+        inputRing (FrameRing): Sound card input samples. None without inputs.
+        nUnderruns (int): Number of callbacks without rendered frames.
+        nOverruns (int): Number of dropped input buffers.
+        finished (bool): Render thread is done.
+        error (Exception): Exception which stopped the render thread.
+    """
+
+    def __init__(self, process, nBuffers: int, outputShape: tuple, inputShape:
+                 tuple = None, pollInterval: float = .001):
+        """Args:
+            process: Render function (see attributes).
+            nBuffers: Number of buffers to render ahead.
+            outputShape: Output frame buffer shape.
+
+        Kwargs:
+            inputShape: Input frame buffer shape. No input ring if None.
+            pollInterval: Sleep interval of the render thread when the output
+                ring is full.
+        """
+        self.process = process
+        self.outputRing = FrameRing(nBuffers, outputShape)
+        self.inputRing = None
+        self.inputSamples = None
+        if inputShape is not None:
+            self.inputRing = FrameRing(nBuffers, inputShape)
+            self.inputSamples = np.zeros(inputShape, np.float32)
+
+        self.pollInterval = pollInterval
+        self.nUnderruns = 0
+        self.nOverruns = 0
+        self.finished = False
+        self.error = None
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self.run,
+            name='KlangRenderAhead',
+            daemon=True,
+        )
+
+    def start(self, timeout: float = None):
+        """Start render thread and wait until the output ring is primed.
+
+        Kwargs:
+            timeout: Maximum priming duration.
+        """
+        self._thread.start()
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while not self.outputRing.full and not self.finished:
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+            time.sleep(self.pollInterval)
+
+    def stop(self):
+        """Stop render thread and wait for it."""
+        self._stopped = True
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def next_input(self):
+        """Next input samples for the render thread (or silence if the sound
+        card did not deliver in time).
+        """
+        if self.inputRing is None:
+            return None
+
+        if not self.inputRing.pop(self.inputSamples):
+            self.inputSamples.fill(0.)
+
+        return self.inputSamples
+
+    def run(self):
+        """Render thread main loop."""
+        try:
+            while not self._stopped:
+                if self.outputRing.full:
+                    time.sleep(self.pollInterval)
+                    continue
+
+                outData, done = self.process(self.next_input())
+                self.outputRing.push(outData)
+                if done:
+                    break
+
+        except Exception as err:
+            self.error = err
+
+        finally:
+            self.finished = True
+
+    def push_input(self, samples):
+        """Queue sound card input samples (stream callback)."""
+        if not self.inputRing.push(samples):
+            self.nOverruns += 1
+
+    def pop_output(self, out) -> bool:
+        """Copy next output frames into out (stream callback).
+
+        Returns:
+            If there were rendered frames.
+        """
+        if self.outputRing.pop(out):
+            return True
+
+        if not self.finished:
+            self.nUnderruns += 1
+
+        return False
+
+    @property
+    def drained(self) -> bool:
+        """If the render thread is done and all frames got played."""
+        return self.finished and self.outputRing.empty
@@ -22,9 +22,10 @@ from klang.audio.helpers import get_silence
 from klang.audio.voices import Voice
 from klang.audio.wavfile import load_wave
 from klang.block import Block
-from klang.config import SAMPLING_RATE, BUFFER_SIZE
+from klang.config import SAMPLING_RATE
 from klang.connections import MessageInput
 from klang.constants import MONO, ONE_D
+from klang.context import get_context
 from klang.math import clip
 from klang.music.tunings import EQUAL_TEMPERAMENT
 
@@ -63,12 +64,13 @@ def extend_with_silence(array):
     """
     # TODO(atheler): What to do if length > BUFFER_SIZE? For now let's keep the
     # error raising.
+    bufferSize = get_context().bufferSize
     shape = array.shape
     length = shape[-1]
-    if length == BUFFER_SIZE:
+    if length == bufferSize:
         return array
 
-    ret = np.zeros(shape[:-1] + (BUFFER_SIZE,))
+    ret = np.zeros(shape[:-1] + (bufferSize,), array.dtype)
     ret[..., :length] = array
     return ret
 
@@ -256,15 +258,18 @@ class Sample:
 
     def calculate_ratio(self, playbackSpeed):
         """Calculate reample ratio from playback speed."""
-        return SAMPLING_RATE / self.rate / playbackSpeed
+        return get_context().samplingRate / self.rate / playbackSpeed
 
     def set_playback_speed(self, playbackSpeed):
         """Set playback speed for next read() call."""
         ratio = self.calculate_ratio(playbackSpeed)
         self.resampler.set_starting_ratio(ratio)
 
-    def callback(self, nFrames=BUFFER_SIZE):
+    def callback(self, nFrames=None):
         """Sample callback. Get some new samples for resampler."""
+        if nFrames is None:
+            nFrames = get_context().bufferSize
+
         start = self.currentIndex
         stop = start + nFrames
         reachedEnd = (stop >= self.stop)
@@ -280,13 +285,13 @@ class Sample:
             return self.data[start:stop]
 
         return np.concatenate([
-            self.data[self.start:stop],
             self.data[start:self.stop],
+            self.data[self.start:stop],
         ])
 
-    def read(self, nFrames=BUFFER_SIZE):
-        """Get next samples."""
-        return self.resampler.read(nFrames)
+    def read(self, nFrames=None):
+        """Get next samples. One buffer by default."""
+        return self.resampler.read(nFrames or get_context().bufferSize)
 
 
 class AudioFile(Block):
@@ -315,8 +320,13 @@ class AudioFile(Block):
 
         self.sample = Sample(rate, data, *args, **kwargs)
         self.playing = False
-        shape = (self.sample.nChannels, BUFFER_SIZE)
-        self.silence = get_silence(shape)
+        self.silence = None
+        self.prepare(self.context)
+
+    def prepare(self, context):
+        super().prepare(context)
+        shape = (self.sample.nChannels, context.bufferSize)
+        self.silence = get_silence(shape, context.dtype)
         self.mute_outputs()
 
     @property
@@ -354,11 +364,11 @@ class AudioFile(Block):
         if not self.playing:
             return self.mute_outputs()
 
-        data = self.sample.read(BUFFER_SIZE)
+        data = self.sample.read()
         self.playing = self.sample.playing
         samples = extend_with_silence(data.T)
         samples = (samples.T).squeeze()
-        self.output.set_value(samples)
+        self.output.set_value(samples.astype(get_context().dtype, copy=False))
 
     def __str__(self):
         infos = []
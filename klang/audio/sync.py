@@ -1,8 +1,8 @@
-from klang.config import BUFFER_SIZE
 from klang.audio.helpers import get_silence, get_time
 from klang.audio.oscillators import Phasor
 from klang.block import Block
 from klang.constants import TAU
+from klang.context import get_context
 
 
 class Clock(Block):
@@ -22,7 +22,7 @@ class Clock(Block):
         super().__init__(nOutputs=1)
         self.duty = dutyCycle * TAU
         self.edge = edge
-        self.output.set_value(get_silence(BUFFER_SIZE))
+        self.output.set_value(get_silence(self.context.bufferSize))
         self.phasor = Phasor(frequency)
 
     @property
@@ -31,7 +31,8 @@ class Clock(Block):
         return self.phasor.frequency
 
     def update(self):
-        t = get_time(BUFFER_SIZE)
+        ctx = get_context()
+        t = get_time(ctx.bufferSize, ctx.dt)
         currentPhase = self.phasor.currentPhase
         phase = (TAU * self.frequency * t + currentPhase) % TAU
         if self.edge == 'rising':
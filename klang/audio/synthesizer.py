@@ -7,16 +7,22 @@ import math
 
 import numpy as np
 
+from klang.audio.envelope import DEFAULT_OVERSHOOT, EnvelopeBank
 from klang.audio.envelopes import D
-from klang.audio.helpers import DT, MONO_SILENCE, T
-from klang.audio.waves import sample_wave
+from klang.audio.helpers import get_silence, get_time
+from klang.audio.oscillators import OscillatorBank, sample_phase
+from klang.audio.waves import sine
 from klang.block import Block
-from klang.config import BUFFER_SIZE
 from klang.connections import MessageInput
 from klang.constants import PI
+from klang.context import get_context
+from klang.execution import execute, execute_one
 
 
-__all__ = ['MonophonicSynthesizer', 'PolyphonicSynthesizer', 'HiHat', 'Kick']
+__all__ = [
+    'MonophonicSynthesizer', 'PolyphonicSynthesizer',
+    'VectorizedPolyphonicSynthesizer', 'HiHat', 'Kick',
+]
 
 
 def sample_exponential_decay(decay, t0=0.):
@@ -31,9 +37,10 @@ def sample_exponential_decay(decay, t0=0.):
     Returns:
         tuple: Curve samples and new start time.
     """
+    ctx = get_context()
     amp = math.exp(-PI / decay * t0)
-    signal = amp * np.exp(-PI / decay * T)
-    return signal, t0 + DT * BUFFER_SIZE
+    signal = amp * np.exp(-PI / decay * get_time(ctx.bufferSize, ctx.dt))
+    return signal, t0 + ctx.interval
 
 
 def sample_pitch_decay(frequency, decay, intensity, t0=0.):
@@ -67,7 +74,7 @@ class Synthesizer(Block):
     def __init__(self):
         super().__init__(nOutputs=1)
         self.inputs = [MessageInput(owner=self)]
-        self.output.set_value(MONO_SILENCE)
+        self.output.set_value(get_silence(self.context.bufferSize))
 
     def play_note(self, *notes):
         """Play some note(s) directly."""
@@ -84,6 +91,11 @@ class Synthesizer(Block):
             self.process_note(note)
 
 
+def envelope_level(voice):
+    """Latest envelope level of a voice."""
+    return np.ravel(voice.envelope.output.value)[-1]
+
+
 class NoteScheduler:
 
     """Note scheduling for monophonic synthesizers. Manages the active note-ons.
@@ -168,14 +180,18 @@ class MonophonicSynthesizer(Synthesizer):
         self.noteScheduler = NoteScheduler(policy)
 
     def process_note(self, note):
-        note = self.noteScheduler.get_next_note(note)
-        self.voice.input.push(note)
+        nextNote = self.noteScheduler.get_next_note(note)
+        self.voice.input.push(nextNote.at(note.offset))
+
+    def prepare(self, context):
+        super().prepare(context)
+        self.voice.prepare(context)
 
     def update(self):
         super().update()
-        samples = MONO_SILENCE
+        samples = get_silence(get_context().bufferSize)
         if self.voice.active:
-            self.voice.update()
+            execute_one(self.voice)
             samples = self.voice.output.value
 
         self.output.set_value(samples)
@@ -183,40 +199,301 @@ class MonophonicSynthesizer(Synthesizer):
 
 class PolyphonicSynthesizer(Synthesizer):
 
-    """Polyphonic synthesizer with multiple voices."""
+    """Polyphonic synthesizer with multiple voices. Voices get cloned from the
+    template voice on demand (up to maxVoices) and go back to a free pool once
+    they fall silent.
+
+    A repeated note-on of a held pitch retriggers its voice. When all voices
+    are in use a voice gets stolen according to the stealing policy. Released
+    voices (release tail) are stolen before held ones:
+      - 'oldest': Longest sounding voice.
+      - 'newest': Most recently started voice.
+      - 'lowest': Voice with the lowest pitch.
+      - 'highest': Voice with the highest pitch.
+      - 'quietest': Voice with the lowest envelope level.
+
+    The voice sum gets divided by a fixed headroom (maxVoices by default) or,
+    with normalization 'active', by the number of active voices.
+
+    Attributes:
+        template (Voice): Template voice.
+        maxVoices (int): Maximum number of voices.
+        policy (str): Voice stealing policy.
+        normalization (str): Output normalization mode.
+        headroom (float): Fixed output normalization divisor.
+        voices (list): All instantiated voices.
+        activeVoices (list): Sounding voices. Oldest first.
+        freeVoices (list): Silent voices ready for reuse.
+        pitchVoices (dict): Pitch -> held voice.
+        voicePitches (dict): Active voice -> last played pitch.
+    """
 
     MAX_VOICES = 24
     """int: Maximum number of voices."""
 
-    def __init__(self, voice):
+    STEALING_POLICIES = {'oldest', 'newest', 'lowest', 'highest', 'quietest'}
+    """set: Valid voice stealing policies."""
+
+    NORMALIZATIONS = {'fixed', 'active'}
+    """set: Valid output normalization modes."""
+
+    IN_PLACE = True
+
+    def __init__(self, voice, maxVoices=MAX_VOICES, policy='oldest',
+                 normalization='fixed', headroom=None):
         """Args:
             voice (Voice): Synthesizer voice to use as a template for all the
                 polyphonic voices.
+
+        Kwargs:
+            maxVoices (int): Maximum number of voices.
+            policy (str): Voice stealing policy.
+            normalization (str): Output normalization mode. 'fixed' divides
+                by headroom, 'active' by the number of active voices.
+            headroom (float): Fixed normalization divisor. maxVoices by
+                default.
         """
+        assert maxVoices > 0
+        if policy not in self.STEALING_POLICIES:
+            raise ValueError('Unknown voice stealing policy %r!' % policy)
+
+        if normalization not in self.NORMALIZATIONS:
+            raise ValueError('Unknown normalization %r!' % normalization)
+
         super().__init__()
-        self.voices = duplicate_voice(voice, self.MAX_VOICES)
-        self.freeVoice = itertools.cycle(self.voices)
+        self.template = voice
+        self.maxVoices = maxVoices
+        self.policy = policy
+        self.normalization = normalization
+        self.headroom = maxVoices if headroom is None else headroom
+        self.voices = []
+        self.activeVoices = []
+        self.freeVoices = []
+        self.pitchVoices = {}
+        self.voicePitches = {}
+
+    def clone_voice(self):
+        """Instantiate a new voice from the template."""
+        voice, = duplicate_voice(self.template, 1)
+        if voice.context != self.context:
+            voice.prepare(self.context)
+
+        self.voices.append(voice)
+        return voice
+
+    def select_victim(self):
+        """Select a sounding voice to steal according to the stealing
+        policy. Released voices first.
+        """
+        held = set(self.pitchVoices.values())
+        candidates = [
+            voice for voice in self.activeVoices if voice not in held
+        ] or self.activeVoices
+        if self.policy == 'oldest':
+            return candidates[0]
+        elif self.policy == 'newest':
+            return candidates[-1]
+        elif self.policy == 'lowest':
+            return min(candidates, key=self.voicePitches.__getitem__)
+        elif self.policy == 'highest':
+            return max(candidates, key=self.voicePitches.__getitem__)
+
+        return min(candidates, key=envelope_level)
+
+    def release_voice(self, voice):
+        """Forget pitch mapping of a voice."""
+        pitch = self.voicePitches.pop(voice, None)
+        if self.pitchVoices.get(pitch) is voice:
+            del self.pitchVoices[pitch]
+
+    def acquire_voice(self, pitch=None):
+        """Get a voice for a new note. Voice already holding the same pitch,
+        free voice, new voice or a stolen voice.
+
+        Kwargs:
+            pitch (int): Note pitch.
+
+        Returns:
+            Voice: Voice for note.
+        """
+        voice = self.pitchVoices.get(pitch)
+        if voice is not None:
+            self.activeVoices.remove(voice)
+        elif self.freeVoices:
+            voice = self.freeVoices.pop()
+        elif len(self.voices) < self.maxVoices:
+            voice = self.clone_voice()
+        else:
+            voice = self.select_victim()
+            self.activeVoices.remove(voice)
+            self.release_voice(voice)
+
+        self.activeVoices.append(voice)
+        if pitch is not None:
+            self.pitchVoices[pitch] = voice
+            self.voicePitches[voice] = pitch
+
+        return voice
 
     def process_note(self, note):
         if note.on:
-            #print('Play new note', note)
-            voice = next(self.freeVoice)
+            voice = self.acquire_voice(note.pitch)
             voice.input.push(note)
         else:
-            #print('Kill old note', note)
-            for voice in self.voices:
-                if voice.currentPitch == note.pitch:
-                    voice.input.push(note)
+            voice = self.pitchVoices.pop(note.pitch, None)
+            if voice is not None:
+                voice.input.push(note)
+
+    def prepare(self, context):
+        super().prepare(context)
+        self.template.prepare(context)
+        for voice in self.voices:
+            voice.prepare(context)
 
     def update(self):
         super().update()
-        samples = MONO_SILENCE.copy()
-        for voice in self.voices:
-            if voice.active:
-                voice.update()
-                samples += voice.output.value
+        ctx = get_context()
+        if not self.activeVoices:
+            self.output.set_value(get_silence(ctx.bufferSize))
+            return
+
+        samples = self.output.slot.get((ctx.bufferSize,), ctx.dtype)
+        samples.fill(0.)
+        execute(self.activeVoices)
+        for voice in self.activeVoices:
+            samples += voice.output.value
+
+        if self.normalization == 'active':
+            divisor = len(self.activeVoices)
+        else:
+            divisor = self.headroom
+
+        # Return silent voices to the pool
+        if not all(voice.active for voice in self.activeVoices):
+            for voice in self.activeVoices:
+                if not voice.active:
+                    self.release_voice(voice)
+                    self.freeVoices.append(voice)
 
-        self.output.set_value(samples / self.MAX_VOICES)
+            self.activeVoices = [
+                voice for voice in self.activeVoices if voice.active
+            ]
+
+        self.output.set_value(np.divide(samples, divisor, out=samples))
+
+
+class VectorizedPolyphonicSynthesizer(Synthesizer):
+
+    """Polyphonic synthesizer with all voices in struct of arrays form.
+    Oscillator phases (OscillatorBank), envelope stages / levels
+    (EnvelopeBank), amplitudes and pitches of all voices live in arrays and
+    every active voice gets rendered in one batched pass. Oscillator ->
+    envelope voices only.
+
+    Attributes:
+        oscillators (OscillatorBank): Voice oscillators.
+        envelopes (EnvelopeBank): Voice envelopes.
+        amplitudes (array): Note velocity per voice.
+        pitches (array): Current pitch per voice (-1 if released).
+        onsets (array): Note-on counter value per voice (voice age).
+    """
+
+    MAX_VOICES = PolyphonicSynthesizer.MAX_VOICES
+    """int: Default number of voices."""
+
+    IN_PLACE = True
+
+    def __init__(self, nVoices=MAX_VOICES, wave_func=sine, attack=.1,
+                 decay=.2, sustain=.8, release=1., overshoot=DEFAULT_OVERSHOOT,
+                 retrigger=False):
+        """Kwargs:
+            nVoices (int): Number of voices.
+            wave_func (function): Oscillator wave shape function.
+            attack (float): Attack time duration.
+            decay (float): Decay time duration.
+            sustain (float): Sustain value.
+            release (float): Release time duration.
+            overshoot (float): Envelope overshoot amount.
+            retrigger (bool): Allow envelope retrigger on repeated note-ons.
+        """
+        super().__init__()
+        self.oscillators = OscillatorBank(nVoices, wave_func=wave_func)
+        self.envelopes = EnvelopeBank(
+            nVoices, attack, decay, sustain, release, overshoot=overshoot,
+            retrigger=retrigger, samplingRate=self.context.samplingRate,
+        )
+        self.amplitudes = np.zeros(nVoices)
+        self.pitches = np.full(nVoices, -1)
+        self.onsets = np.zeros(nVoices, dtype=int)
+        self.noteCounter = itertools.count(1)
+        self.envelopeBuffer = None
+
+    @property
+    def nVoices(self):
+        """Number of voices."""
+        return len(self.amplitudes)
+
+    def allocate_voice(self, pitch):
+        """Pick voice for a new note-on. Same pitch if still sounding, then a
+        silent voice, then the quietest released voice, otherwise the oldest
+        voice gets stolen.
+        """
+        same = np.flatnonzero(self.pitches == pitch)
+        if len(same):
+            return same[0]
+
+        active = self.envelopes.active
+        if not active.all():
+            return np.argmin(active)
+
+        released = np.flatnonzero(self.pitches < 0)
+        if len(released):
+            return released[np.argmin(self.envelopes.level[released])]
+
+        return np.argmin(self.onsets)
+
+    def process_note(self, note):
+        if note.on:
+            voice = self.allocate_voice(note.pitch)
+            self.oscillators.frequency.value[voice] = note.frequency
+            self.amplitudes[voice] = note.velocity
+            self.pitches[voice] = note.pitch
+            self.onsets[voice] = next(self.noteCounter)
+            self.envelopes.gate(voice, True)
+        else:
+            voices = np.flatnonzero(self.pitches == note.pitch)
+            self.pitches[voices] = -1
+            self.envelopes.gate(voices, False)
+
+    def prepare(self, context):
+        super().prepare(context)
+        self.oscillators.prepare(context)
+        self.envelopes.set_sampling_rate(context.samplingRate)
+        self.envelopeBuffer = None
+
+    def update(self):
+        super().update()
+        ctx = get_context()
+        active = self.envelopes.active
+        if not active.any():
+            self.output.set_value(get_silence(ctx.bufferSize))
+            return
+
+        shape = (self.nVoices, ctx.bufferSize)
+        if self.envelopeBuffer is None or self.envelopeBuffer.shape != shape:
+            self.envelopeBuffer = np.empty(shape, ctx.dtype)
+
+        # Oscillators of silent voices output zeros and keep their phase
+        self.oscillators.enabled[:] = active
+        voices = self.oscillators.sample()
+        env = self.envelopes.sample(ctx.bufferSize, out=self.envelopeBuffer)
+        np.multiply(voices, env, out=voices)
+
+        # Weighted sum of all voices in one go. Same headroom as
+        # PolyphonicSynthesizer
+        weights = (self.amplitudes / self.nVoices).astype(voices.dtype)
+        samples = self.output.slot.get((ctx.bufferSize,), voices.dtype)
+        self.output.set_value(np.dot(weights, voices, out=samples))
 
 
 class HiHat(Block):
@@ -231,14 +508,27 @@ class HiHat(Block):
         """
         super().__init__(nOutputs=1)
         self.inputs = [MessageInput(self)]
+        self.loopedNoise = loopedNoise
+        self.noise = None
         if loopedNoise:
-            noise = 2 * np.random.random(BUFFER_SIZE) - 1.
-            self.noise_generator = lambda: noise
-        else:
-            self.noise_generator = lambda: 2 * np.random.random(BUFFER_SIZE) - 1.
+            self.noise = 2 * np.random.random(self.context.bufferSize) - 1.
 
         self.envelope = D(decay)
 
+    def prepare(self, context):
+        super().prepare(context)
+        self.envelope.prepare(context)
+        if self.loopedNoise:
+            self.noise = 2 * np.random.random(context.bufferSize) - 1.
+
+    def noise_generator(self):
+        """Get noise samples."""
+        bufferSize = get_context().bufferSize
+        if self.loopedNoise:
+            return self.noise[:bufferSize]
+
+        return 2 * np.random.random(bufferSize) - 1.
+
     def update(self):
         triggered = False
         for note in self.input.receive():
@@ -247,7 +537,7 @@ class HiHat(Block):
         self.envelope.update()
         env = self.envelope.output.get_value()
         noise = self.noise_generator()
-        self.output.set_value(env * noise)
+        self.output.set_value((env * noise).astype(env.dtype, copy=False))
 
 
 class Kick(Block):
@@ -279,5 +569,6 @@ class Kick(Block):
 
         frequency, _ = sample_pitch_decay(self.frequency, self.pitchDecay, self.intensity, self.currentTime)
         env, self.currentTime = sample_exponential_decay(self.decay, self.currentTime)
-        signal, self.currentPhase = sample_wave(frequency, startPhase=self.currentPhase)
-        self.output.set_value(env * signal)
+        phase, self.currentPhase = sample_phase(frequency, self.currentPhase)
+        samples = env * sine(phase)
+        self.output.set_value(samples.astype(phase.dtype, copy=False))
@@ -0,0 +1,230 @@
+"""Audio engine telemetry.
+
+The audio thread records the compute time of every stream callback and the
+PortAudio status flags. Counters and a rolling histogram of the DSP load can
+be polled from any other thread via snapshot(). Recording is lock free, the
+audio thread never waits on a monitoring thread. The counters (received /
+dropped / high water mark) of the message queues and event ingress rings of
+watched blocks are part of the snapshot as well.
+
+Usage:
+    >>> telemetry = Telemetry()
+    ... threading.Thread(target=monitor, args=(telemetry,), daemon=True).start()
+    ... run_klang(dac, telemetry=telemetry)
+"""
+import collections
+import time
+
+from klang.connections import MessageInput, PatchRevision
+from klang.context import get_context
+from klang.ingress import EventIngress
+
+
+__all__ = ['QueueStats', 'STATUS_FLAGS', 'Snapshot', 'Telemetry']
+
+
+STATUS_FLAGS = {
+    1: 'inputUnderflow',
+    2: 'inputOverflow',
+    4: 'outputUnderflow',
+    8: 'outputOverflow',
+    16: 'primingOutput',
+}
+"""dict: PortAudio stream callback status flag bits -> names."""
+
+
+class QueueStats(collections.namedtuple('QueueStats', [
+        'capacity', 'nReceived', 'nDropped', 'highWater',
+])):
+
+    """Counters of a single message input or event ingress ring.
+
+    Attributes:
+        capacity (int): Maximum number of queued messages.
+        nReceived (int): Number of pushed messages.
+        nDropped (int): Number of dropped messages.
+        highWater (int): Highest fill level.
+    """
+
+
+class Snapshot(collections.namedtuple('Snapshot', [
+        'nCallbacks', 'nDeadlineMisses', 'flags', 'histogram', 'binEdges',
+        'worst', 'lastMissTime', 'lastMissRevision', 'queues',
+])):
+
+    """Telemetry snapshot.
+
+    Attributes:
+        nCallbacks (int): Number of stream callbacks.
+        nDeadlineMisses (int): Callbacks which took longer than the deadline.
+        flags (dict): PortAudio status flag name -> count.
+        histogram (list): Rolling load histogram (counts per bin).
+        binEdges (list): Upper load bin edges (fraction of buffer interval).
+        worst (float): Worst callback duration in seconds.
+        lastMissTime (float): Wall clock time of last deadline miss.
+        lastMissRevision (int): Patch revision at last deadline miss.
+        queues (dict): Message input / event ring name -> QueueStats.
+    """
+
+    @property
+    def missRate(self) -> float:
+        """Fraction of callbacks which missed the deadline."""
+        if self.nCallbacks == 0:
+            return 0.
+
+        return self.nDeadlineMisses / self.nCallbacks
+
+    @property
+    def nDroppedMessages(self) -> int:
+        """Total number of dropped messages of all watched queues."""
+        return sum(stats.nDropped for stats in self.queues.values())
+
+
+class Telemetry:
+
+    """Stream callback telemetry. Deadline misses, PortAudio flag counters and
+    a rolling DSP load histogram.
+
+    Attributes:
+        relativeDeadline (float): Deadline relative to buffer interval.
+        interval (float): Buffer interval in seconds.
+        deadline (float): Deadline in seconds.
+        nCallbacks (int): Number of stream callbacks.
+        nDeadlineMisses (int): Callbacks which took longer than deadline.
+        flags (dict): Status flag name -> count.
+        worst (float): Worst callback duration.
+        lastMissTime (float): Wall clock time of last deadline miss.
+        lastMissRevision (int): Patch revision at last deadline miss.
+        queues (dict): Name -> watched message input / event ring.
+    """
+
+    BIN_EDGES = [.1, .2, .3, .4, .5, .6, .7, .8, .9, 1., 1.5, 2., float('inf')]
+    """list: Upper load bin edges relative to buffer interval."""
+
+    WINDOW = 2000
+    """int: Number of recent callbacks in rolling histogram."""
+
+    clock = time.perf_counter
+
+    def __init__(self, deadline: float = 1., window: int = WINDOW):
+        """Kwargs:
+            deadline: Deadline relative to buffer interval.
+            window: Number of recent callbacks in rolling histogram.
+        """
+        self.relativeDeadline = deadline
+        self.interval = 0.
+        self.deadline = 0.
+        self.set_interval(get_context().interval)
+        self.nCallbacks = 0
+        self.nDeadlineMisses = 0
+        self.flags = dict.fromkeys(STATUS_FLAGS.values(), 0)
+        self.worst = 0.
+        self.lastMissTime = None
+        self.lastMissRevision = None
+        self.queues = {}
+        self._recent = collections.deque(maxlen=window)
+        self._histogram = [0] * len(self.BIN_EDGES)
+
+    def watch_queue(self, name, queue):
+        """Watch a message queue / event ring (capacity, nReceived, nDropped
+        and highWater counters).
+        """
+        if self.queues.get(name, queue) is not queue:
+            name = '%s #%d' % (name, len(self.queues))
+
+        self.queues[name] = queue
+
+    def watch(self, blocks):
+        """Watch the message queues and event ingress rings of some blocks.
+
+        Args:
+            blocks (iterable): Blocks with message inputs.
+        """
+        for block in blocks:
+            if isinstance(block, EventIngress):
+                self.watch_queue('%s.ring' % block, block.ring)
+
+            for idx, input_ in enumerate(block.inputs):
+                if isinstance(input_, MessageInput):
+                    self.watch_queue('%s.inputs[%d]' % (block, idx), input_)
+
+    def set_interval(self, interval: float):
+        """Set buffer interval of the audio engine."""
+        self.interval = interval
+        self.deadline = self.relativeDeadline * interval
+
+    def bin_index(self, duration: float) -> int:
+        """Histogram bin index for a callback duration."""
+        load = duration / self.interval
+        for idx, edge in enumerate(self.BIN_EDGES):
+            if load < edge:
+                return idx
+
+        return len(self.BIN_EDGES) - 1
+
+    def record(self, duration: float, status: int = 0):
+        """Record stream callback (audio thread).
+
+        Args:
+            duration: Callback compute time in seconds.
+
+        Kwargs:
+            status: PortAudio status flags.
+        """
+        self.nCallbacks += 1
+        if status:
+            for bit, name in STATUS_FLAGS.items():
+                if status & bit:
+                    self.flags[name] += 1
+
+        if duration > self.worst:
+            self.worst = duration
+
+        if duration > self.deadline:
+            self.nDeadlineMisses += 1
+            self.lastMissTime = time.time()
+            self.lastMissRevision = PatchRevision.current
+
+        # Rolling histogram
+        if len(self._recent) == self._recent.maxlen:
+            self._histogram[self._recent[0]] -= 1
+
+        idx = self.bin_index(duration)
+        self._recent.append(idx)
+        self._histogram[idx] += 1
+
+    def monitor(self, callback):
+        """Wrap PyAudio stream callback with telemetry recording. Picks up
+        the buffer interval of the active engine context.
+        """
+        self.set_interval(get_context().interval)
+        clock = self.clock
+
+        def monitored_callback(in_data, frame_count, time_info, status):
+            start = clock()
+            try:
+                return callback(in_data, frame_count, time_info, status)
+            finally:
+                self.record(clock() - start, status)
+
+        return monitored_callback
+
+    def snapshot(self) -> Snapshot:
+        """Copy of the current counters. Can be called from any thread."""
+        return Snapshot(
+            nCallbacks=self.nCallbacks,
+            nDeadlineMisses=self.nDeadlineMisses,
+            flags=dict(self.flags),
+            histogram=list(self._histogram),
+            binEdges=list(self.BIN_EDGES),
+            worst=self.worst,
+            lastMissTime=self.lastMissTime,
+            lastMissRevision=self.lastMissRevision,
+            queues={
+                name: QueueStats(
+                    queue.capacity, queue.nReceived, queue.nDropped,
+                    queue.highWater,
+                )
+                for name, queue in self.queues.items()
+            },
+        )
@@ -17,8 +17,13 @@ Pitch curve: Via a bend() method?
 """
 import copy
 
+import numpy as np
+
+from klang.arena import output_buffer
+from klang.audio.helpers import step_signal, timed_notes
 from klang.composite import Composite
 from klang.connections import MessageInput
+from klang.context import get_context
 from klang.execution import execute
 
 
@@ -29,6 +34,8 @@ class Voice(Composite):
 
     """Single synthesizer voice."""
 
+    IN_PLACE = True
+
     def __init__(self, oscillator, envelope):
         """Args:
             oscillator (Oscillator): Oscillator-like block. Frequency input -> value output.
@@ -53,25 +60,46 @@ class Voice(Composite):
         return self.envelope.active
 
     def process_incoming_notes(self):
-        """Process all incoming notes."""
-        for note in self.input.receive():
-            self.envelope.gate(note.on)
+        """Process all incoming notes. Notes take effect at their sample
+        offset. The envelope gets gated at the offset, amplitude and
+        oscillator frequency switch at the offset.
+
+        Returns:
+            float or array: Amplitude value / signal for the current buffer.
+        """
+        ctx = get_context()
+        bufferSize = ctx.bufferSize
+        amplitude = self.amplitude
+        frequency = self.oscillator.frequency.value
+        if np.ndim(frequency):
+            frequency = frequency[-1]  # Stepped frequency of last buffer
+
+        for offset, note in timed_notes(self.input.receive(), bufferSize):
+            self.envelope.input.push(note)
             if note.on:
+                amplitude = step_signal(amplitude, note.velocity, offset, bufferSize, ctx.dtype)
+                frequency = step_signal(frequency, note.frequency, offset, bufferSize)
                 self.amplitude = note.velocity
-                self.oscillator.frequency.set_value(note.frequency)
                 self.currentPitch = note.pitch
             else:
                 self.currentPitch = 0
 
+        self.oscillator.frequency.set_value(frequency)
+        return amplitude
+
     def update(self):
-        self.process_incoming_notes()
+        amplitude = self.process_incoming_notes()
         execute(self.execOrder)
 
         # Assemble output samples
         env = self.oscillator.output.value
         osc = self.envelope.output.value
-        signal = self.amplitude * env * osc
-        self.output.set_value(signal)
+        out = output_buffer(self.output, amplitude, env, osc)
+        if out is None:
+            self.output.set_value(amplitude * env * osc)
+        else:
+            np.multiply(amplitude, env, out=out)
+            self.output.set_value(np.multiply(out, osc, out=out))
 
     def __deepcopy__(self, memo):
         return type(self)(
@@ -7,9 +7,9 @@ import warnings
 
 import numpy as np
 
-from klang.audio.helpers import DT, get_time
-from klang.config import BUFFER_SIZE
+from klang.audio.helpers import get_time
 from klang.constants import TAU
+from klang.context import get_context
 from klang.math import wrap
 
 
@@ -53,9 +53,10 @@ WAVE_FUNCTIONS = {
 }
 
 
-def sample_wave(frequency, startPhase=0., wave_func=sine, shape=BUFFER_SIZE):
-    """Sample wave function."""
+def sample_wave(frequency, startPhase=0., wave_func=sine, shape=None):
+    """Sample wave function. One buffer of samples by default."""
     warnings.warn('sample_wave() function to be deprecated?')
-    t = get_time(shape)
+    ctx = get_context()
+    t = get_time(shape or ctx.bufferSize, ctx.dt)
     phase = TAU * frequency * t + startPhase
-    return wave_func(phase), wrap(phase[-1] + TAU * frequency * DT)
+    return wave_func(phase), wrap(phase[-1] + TAU * frequency * ctx.dt)
@@ -1,4 +1,6 @@
 """Writing and reading audio WAV files."""
+import os
+import struct
 import wave
 
 import numpy as np
@@ -8,7 +10,10 @@ from klang.config import SAMPLING_RATE
 from klang.math import normalize_values
 
 
-__all__ = ['convert_samples_to_float', 'convert_samples_to_int', 'load_wave', 'write_wave']
+__all__ = [
+    'convert_samples_to_float', 'convert_samples_to_int', 'load_wave',
+    'write_wave', 'WaveWriter',
+]
 
 
 def convert_samples_to_float(samples):
@@ -61,3 +66,168 @@ def write_wave(audio, filepath, samplingRate=SAMPLING_RATE, dtype=np.int16):
     m, n = samples.shape
     assert m > n
     scipy.io.wavfile.write(filepath, samplingRate, samples)
+
+
+def wave_header(samplingRate, nChannels, dtype, nFrames):
+    """Canonical 44 bytes RIFF / WAVE header (PCM or IEEE float)."""
+    sampleWidth = np.dtype(dtype).itemsize
+    formatTag = 3 if np.issubdtype(dtype, np.floating) else 1
+    blockAlign = nChannels * sampleWidth
+    dataSize = nFrames * blockAlign
+    if 36 + dataSize > 0xFFFFFFFF:
+        raise ValueError('WAV files are limited to 4 GB!')
+
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + dataSize, b'WAVE',
+        b'fmt ', 16, formatTag, nChannels, samplingRate,
+        samplingRate * blockAlign, blockAlign, 8 * sampleWidth,
+        b'data', dataSize,
+    )
+
+
+class WaveWriter:
+
+    """Incremental WAV file writer. Audio frames get streamed to disk as they
+    come in and the RIFF header gets patched when closing. Memory usage stays
+    constant no matter how long the recording is.
+
+    With normalize the raw float samples are kept on disk while recording.
+    When closing they get normalized to the peak amplitude and converted to
+    PCM in place (memory map, chunk wise) and the file gets truncated to its
+    final size.
+
+    Usage:
+        >>> with WaveWriter('bounce.wav', nChannels=2, normalize=True) as writer:
+        ...     for frames in render():
+        ...         writer.write(frames)
+
+    Attributes:
+        filepath (str): WAV file path.
+        samplingRate (int): Sampling rate.
+        nChannels (int): Number of channels.
+        dtype (type): PCM sample type.
+        normalize (bool): Normalize to peak amplitude when closing.
+        nFrames (int): Number of written frames.
+        peak (float): Peak amplitude of all written frames.
+    """
+
+    HEADER_SIZE = 44
+    """int: Size of RIFF header in bytes."""
+
+    RAW_DTYPE = np.float32
+    """type: Sample type of raw samples on disk before normalization."""
+
+    CHUNK_SIZE = 65536
+    """int: Number of frames per chunk for in place normalization."""
+
+    def __init__(self, filepath, samplingRate=SAMPLING_RATE, nChannels=1,
+                 dtype=np.int16, normalize=False):
+        """Args:
+            filepath (str): WAV file path.
+
+        Kwargs:
+            samplingRate (int): Sampling rate.
+            nChannels (int): Number of channels.
+            dtype (type): PCM sample type.
+            normalize (bool): Normalize to peak amplitude when closing.
+        """
+        if np.dtype(dtype).itemsize > np.dtype(self.RAW_DTYPE).itemsize:
+            raise ValueError('Can not normalize %s samples in place!' % dtype)
+
+        self.filepath = filepath
+        self.samplingRate = samplingRate
+        self.nChannels = nChannels
+        self.dtype = dtype
+        self.normalize = normalize
+        self.nFrames = 0
+        self.peak = 0.
+        self.file = open(filepath, 'wb')
+        self.file.write(wave_header(samplingRate, nChannels, self.disk_dtype, 0))
+
+    @property
+    def disk_dtype(self):
+        """Sample type of the samples on disk while recording."""
+        if self.normalize:
+            return self.RAW_DTYPE
+
+        return self.dtype
+
+    @property
+    def closed(self):
+        """If WAV file is closed."""
+        return self.file.closed
+
+    def write(self, frames):
+        """Append audio frames.
+
+        Args:
+            frames (array): Float samples (nFrames, nChannels) shaped. 1d for
+                mono.
+        """
+        frames = np.asarray(frames)
+        if frames.ndim == 1:
+            frames = frames.reshape(-1, 1)
+
+        if frames.shape[1] != self.nChannels:
+            msg = 'Got %d channels. Need %d!' % (frames.shape[1], self.nChannels)
+            raise ValueError(msg)
+
+        if frames.size:
+            self.peak = max(self.peak, np.abs(frames).max())
+
+        if self.normalize:
+            raw = frames.astype(self.RAW_DTYPE, copy=False)
+        else:
+            raw = convert_samples_to_int(np.clip(frames, -1., 1.), self.dtype)
+
+        self.file.write(np.ascontiguousarray(raw).tobytes())
+        self.nFrames += len(frames)
+
+    def normalize_in_place(self):
+        """Normalize raw samples on disk and convert them to PCM in place.
+        PCM samples are smaller than the raw samples so every chunk can be
+        written over the already converted part of the file.
+        """
+        nSamples = self.nFrames * self.nChannels
+        rawWidth = np.dtype(self.RAW_DTYPE).itemsize
+        data = np.memmap(
+            self.filepath,
+            dtype=np.uint8,
+            mode='r+',
+            offset=self.HEADER_SIZE,
+            shape=(nSamples * rawWidth,),
+        )
+        raw = data.view(self.RAW_DTYPE).reshape(-1, self.nChannels)
+        pcmWidth = np.dtype(self.dtype).itemsize
+        pcm = data[:nSamples * pcmWidth].view(self.dtype).reshape(-1, self.nChannels)
+        peak = self.RAW_DTYPE(self.peak if self.peak > 0 else 1.)
+        maxValue = np.iinfo(self.dtype).max
+        for start in range(0, self.nFrames, self.CHUNK_SIZE):
+            chunk = slice(start, start + self.CHUNK_SIZE)
+            pcm[chunk] = (raw[chunk] / peak * maxValue).astype(self.dtype)
+
+        data.flush()
+        del raw, pcm, data
+
+    def close(self):
+        """Finish WAV file. Normalize samples and patch header."""
+        if self.closed:
+            return
+
+        self.file.flush()
+        if self.normalize and self.nFrames:
+            self.normalize_in_place()
+
+        dataSize = self.nFrames * self.nChannels * np.dtype(self.dtype).itemsize
+        self.file.truncate(self.HEADER_SIZE + dataSize)
+        self.file.seek(0, os.SEEK_SET)
+        header = wave_header(self.samplingRate, self.nChannels, self.dtype, self.nFrames)
+        self.file.write(header)
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -18,7 +18,11 @@ defined here (for operation overloading).
 """
 import functools
 
+import numpy as np
+
+from klang.arena import BufferSlot
 from klang.connections import OutputBase, InputBase, Output, Input
+from klang.context import get_context
 
 
 def input_connections(block):
@@ -167,6 +171,29 @@ class Block:
         inputs (list): Input connections.
         outputs (list): Output connections.
         name (str): Custom name of the owner (if any).
+        context (EngineContext): Engine context the block is prepared for.
+    """
+
+    CONCURRENT = False
+    """bool: Heavy lifting of update() happens in native code which releases
+    the GIL. Block can run on a worker thread in parallel execution mode.
+    """
+
+    IN_PLACE = False
+    """bool: Block writes its results into the reusable output buffers (see
+    klang.arena) and neither keeps nor passes on its input arrays.
+    """
+
+    CONTROL_RATE = False
+    """bool: Block produces control values (e.g. scalar phases, LFO values)
+    which change once per buffer. Gets stepped control size wise in sub-block
+    rendering (see klang.sub_blocks). Message sources are always treated as
+    such.
+    """
+
+    SILENCE_POLICY = None
+    """str: Behavior on silent audio input (see klang.silence). None (always
+    process), 'stateless' (skip) or 'tail' (skip once decayed).
     """
 
     def __init__(self, nInputs=0, nOutputs=0, name=''):
@@ -179,6 +206,10 @@ class Block:
         self.inputs = [Input(owner=self) for _ in range(nInputs)]
         self.outputs = [Output(owner=self) for _ in range(nOutputs)]
         self.name = name
+        self.context = get_context()
+        if self.IN_PLACE:
+            for output in self.outputs:
+                output.slot = BufferSlot()
 
     @property
     def nInputs(self):
@@ -206,10 +237,47 @@ class Block:
 
         return self.outputs[0]
 
+    def prepare(self, context):
+        """Prepare block for another engine context. Blocks with sampling rate
+        / buffer size dependent state have to rebuild it here.
+
+        Args:
+            context (EngineContext): New engine context.
+        """
+        self.context = context
+
     def update(self):
         """Block's update / run / tick method."""
         pass
 
+    def max_block_size(self):
+        """Largest number of samples the block can process in one go (e.g.
+        shortest feedback delay). Only relevant for sub-block rendering (see
+        klang.sub_blocks).
+
+        Returns:
+            int: Maximum block size. None if unlimited.
+        """
+        return None
+
+    def decayed(self, threshold):
+        """Check if the tail of the block has died away after silent input
+        (silence policy 'tail'). Looks at the current output values by
+        default.
+
+        Args:
+            threshold (float): Amplitude threshold.
+
+        Returns:
+            bool: If the block can be skipped.
+        """
+        for output in self.outputs:
+            if isinstance(output, Output):
+                if np.max(np.abs(output.value), initial=0.) >= threshold:
+                    return False
+
+        return True
+
     def __str__(self):
         infos = []
         if self.name:
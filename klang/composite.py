@@ -1,9 +1,14 @@
 """Composite block."""
 import contextlib
 
-from klang.block import Block, collect_connections
+from klang.block import Block, collect_connections, fetch_input, fetch_output
 from klang.connections import RelayBase
-from klang.execution import determine_execution_order, execute
+from klang.execution import (
+    determine_execution_order,
+    execute,
+    insert_connection,
+    remove_connection,
+)
 
 
 def introspect(composite):
@@ -77,6 +82,43 @@ class Composite(Block):
 
         self.execOrder = execOrder
 
+    def patch(self, src, dst):
+        """Connect two internal blocks (or an internal block with a composite
+        relay) and update the internal execution order incrementally.
+
+        Args:
+            src (Block or OutputBase): Source.
+            dst (Block or InputBase): Destination.
+        """
+        output = fetch_output(src)
+        input_ = fetch_input(dst)
+        output.connect(input_)
+        insert_connection(
+            self.execOrder, output.owner, input_.owner, boundary=self
+        )
+
+    def unpatch(self, src, dst):
+        """Disconnect two internal blocks (or an internal block from a
+        composite relay) and update the internal execution order
+        incrementally.
+
+        Args:
+            src (Block or OutputBase): Source.
+            dst (Block or InputBase): Destination.
+        """
+        output = fetch_output(src)
+        input_ = fetch_input(dst)
+        output.disconnect(input_)
+        remove_connection(
+            self.execOrder, output.owner, input_.owner, boundary=self
+        )
+
+    def prepare(self, context):
+        super().prepare(context)
+        for block in self.execOrder:
+            if block.context != context:
+                block.prepare(context)
+
     def update(self):
         """Execute internal composite blocks."""
         execute(self.execOrder)
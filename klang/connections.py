@@ -78,6 +78,24 @@ def validate_connection(output, input_):
         raise IncompatibleConnection(msg)
 
 
+class PatchRevision:
+
+    """Global patch revision counter. Gets incremented with every connection
+    change so that precompiled structures (e.g. execution plans) can detect
+    when they are outdated.
+
+    Attributes:
+        current: Current patch revision number.
+    """
+
+    current = 0
+
+    @classmethod
+    def increment(cls):
+        """Mark network as re-patched."""
+        cls.current += 1
+
+
 def make_connection(output, input_):
     """Make directional connection from output -> input_."""
     validate_connection(output, input_)
@@ -88,6 +106,8 @@ def make_connection(output, input_):
     # Make the actual connection
     output.outgoingConnections.add(input_)
     input_.incomingConnection = output
+    resolve_value_sources(input_)
+    PatchRevision.increment()
 
 
 def break_connection(output, input_):
@@ -97,6 +117,45 @@ def break_connection(output, input_):
     # Break the actual connection
     output.outgoingConnections.remove(input_)
     input_.incomingConnection = None
+    resolve_value_sources(input_)
+    PatchRevision.increment()
+
+
+def terminal_source(output):
+    """Follow a relay chain upstream to its value source. This is either a
+    normal output or the first unconnected relay (which then provides its own
+    fallback value).
+
+    Args:
+        output (OutputBase): Connected output or relay.
+
+    Returns:
+        OutputBase: Terminal value source.
+    """
+    while isinstance(output, RelayBase) and output.incomingConnection is not None:
+        output = output.incomingConnection
+
+    return output
+
+
+def resolve_value_sources(input_):
+    """Resolve relay chains for a value input. Each input gets linked directly
+    to its terminal source so that value lookups are a single hop. If input_ is
+    a relay all inputs downstream get updated as well.
+
+    Args:
+        input_ (InputBase): Freshly (dis)connected input.
+    """
+    queue = [input_]
+    while queue:
+        current = queue.pop()
+        if not isinstance(current, Input):
+            continue
+
+        src = current.incomingConnection
+        current.source = None if src is None else terminal_source(src)
+        if isinstance(current, RelayBase):
+            queue.extend(current.outgoingConnections)
 
 
 def is_connected(output, input_):
@@ -275,19 +334,26 @@ class Input(InputBase, _ValueContainer):
 
     """Value input. Will fetch value from connected output. Also has its own
     _value attribute as a fallback when not connected.
+
+    Attributes:
+        source (OutputBase): Resolved terminal value source (relay chains
+            already followed). Maintained by make_connection() /
+            break_connection().
     """
 
     def __init__(self, owner=None, value=0.):
         super().__init__(owner)
         _ValueContainer.__init__(self, value)
+        self.source = None
 
     @property
     def value(self):
         """Try to fetch value from connected output."""
-        if self.connected:
-            return self.incomingConnection.value
+        source = self.source
+        if source is None:
+            return self._value
 
-        return self._value
+        return source._value  # pylint: disable=protected-access
 
     @value.setter
     def value(self, value):
@@ -296,19 +362,26 @@ class Input(InputBase, _ValueContainer):
 
     def get_value(self):
         """Try to fetch value from connected output."""
-        if self.connected:
-            return self.incomingConnection.value
+        source = self.source
+        if source is None:
+            return self._value
 
-        return self._value
+        return source._value  # pylint: disable=protected-access
 
 
 class Output(OutputBase, _ValueContainer):
 
-    """Value output. Will propagate its value to connected inputs."""
+    """Value output. Will propagate its value to connected inputs.
+
+    Attributes:
+        slot (BufferSlot): Reusable buffer storage for in-place processing
+            blocks (see klang.arena).
+    """
 
     def __init__(self, owner=None, value=0.):
         super().__init__(owner)
         _ValueContainer.__init__(self, value)
+        self.slot = None
 
 
 class Relay(RelayBase, Input):
@@ -318,19 +391,104 @@ class Relay(RelayBase, Input):
     """
 
 
+def is_note_off(message):
+    """Check if message is a note-off."""
+    return getattr(message, 'off', False) is True
+
+
 class _MessageQueue:
 
-    """Message queue mixin class."""
+    """Bounded message queue mixin class. Counts received and dropped messages
+    and keeps track of the highest fill level.
+
+    Overflow policies when the queue is full:
+      - 'dropOldest': Drop the oldest queued message.
+      - 'dropNewest': Drop the incoming message.
+      - 'coalesce': Keep note-offs (no stuck notes). Drop the oldest message
+        which is not a note-off (or the incoming one if the queue only holds
+        note-offs). Duplicate note-offs get merged, note-offs for other
+        pitches are queued beyond the capacity.
+
+    Attributes:
+        queue (deque): Queued messages.
+        capacity (int): Maximum number of queued messages.
+        overflow (str): Overflow policy.
+        nReceived (int): Number of pushed messages.
+        nDropped (int): Number of dropped messages.
+        highWater (int): Highest fill level.
+    """
 
     MAX_MESSAGES = 50
-    """int: Maximum number of messages on a queue."""
+    """int: Default maximum number of messages on a queue."""
+
+    OVERFLOW_POLICIES = {'dropOldest', 'dropNewest', 'coalesce'}
+    """set: Valid overflow policies."""
+
+    def __init__(self, capacity=None, overflow='dropOldest'):
+        """Kwargs:
+            capacity (int): Maximum number of queued messages. MAX_MESSAGES
+                by default.
+            overflow (str): Overflow policy.
+        """
+        if capacity is None:
+            capacity = self.MAX_MESSAGES
 
-    def __init__(self):
-        self.queue = collections.deque(maxlen=self.MAX_MESSAGES)
+        if capacity < 1:
+            raise ValueError('Invalid queue capacity %s!' % capacity)
+
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError('Unknown overflow policy %r!' % overflow)
+
+        self.queue = collections.deque()
+        self.capacity = capacity
+        self.overflow = overflow
+        self.nReceived = 0
+        self.nDropped = 0
+        self.highWater = 0
+
+    def make_room(self, message):
+        """Make room for an incoming message on a full queue according to the
+        overflow policy. Counts the dropped message.
+
+        Returns:
+            bool: If message can be queued.
+        """
+        if self.overflow == 'coalesce':
+            if is_note_off(message):
+                if any(
+                        is_note_off(msg) and msg.pitch == message.pitch
+                        for msg in self.queue
+                ):
+                    self.nDropped += 1  # Duplicate
+                    return False
+
+            for idx, msg in enumerate(self.queue):
+                if not is_note_off(msg):
+                    del self.queue[idx]
+                    self.nDropped += 1
+                    return True
+
+            # Only note-offs queued. Never evict them. A new note-off exceeds
+            # the capacity (at most one per pitch).
+            if is_note_off(message):
+                return True
+
+        self.nDropped += 1
+        if self.overflow == 'dropNewest' or self.overflow == 'coalesce':
+            return False
+
+        self.queue.popleft()
+        return True
 
     def push(self, message):
         """Push message on the message queue."""
+        self.nReceived += 1
+        if len(self.queue) >= self.capacity and not self.make_room(message):
+            return
+
         self.queue.append(message)
+        if len(self.queue) > self.highWater:
+            self.highWater = len(self.queue)
 
     def receive(self):
         """Iterate over received messages."""
@@ -353,9 +511,14 @@ class MessageInput(InputBase, _MessageQueue):
     connected MessageOutput.
     """
 
-    def __init__(self, owner=None):
+    def __init__(self, owner=None, capacity=None, overflow='dropOldest'):
+        """Kwargs:
+            owner (Block): Parent block.
+            capacity (int): Maximum number of queued messages.
+            overflow (str): Overflow policy.
+        """
         super().__init__(owner)
-        _MessageQueue.__init__(self)
+        _MessageQueue.__init__(self, capacity, overflow)
 
 
 class MessageOutput(OutputBase):
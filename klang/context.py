@@ -0,0 +1,110 @@
+"""Audio engine context.
+
+Sampling rate and buffer size of the audio engine as runtime values. Blocks
+look them up via get_context() when processing instead of baking in the
+klang.config constants at import time. One process can render at 48 kHz / 64
+samples for live use and at 44.1 kHz / 4096 samples for a fast offline bounce.
+The sample datatype of the signal path is part of the context as well. With
+float32 oscillators, envelopes, mixers, filters and delay lines produce single
+precision samples (phase accumulators stay in double precision).
+
+Blocks with precomputed rate / size dependent state (delay lines, filter
+coefficients, windows, ...) rebuild it in Block.prepare(). The execution plan
+calls it for every block which was built for another context.
+
+Usage:
+    >>> run_klang(dac, context=EngineContext(samplingRate=48000, bufferSize=64))
+    ... run_klang(dac, context=EngineContext(dtype=np.float32))
+"""
+import collections
+import contextlib
+
+import numpy as np
+
+from klang.config import BUFFER_SIZE, SAMPLING_RATE
+
+
+__all__ = [
+    'SAMPLE_DTYPES', 'EngineContext', 'DEFAULT_CONTEXT', 'get_context', 'set_context',
+    'active_context',
+]
+
+
+SAMPLE_DTYPES = (np.float64, np.float32)
+"""tuple: Supported sample datatypes."""
+
+
+class EngineContext(collections.namedtuple('EngineContext', [
+        'samplingRate', 'bufferSize', 'dtype',
+])):
+
+    """Audio engine parameters.
+
+    Attributes:
+        samplingRate (int): Sampling rate in Hz.
+        bufferSize (int): Number of samples per buffer cycle.
+        dtype (type): Sample datatype of the signal path.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, samplingRate: int = SAMPLING_RATE, bufferSize: int =
+                BUFFER_SIZE, dtype: type = np.float64):
+        if samplingRate <= 0 or bufferSize <= 0:
+            msg = 'Invalid sampling rate %r / buffer size %r!'
+            raise ValueError(msg % (samplingRate, bufferSize))
+
+        dtype = np.dtype(dtype).type
+        if dtype not in SAMPLE_DTYPES:
+            raise ValueError('Unsupported sample datatype %r!' % dtype)
+
+        return super().__new__(cls, samplingRate, bufferSize, dtype)
+
+    @property
+    def dt(self) -> float:
+        """Sampling interval."""
+        return 1. / self.samplingRate
+
+    @property
+    def interval(self) -> float:
+        """Buffer duration."""
+        return self.dt * self.bufferSize
+
+    @property
+    def nyquistFrequency(self) -> int:
+        """Nyquist frequency."""
+        return self.samplingRate // 2
+
+
+DEFAULT_CONTEXT = EngineContext()
+"""EngineContext: Context from klang.config."""
+
+_CURRENT = DEFAULT_CONTEXT
+"""EngineContext: Active engine context."""
+
+
+def get_context() -> EngineContext:
+    """Get active engine context."""
+    return _CURRENT
+
+
+def set_context(context: EngineContext) -> EngineContext:
+    """Activate engine context.
+
+    Returns:
+        Previously active context.
+    """
+    global _CURRENT
+    previous = _CURRENT
+    _CURRENT = context
+    return previous
+
+
+@contextlib.contextmanager
+def active_context(context: EngineContext):
+    """Activate engine context for the duration of a with statement."""
+    previous = set_context(context)
+    try:
+        yield context
+    finally:
+        set_context(previous)
@@ -1,8 +1,14 @@
 """Block execution."""
 import collections
+import concurrent.futures
+import itertools
+import os
 
+from klang.arena import allocate_buffers
 from klang.block import input_neighbors, output_neighbors
-from klang.graph import graph_matrix, topological_sorting
+from klang.connections import PatchRevision, RelayBase
+from klang.context import get_context
+from klang.graph import adjacency_list, topological_sorting
 
 
 def traverse_network(blocks):
@@ -17,11 +23,13 @@ def traverse_network(blocks):
         tuple: Network vertices and edges.
     """
     vertices = []
+    visited = set()
     edges = set()
     queue = collections.deque(blocks)
     while queue:
         block = queue.popleft()
-        if block not in vertices:
+        if block not in visited:
+            visited.add(block)
             vertices.append(block)
             for successor in output_neighbors(block):
                 edges.add((block, successor))
@@ -51,17 +59,509 @@ def determine_execution_order(blocks):
 
     # Topological sort -> execution order
     intEdges = [(block2idx[src], block2idx[dst]) for src, dst in edges]
-    graph = graph_matrix(intEdges, order=nNodes)
+    graph = adjacency_list(intEdges, order=nNodes)
     order = topological_sorting(graph)
     execOrder = [idx2block[idx] for idx in order]
     #print_exec_order(execOrder)
     return execOrder
 
 
+def _reachable(start, neighbors, inside):
+    """Collect all blocks reachable from start (start included). Only blocks
+    for which inside(block) holds are visited.
+    """
+    visited = {start}
+    stack = [start]
+    while stack:
+        block = stack.pop()
+        for neighbor in neighbors(block):
+            if neighbor not in visited and inside(block, neighbor):
+                visited.add(neighbor)
+                stack.append(neighbor)
+
+    return visited
+
+
+def _unplaced_upstream(block, execOrder, boundary=None):
+    """Collect block and its upstream blocks which are not yet placed in
+    execOrder (depth first post order -> predecessors come first).
+    """
+    placed = set(execOrder)
+    placed.add(boundary)
+    visited = {block}
+    order = []
+    stack = [(block, input_neighbors(block))]
+    while stack:
+        current, predecessors = stack[-1]
+        for predecessor in predecessors:
+            if predecessor not in visited and predecessor not in placed:
+                visited.add(predecessor)
+                stack.append((predecessor, input_neighbors(predecessor)))
+                break
+        else:
+            stack.pop()
+            order.append(current)
+
+    return order
+
+
+def _reorder(execOrder, src, dst):
+    """Pearce-Kelly reordering of the affected region for edge src -> dst.
+    Both blocks have to be placed. Only edges which already point forward are
+    followed, so the order stays valid for them.
+
+    Returns:
+        bool: If execOrder got modified.
+    """
+    positions = {block: idx for idx, block in enumerate(execOrder)}
+    lower = positions[dst]
+    upper = positions[src]
+    if lower > upper:
+        return False
+
+    # Forward search from dst along forward edges of the affected region
+    def forward(block, successor):
+        return positions[block] < positions.get(successor, -1) <= upper
+
+    deltaF = _reachable(dst, output_neighbors, forward)
+    if src in deltaF:
+        return False  # Cycle -> feedback connection
+
+    def backward(block, predecessor):
+        return lower <= positions.get(predecessor, -1) < positions[block]
+
+    deltaB = _reachable(src, input_neighbors, backward)
+
+    # Re-assign region positions. Backward set first, then forward set
+    key = positions.__getitem__
+    slots = sorted(map(key, deltaB | deltaF))
+    blocks = sorted(deltaB, key=key) + sorted(deltaF, key=key)
+    for idx, block in zip(slots, blocks):
+        execOrder[idx] = block
+
+    return True
+
+
+def insert_connection(execOrder, src, dst, boundary=None):
+    """Update execution order in place after src -> dst got connected. Dynamic
+    topological sorting after Pearce and Kelly. Only the affected region
+    between dst and src gets re-sorted. Blocks not yet in execOrder get placed
+    right after their source or right before their destination, together
+    with their unplaced upstream blocks. Afterwards every connection of the
+    newly placed blocks gets re-sorted the same way. Connections which point
+    backwards in the current execution order and would close a cycle are
+    treated as feedback and do not alter the order.
+
+    Args:
+        execOrder (list): Execution order to update.
+        src (Block): Source block of new connection.
+        dst (Block): Destination block of new connection.
+
+    Kwargs:
+        boundary (Composite): Owner of execOrder. Connections from / to the
+            boundary do not constrain the order.
+
+    Returns:
+        bool: If execOrder got modified.
+    """
+    inner = [block for block in (src, dst) if block not in {None, boundary}]
+    srcKnown = src in execOrder
+    dstKnown = dst in execOrder
+    if len(inner) < 2 or src is dst:
+        if srcKnown and dstKnown:
+            return False
+
+        idx = len(execOrder)
+    elif not srcKnown and not dstKnown:
+        inner = [dst]
+        idx = len(execOrder)
+    elif not dstKnown:
+        inner = [dst]
+        idx = execOrder.index(src) + 1
+    elif not srcKnown:
+        inner = [src]
+        idx = execOrder.index(dst)
+    else:
+        return _reorder(execOrder, src, dst)
+
+    # Place new blocks
+    new = []
+    for block in inner:
+        if block not in execOrder:
+            upstream = _unplaced_upstream(block, execOrder, boundary)
+            execOrder[idx:idx] = upstream
+            idx += len(upstream)
+            new.extend(upstream)
+
+    # Re-sort around all connections of the new blocks
+    placed = set(execOrder)
+    for block in new:
+        for predecessor in input_neighbors(block):
+            if predecessor in placed and predecessor is not block:
+                _reorder(execOrder, predecessor, block)
+
+        for successor in output_neighbors(block):
+            if successor in placed and successor is not block:
+                _reorder(execOrder, block, successor)
+
+    return bool(new)
+
+
+def _component(block, boundary=None):
+    """Collect connected component of block. Return None if it is attached to
+    the boundary.
+    """
+    visited = {block}
+    stack = [block]
+    while stack:
+        current = stack.pop()
+        for neighbor in itertools.chain(
+                input_neighbors(current), output_neighbors(current)):
+            if neighbor is boundary:
+                return None
+
+            if neighbor not in visited:
+                visited.add(neighbor)
+                stack.append(neighbor)
+
+    return visited
+
+
+def remove_connection(execOrder, src, dst, boundary=None):
+    """Update execution order in place after src -> dst got disconnected.
+    Removing an edge never invalidates an order. Blocks which got cut off from
+    the boundary get dropped. Without a boundary only blocks which are left
+    without any connections get dropped.
+
+    Args:
+        execOrder (list): Execution order to update.
+        src (Block): Source block of removed connection.
+        dst (Block): Destination block of removed connection.
+
+    Kwargs:
+        boundary (Composite): Owner of execOrder.
+
+    Returns:
+        bool: If execOrder got modified.
+    """
+    nBlocks = len(execOrder)
+    for block in (src, dst):
+        if block not in execOrder:
+            continue
+
+        component = _component(block, boundary)
+        if component is None:
+            continue
+
+        if boundary is not None or len(component) == 1:
+            execOrder[:] = [b for b in execOrder if b not in component]
+
+    return len(execOrder) != nBlocks
+
+
+_nestedProfiler = None
+"""Profiler: Times the blocks executed via execute() (see profile_nested())."""
+
+
+def profile_nested(profiler):
+    """Time all blocks executed via execute() with a profiler. These are the
+    internal blocks of composites with a custom update() method which do not
+    show up in a flattened execution plan.
+
+    Args:
+        profiler (Profiler): Profiler or None to disable.
+    """
+    global _nestedProfiler
+    _nestedProfiler = profiler
+
+
 def execute(blocks):
     """Execute blocks."""
-    for block in blocks:
+    profiler = _nestedProfiler
+    if profiler is None:
+        for block in blocks:
+            block.update()
+    else:
+        for block in blocks:
+            profiler.run(block)
+
+
+def execute_one(block):
+    """Execute a single block. Timed like execute() if nested profiling is
+    enabled.
+    """
+    profiler = _nestedProfiler
+    if profiler is None:
         block.update()
+    else:
+        profiler.run(block)
+
+
+def is_transparent(block):
+    """Check if block is a composite which only executes its internal blocks
+    (no custom update() method). Such composites can be turned inside out.
+    """
+    from klang.composite import Composite  # Circular import for comforts
+    if not isinstance(block, Composite):
+        return False
+
+    return type(block).update is Composite.update
+
+
+def unravel(execOrder):
+    """Flatten global execution order. Turn internal execution order of
+    composites inside out. Composites with a custom update() method stay in
+    one piece since they have to take care of their internals themselves.
+    """
+    for block in execOrder:
+        if is_transparent(block):
+            yield from unravel(block.execOrder)
+        else:
+            yield block
+
+
+class ExecutionPlan:
+
+    """Compiled, flat execution plan. All transparent composites are unraveled
+    and the update methods are pre-bound. Executing the plan boils down to
+    walking a flat list of callables. The plan recompiles itself whenever the
+    network got re-patched (see PatchRevision). Blocks built for another
+    engine context get prepared for the active one. Blocks with a silence
+    policy get skipped on silent input (see klang.silence).
+
+    Attributes:
+        execOrder (list): Global execution order.
+        blocks (list): Flattened blocks.
+        updates (list): Pre-bound update methods of flattened blocks.
+        revision (int): Patch revision of the last compilation.
+        profiler (Profiler): Optional profiler for timing the updates.
+    """
+
+    def __init__(self, execOrder, profiler=None):
+        """Args:
+            execOrder (list): Global execution order.
+
+        Kwargs:
+            profiler (Profiler): Time every block update with this profiler.
+        """
+        self.execOrder = execOrder
+        self.blocks = []
+        self.updates = []
+        self.revision = -1
+        self.profiler = profiler
+        if profiler:
+            profile_nested(profiler)
+
+        self.compile()
+
+    def bind(self, block):
+        """Get (silence gated, timed) update method of block."""
+        from klang.silence import silence_gate  # Avoid importing klang.audio
+        update = silence_gate(block)
+        if self.profiler:
+            return self.profiler.wrap(block, update)
+
+        return update
+
+    def schedule(self):
+        """Schedule step of each block. Execution order position for serial
+        execution.
+
+        Returns:
+            dict: Block -> schedule step.
+        """
+        return {block: idx for idx, block in enumerate(self.blocks)}
+
+    def flatten(self):
+        """Flat block order of the execution plan."""
+        return list(unravel(self.execOrder))
+
+    def prepare_blocks(self):
+        """Prepare blocks which were built for another engine context."""
+        context = get_context()
+        for block in self.blocks:
+            if block.context != context:
+                block.prepare(context)
+
+    def compile(self):
+        """(Re)compile execution plan."""
+        self.blocks = self.flatten()
+        self.prepare_blocks()
+        self.updates = [self.bind(block) for block in self.blocks]
+        allocate_buffers(self.blocks, self.schedule())
+        self.revision = PatchRevision.current
+
+    def __call__(self):
+        """Execute all blocks once."""
+        if self.revision != PatchRevision.current:
+            self.compile()
+
+        for update in self.updates:
+            update()
+
+    def close(self):
+        """Release execution resources (if any)."""
+        if self.profiler:
+            profile_nested(None)
+
+    def __len__(self):
+        return len(self.updates)
+
+
+def upstream_blocks(block, members):
+    """Get upstream blocks of block which are members of a flat execution
+    plan. Relay chains of unraveled composites get followed through.
+
+    Args:
+        block (Block): Block to inspect.
+        members (set): Blocks of the execution plan.
+
+    Yields:
+        Block: Upstream plan members.
+    """
+    for input_ in block.inputs:
+        src = input_.incomingConnection
+        while src is not None:
+            if src.owner in members:
+                yield src.owner
+                break
+
+            if not isinstance(src, RelayBase):
+                break
+
+            src = src.incomingConnection
+
+
+def downstream_inputs(output, members):
+    """Get downstream inputs of an output which belong to members of a flat
+    execution plan. Relay chains of unraveled composites get followed through.
+
+    Args:
+        output (OutputBase): Output to inspect.
+        members (set): Blocks of the execution plan.
+
+    Yields:
+        InputBase: Downstream inputs.
+    """
+    queue = list(output.outgoingConnections)
+    while queue:
+        input_ = queue.pop()
+        if input_.owner in members or not isinstance(input_, RelayBase):
+            yield input_
+        else:
+            queue.extend(input_.outgoingConnections)
+
+
+def dependency_levels(blocks):
+    """Partition flat execution order into dependency levels. Blocks of the
+    same level are not connected with each other and can be executed
+    concurrently. Feedback connections also separate levels so that the
+    reading block still sees the value of the previous buffer cycle.
+
+    Args:
+        blocks (list): Flat execution order.
+
+    Returns:
+        list: Blocks per level (execution order is kept within a level).
+    """
+    members = set(blocks)
+    neighbors = collections.defaultdict(set)
+    for block in blocks:
+        for src in upstream_blocks(block, members):
+            if src is not block:
+                neighbors[block].add(src)
+                neighbors[src].add(block)
+
+    levelOf = {}
+    levels = []
+    for block in blocks:
+        level = 1 + max(
+            (levelOf[nb] for nb in neighbors[block] if nb in levelOf),
+            default=-1,
+        )
+        levelOf[block] = level
+        if level == len(levels):
+            levels.append([])
+
+        levels[level].append(block)
+
+    return levels
+
+
+class ParallelExecutionPlan(ExecutionPlan):
+
+    """Execution plan which runs independent blocks concurrently on a thread
+    pool. The flat execution order gets partitioned into dependency levels.
+    Blocks which spend their time in native code releasing the GIL (class
+    attribute CONCURRENT) get dispatched to the worker pool. All other blocks
+    of a level are executed serially in the calling thread in the meantime.
+    Each level ends with a barrier.
+
+    Attributes:
+        nWorkers (int): Number of worker threads.
+        levels (list): Blocks per dependency level.
+        stages (list): (serial updates, concurrent updates) per level.
+    """
+
+    def __init__(self, execOrder, nWorkers=None, profiler=None):
+        """Args:
+            execOrder (list): Global execution order.
+
+        Kwargs:
+            nWorkers (int): Number of worker threads. Number of CPUs by
+                default.
+            profiler (Profiler): Time every block update with this profiler.
+        """
+        self.nWorkers = nWorkers or os.cpu_count() or 1
+        self.levels = []
+        self.stages = []
+        self.pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.nWorkers,
+            thread_name_prefix='KlangWorker',
+        )
+        super().__init__(execOrder, profiler)
+
+    def schedule(self):
+        """Dependency level of each block. Blocks of the same level run
+        concurrently.
+        """
+        self.levels = dependency_levels(self.blocks)
+        return {
+            block: nr
+            for nr, level in enumerate(self.levels)
+            for block in level
+        }
+
+    def compile(self):
+        super().compile()
+        self.stages = []
+        updates = dict(zip(self.blocks, self.updates))
+        for level in self.levels:
+            serial = [updates[b] for b in level if not b.CONCURRENT]
+            concurrent_ = [updates[b] for b in level if b.CONCURRENT]
+            if len(concurrent_) < 2:
+                serial, concurrent_ = [updates[b] for b in level], []
+
+            self.stages.append((serial, concurrent_))
+
+    def __call__(self):
+        """Execute all blocks once."""
+        if self.revision != PatchRevision.current:
+            self.compile()
+
+        submit = self.pool.submit
+        for serial, concurrent_ in self.stages:
+            futures = [submit(update) for update in concurrent_]
+            for update in serial:
+                update()
+
+            for future in futures:
+                future.result()
+
+    def close(self):
+        """Shutdown worker pool."""
+        self.pool.shutdown(wait=True)
+        super().close()
 
 
 def print_exec_order(execOrder):
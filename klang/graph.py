@@ -1,13 +1,25 @@
 """All things graph related.
 
-Graph helper functions. Graph is defined as an sparse adjacency matrix and a
-node is an index.
+Graph helper functions. A node is an index. Graphs can either be defined as a
+dense adjacency matrix or as an adjacency list (list of sorted successor index
+lists). The latter scales linearly with network size and is used for block
+execution order.
 """
 import collections
 
 import numpy as np
 
 
+WHITE = 'white'
+"""str: Unvisited node color."""
+
+GRAY = 'gray'
+"""str: Node in progress color."""
+
+BLACK = 'black'
+"""str: Finished node color."""
+
+
 def graph_matrix(edges, directed=True, order=-1):
     """Build adjacency graph matrix from edges relationships.
 
@@ -37,6 +49,43 @@ def graph_matrix(edges, directed=True, order=-1):
     return graph
 
 
+def adjacency_list(edges, order=-1):
+    """Build adjacency list from edges relationships.
+
+    Usage:
+        >>> adjacency_list([(0, 2), (0, 1), (1, 2)])
+        [[1, 2], [2], []]
+
+    Args:
+        edges (list): List of edges (tuples).
+
+    Kwargs:
+        order (int): Predefined graph order (number of nodes). Has to be bigger
+            than the maximum node index in edges. If < 0 will be determined
+            from unique nodes in edges.
+
+    Returns:
+        list: Sorted successor indices for each node.
+    """
+    edges = list(edges)
+    if order < 0:
+        order = 1 + max((max(edge) for edge in edges), default=-1)
+
+    successors = [set() for _ in range(order)]
+    for src, dst in edges:
+        successors[src].add(dst)
+
+    return [sorted(children) for children in successors]
+
+
+def as_adjacency_list(graph):
+    """Convert dense graph matrix to adjacency list (if necessary)."""
+    if isinstance(graph, np.ndarray):
+        return [active_edges(graph, node).tolist() for node in range(len(graph))]
+
+    return graph
+
+
 def active_edges(graph, node):
     """Get active edges for a node. With matrix transpose can be used to get
     either out- or ingoing edges.
@@ -89,88 +138,107 @@ def get_predecessors(graph, node):
 
 
 def find_back_edges(graph):
-    """Find back edges in directed graph.
+    """Find back edges in directed graph. Iterative depth first search (no
+    recursion limit for large graphs). O(V + E) for adjacency lists.
+
+    Args:
+        graph (array or list): Graph matrix or adjacency list.
+
+    Returns:
+        list: Back edges (tuples).
 
     Resources:
       - https://www.youtube.com/watch?v=rKQaZuoUR4M
     """
-    nNodes, _ = graph.shape
-    allNodes = range(nNodes)
-    white = set(allNodes)
-    gray = set()
-    black = set()
+    graph = as_adjacency_list(graph)
+    color = len(graph) * [WHITE]
     backEdges = []
-
-    def move_node(node, src, dst):
-        """Move node from one set to another."""
-        src.remove(node)
-        dst.add(node)
-
-    def dfs(parent):
-        """Depth first search graph traversal."""
-        move_node(parent, white, gray)
-        for child in get_successors(graph, parent):
-            if child in black:
-                continue
-
-            if child in gray:
-                backEdges.append((parent, child))
-                continue
-
-            dfs(child)
-
-        move_node(parent, gray, black)
-
-    while white:
-        node = next(iter(white))  # white.pop() would remove item from set!
-        dfs(node)
+    for root, _ in enumerate(graph):
+        if color[root] != WHITE:
+            continue
+
+        color[root] = GRAY
+        stack = [(root, iter(graph[root]))]
+        while stack:
+            parent, children = stack[-1]
+            for child in children:
+                if color[child] == BLACK:
+                    continue
+
+                if color[child] == GRAY:
+                    backEdges.append((parent, child))
+                    continue
+
+                color[child] = GRAY
+                stack.append((child, iter(graph[child])))
+                break
+
+            else:  # If no break, all children visited
+                color[parent] = BLACK
+                stack.pop()
 
     return backEdges
 
 
 def remove_back_edges(graph):
-    """Remove back edges from directed graph and return DAG."""
-    dag = graph.copy()
-    for edge in find_back_edges(graph):
-        dag[edge] = 0
-
-    return dag
+    """Remove back edges from directed graph and return DAG (in the same graph
+    representation).
 
+    Args:
+        graph (array or list): Graph matrix or adjacency list.
 
-def _node_is_ready(graph, node, order):
-    """Check if `node` is ready for topological sorting `order`, that is, all
-    predecessors of `node` have to be in `order` list.
+    Returns:
+        array or list: Directed acyclic graph.
     """
-    for predecessor in get_predecessors(graph, node):
-        if predecessor not in order:
-            return False
+    backEdges = find_back_edges(graph)
+    if isinstance(graph, np.ndarray):
+        dag = graph.copy()
+        for edge in backEdges:
+            dag[edge] = 0
+
+        return dag
 
-    return True
+    backEdges = set(backEdges)
+    return [
+        [child for child in children if (node, child) not in backEdges]
+        for node, children in enumerate(graph)
+    ]
 
 
 def topological_sorting(graph):
-    """Find appropriate execution order in directed graph with cycles.
+    """Find appropriate execution order in directed graph with cycles. Cycles
+    get broken up by removing back edges. Nodes are visited in index order
+    and once a node is placed its successors are prioritized (depth first).
+    Readiness is tracked with pending predecessor counters which makes this
+    O(V + E) for adjacency lists.
 
     Args:
-        graph (array): Graph adjacency matrix.
+        graph (array or list): Graph matrix or adjacency list.
 
     Returns:
         list: Node execution order.
     """
-    dag = remove_back_edges(graph)
-    nNodes, _ = dag.shape
-    allNodes = range(nNodes)
-    queue = collections.deque(allNodes)
+    dag = as_adjacency_list(remove_back_edges(graph))
+    nPending = len(dag) * [0]
+    for children in dag:
+        for child in children:
+            nPending[child] += 1
+
+    placed = len(dag) * [False]
+    queue = collections.deque(range(len(dag)))
     order = []
     while queue:
         node = queue.popleft()
-        if node not in order:
-            successors = get_successors(dag, node)
-            if _node_is_ready(dag, node, order):
-                queue.extendleft(successors)
-                order.append(node)
-            else:
-                queue.extend(successors)
+        if placed[node] or nPending[node] > 0:
+            continue
+
+        placed[node] = True
+        order.append(node)
+        successors = dag[node]
+        for successor in successors:
+            nPending[successor] -= 1
+
+        queue.extendleft(successors)
 
     return order
 
@@ -0,0 +1,184 @@
+"""Event ingress from external threads.
+
+Keyboard listeners, MIDI callbacks, network receivers or GUIs run in their own
+threads. Instead of sending messages straight into the message queues of the
+block network (which get consumed by the audio thread) they post them to an
+EventIngress block. Every event gets stamped with the engine clock when
+posted and goes through a lock free single producer / single consumer ring.
+
+The audio thread collects the events when the ingress block gets executed.
+The ingress keeps its own engine timeline which advances by exactly one buffer
+interval per cycle, anchored one buffer interval behind the engine clock
+(fixed delay of one buffer). Each cycle delivers the events of its window at
+the sample offset (timestamp - windowStart) * samplingRate. Bursts of cycles
+(render-ahead, jittery callbacks) do not distort the spacing of the events.
+The timeline gets re-anchored when it drifts too far from the engine clock.
+
+Usage:
+    >>> ingress = EventIngress()
+    ... ingress | synth | dac
+    ... # From another thread
+    ... ingress.post(Note(pitch=60))
+"""
+import time
+
+from klang.block import Block
+from klang.connections import MessageOutput
+from klang.context import get_context
+from klang.messages import Note
+
+
+__all__ = ['EventRing', 'EventIngress']
+
+
+class EventRing:
+
+    """Lock free single producer / single consumer ring of event slots.
+    Producer and consumer only advance their own counter.
+
+    Attributes:
+        slots (list): Event slots.
+        capacity (int): Number of event slots.
+        writeCount (int): Total number of pushed events.
+        readCount (int): Total number of popped events.
+        nReceived (int): Number of push attempts.
+        nDropped (int): Number of events which did not fit into the ring.
+        highWater (int): Highest fill level.
+    """
+
+    def __init__(self, capacity: int):
+        """Args:
+            capacity: Number of event slots.
+        """
+        if capacity < 1:
+            raise ValueError('Capacity has to be at least one event!')
+
+        self.slots = [None] * capacity
+        self.capacity = capacity
+        self.writeCount = 0
+        self.readCount = 0
+        self.nReceived = 0
+        self.nDropped = 0
+        self.highWater = 0
+
+    def __len__(self) -> int:
+        return self.writeCount - self.readCount
+
+    @property
+    def empty(self) -> bool:
+        """If there is nothing to pop."""
+        return self.writeCount == self.readCount
+
+    @property
+    def full(self) -> bool:
+        """If there is no space left to push."""
+        return self.writeCount - self.readCount >= self.capacity
+
+    def push(self, event) -> bool:
+        """Put event into the next free slot (producer side).
+
+        Returns:
+            If there was space left.
+        """
+        self.nReceived += 1
+        if self.full:
+            self.nDropped += 1
+            return False
+
+        self.slots[self.writeCount % self.capacity] = event
+        self.writeCount += 1  # Publish after writing
+        self.highWater = max(self.highWater, len(self))
+        return True
+
+    def peek(self):
+        """Oldest event without removing it (consumer side). None if empty."""
+        if self.empty:
+            return None
+
+        return self.slots[self.readCount % self.capacity]
+
+    def pop(self):
+        """Remove and return the oldest event (consumer side). None if
+        empty.
+        """
+        if self.empty:
+            return None
+
+        idx = self.readCount % self.capacity
+        event = self.slots[idx]
+        self.slots[idx] = None
+        self.readCount += 1  # Release after reading
+        return event
+
+
+class EventIngress(Block):
+
+    """Thread safe, timestamped message ingress for external threads. One
+    producer thread per ingress block. The audio thread takes no locks.
+
+    Attributes:
+        ring (EventRing): Posted (timestamp, output, message) events.
+        cycleStart (float): Engine clock time where the window of the next
+            buffer cycle starts.
+    """
+
+    MAX_EVENTS = 256
+    """int: Default number of event slots."""
+
+    MAX_DRIFT = .5
+    """float: Maximum drift in seconds between the ingress timeline and the
+    engine clock before re-anchoring."""
+
+    clock = time.perf_counter
+    """Engine clock for event timestamps."""
+
+    def __init__(self, capacity: int = MAX_EVENTS):
+        """Kwargs:
+            capacity: Number of event slots.
+        """
+        super().__init__()
+        self.outputs = [MessageOutput(owner=self)]
+        self.ring = EventRing(capacity)
+        self.cycleStart = None
+
+    def post(self, message, output: MessageOutput = None, timestamp: float =
+             None) -> bool:
+        """Post message from an external thread (producer side).
+
+        Args:
+            message: Message to send.
+
+        Kwargs:
+            output: Message output of this block. Main output by default.
+            timestamp: Engine clock time of the event. Now by default.
+
+        Returns:
+            If the event fitted into the ring.
+        """
+        if timestamp is None:
+            timestamp = self.clock()
+
+        return self.ring.push((timestamp, output or self.output, message))
+
+    def update(self):
+        ctx = get_context()
+        now = self.clock()
+        delay = now - ctx.interval
+        if self.cycleStart is None or abs(delay - self.cycleStart) > self.MAX_DRIFT:
+            self.cycleStart = delay  # (Re-)anchor timeline
+
+        start = self.cycleStart
+        stop = start + ctx.interval
+        self.cycleStart = stop
+        while True:
+            event = self.ring.peek()
+            if event is None or event[0] >= stop:
+                break  # Rest is for the next cycle
+
+            self.ring.pop()
+            timestamp, output, message = event
+            if isinstance(message, Note):
+                offset = int((timestamp - start) * ctx.samplingRate)
+                message = message.at(min(max(offset, 0), ctx.bufferSize - 1))
+
+            output.send(message)
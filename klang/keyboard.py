@@ -1,24 +1,27 @@
-"""Keyboard input."""
+"""Keyboard input.
+
+Key events arrive on the pynput listener thread. They get posted to the event
+ingress (see klang.ingress) and reach the block network in the audio thread.
+"""
 import collections
 import string
 
 from pynput.keyboard import Listener
 
-from klang.block import Block
 from klang.connections import MessageOutput
 from klang.constants import REF_OCTAVE, DODE
+from klang.ingress import EventIngress
 from klang.math import clip
 from klang.messages import Note
 from klang.music.tunings import EQUAL_TEMPERAMENT, TEMPERAMENTS
 
 
-class Keyboard(Block):
+class Keyboard(EventIngress):
 
     """Base version of keyboard input."""
 
     def __init__(self, suppress=False):
         super().__init__()
-        self.outputs = [MessageOutput(self)]
         self.keyWorker = Listener(
             on_press=self.on_press,
             on_release=self.on_release,
@@ -46,7 +49,7 @@ class Keyboard(Block):
 
     def on_key_event(self, key):
         """On key event. What to do on key event (pressed and released)."""
-        self.output.send(key)
+        self.post(key)
 
     def start(self):
         """Start Keyboard worker thread."""
@@ -116,7 +119,7 @@ class MusicalKeyboard(Keyboard):
         frequency = self.temperament.pitch_2_frequency(pitch)
         velocity = self.velocity if noteOn else self.SILENT
         note = Note(pitch, velocity=velocity, frequency=frequency)
-        self.output.send(note)
+        self.post(note)
 
     def change_octave(self, char):
         """Change current octave up / down."""
@@ -155,7 +158,7 @@ class MusicalKeyboard(Keyboard):
     def bypass_other_keys(self, key):
         """Relays remaining keys to outputs[1]."""
         print('Other key', key)
-        self.outputs[1].send(key)
+        self.post(key, output=self.outputs[1])
 
     def on_key_event(self, key):
         try:
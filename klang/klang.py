@@ -4,22 +4,29 @@ import logging
 import math
 import time
 
-from klang.audio.helpers import INTERVAL
 # pylint: disable=unused-import
 from klang.audio.klanggeber import Dac, Adc
 from klang.audio.klanggeber import look_for_audio_blocks, run_audio_engine
 from klang.clock import ClockMixin
 from klang.composite import Composite
-from klang.execution import determine_execution_order
-
-
-def unravel(execOrder):
-    """Flatten global execution order. Turn internal execution order of
-    composites inside out.
+from klang.context import EngineContext, active_context, get_context
+from klang.execution import (
+    ExecutionPlan,
+    ParallelExecutionPlan,
+    determine_execution_order,
+    unravel,
+)
+from klang.profiling import Profiler
+from klang.sub_blocks import SubBlockExecutionPlan
+
+
+def flatten_execution_order(execOrder):
+    """Flatten global execution order completely. Other than unravel() also
+    turn composites with a custom update() method inside out.
     """
     for block in execOrder:
         if isinstance(block, Composite):
-            yield from unravel(block.execOrder)
+            yield from flatten_execution_order(block.execOrder)
         else:
             yield block
 
@@ -31,7 +38,7 @@ def validate_global_execution_order(execOrder, logger):
         execOrder (list): Execution order.
         logger (Logger): Logger instance to output the warning to.
     """
-    flattenedExecOrder = unravel(execOrder)
+    flattenedExecOrder = flatten_execution_order(execOrder)
     counter = collections.Counter(flattenedExecOrder)
     hasDuplicates = max(counter.values()) > 1
     if hasDuplicates:
@@ -50,41 +57,123 @@ def validate_global_execution_order(execOrder, logger):
 
 def sleep_until_next_cycle():
     """Sleep until next cycle and return timestamp."""
+    interval = get_context().interval
     now = time.perf_counter()
-    then = math.ceil(now / INTERVAL) * INTERVAL
+    then = math.ceil(now / interval) * interval
     time.sleep(max(0, then - now))
     return then
 
 
-def run_klang(*blocks, **kwargs):
+def run_klang(*blocks, nWorkers=None, nProcesses=None, profile=False,
+              profileFilepath='', context=None, blockSize=None, **kwargs):
     """Run klang block network.
 
     Args:
         blocks: Klang blocks to run.
 
     Kwargs:
-        See help(klang.audio.run_audio_engine) for options.
+        nWorkers (int): Execute independent blocks concurrently on a thread
+            pool with nWorkers threads. Serial execution by default.
+        nProcesses (int): Offline mode only. Render independent branches
+            feeding the final mix in up to nProcesses worker processes.
+        profile (bool): Time every block update and log a DSP load report at
+            shutdown.
+        profileFilepath (str): Dump profiling statistics to CSV file (implies
+            profile).
+        context (EngineContext): Sampling rate and buffer size. Active
+            context (klang.config by default) if not specified.
+        blockSize (int): Offline mode only. Render with this larger buffer
+            size (multiple of the context buffer size). Control blocks and
+            note events keep the timing of the context buffer size (see
+            klang.sub_blocks).
+        See help(klang.audio.run_audio_engine) for more options.
     """
     if not blocks:
         raise ValueError('No blocks to run specified!')
 
-    logger = logging.getLogger('Klang')
+    with active_context(context or get_context()) as ctx:
+        logger = logging.getLogger('Klang')
+        logger.info(
+            'Engine context: %d Hz, %d samples per buffer',
+            ctx.samplingRate, ctx.bufferSize,
+        )
+        if not blockSize:
+            return _run_klang(blocks, nWorkers, nProcesses, profile,
+                              profileFilepath, logger, **kwargs)
+
+        if not kwargs.get('offline'):
+            raise ValueError('Large block rendering only works offline!')
+
+        if nWorkers or nProcesses:
+            logger.warning('Ignoring nWorkers / nProcesses for large block rendering')
+
+        logger.info(
+            'Rendering with %d samples per block (control size %d samples)',
+            blockSize, ctx.bufferSize,
+        )
+        with active_context(EngineContext(ctx.samplingRate, blockSize, ctx.dtype)):
+            return _run_klang(blocks, None, None, profile, profileFilepath,
+                              logger, controlSize=ctx.bufferSize, **kwargs)
+
+
+def _run_klang(blocks, nWorkers, nProcesses, profile, profileFilepath, logger,
+               controlSize=None, **kwargs):
+    """Run klang block network inside the active engine context."""
     logger.info('Determining execution order from %s', ', '.join(map(str, blocks)))
     execOrder = determine_execution_order(blocks)
     validate_global_execution_order(execOrder, logger)
-
-    def execute_all_blocks():
-        for block in execOrder:
-            block.update()
-
-    # Do we have audio?
-    adc, dac = look_for_audio_blocks(execOrder)
-    if adc.nChannels > 0 or dac.nChannels > 0:
-        return run_audio_engine(adc, dac, execute_all_blocks, **kwargs)
-
-    logger.warning('Did not find any audio activity')
-    logger.info('Starting non-audio main loop')
-    while True:
-        now = sleep_until_next_cycle()
-        ClockMixin.set_current_time(now)
-        execute_all_blocks()
+    if kwargs.get('telemetry'):
+        kwargs['telemetry'].watch(unravel(execOrder))
+
+    profiler = None
+    if profile or profileFilepath:
+        profiler = Profiler()
+        kwargs['profiler'] = profiler
+
+    if controlSize:
+        execute_all_blocks = SubBlockExecutionPlan(execOrder, controlSize, profiler)
+        logger.info(
+            'Compiled sub-block execution plan with %d blocks',
+            len(execute_all_blocks),
+        )
+    elif nWorkers:
+        execute_all_blocks = ParallelExecutionPlan(execOrder, nWorkers, profiler)
+        logger.info(
+            'Compiled parallel execution plan with %d blocks in %d levels',
+            len(execute_all_blocks), len(execute_all_blocks.stages),
+        )
+    else:
+        execute_all_blocks = ExecutionPlan(execOrder, profiler)
+        logger.info('Compiled execution plan with %d blocks', len(execute_all_blocks))
+
+    try:
+        # Do we have audio?
+        adc, dac = look_for_audio_blocks(execOrder)
+        if adc.nChannels > 0 or dac.nChannels > 0:
+            if nProcesses and kwargs.get('offline'):
+                from klang.offline import bounce_in_parallel  # Circular import for comforts
+                return bounce_in_parallel(
+                    execOrder, adc, dac, execute_all_blocks,
+                    nProcesses=nProcesses, **kwargs
+                )
+
+            return run_audio_engine(adc, dac, execute_all_blocks, **kwargs)
+
+        logger.warning('Did not find any audio activity')
+        logger.info('Starting non-audio main loop')
+        execute_cycle = execute_all_blocks
+        if profiler:
+            execute_cycle = profiler.time_cycles(execute_all_blocks)
+
+        while True:
+            now = sleep_until_next_cycle()
+            ClockMixin.set_current_time(now)
+            execute_cycle()
+
+    finally:
+        execute_all_blocks.close()
+        if profiler:
+            logger.info('Profiling report\n%s', profiler.report())
+            if profileFilepath:
+                logger.info('Writing profiling statistics to %r', profileFilepath)
+                profiler.to_csv(profileFilepath)
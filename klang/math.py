@@ -65,14 +65,24 @@ def lcm(a, b):
     return abs(a*b) // math.gcd(a, b)
 
 
-def blend(a, b, x):
+def blend(a, b, x, out=None):
     """Dry / wet blend two signals together.
 
     Usage:
         >>> blend(np.zeros(4), np.ones(4), .5)
         array([0.5, 0.5, 0.5, 0.5])
+
+    Kwargs:
+        out (array): Output array to write the result into (can be b but
+            must not be a). No temporary arrays get allocated.
     """
-    return (1. - x) * a + x * b
+    if out is None:
+        return a + x * (b - a)
+
+    np.subtract(b, a, out=out)
+    out *= x
+    out += a
+    return out
 
 
 def sign(number):
@@ -5,16 +5,20 @@ import json
 from klang.music.tunings import EQUAL_TEMPERAMENT
 
 
-class Note(collections.namedtuple('Note', 'pitch velocity frequency')):
+class Note(collections.namedtuple('Note', 'pitch velocity frequency offset')):
 
     """Music note. Pitch is optional. Used for voice mapping in synthesizer.
 
+    The sample offset places the note inside the current buffer. Envelopes and
+    voices split the buffer at the offset so that notes do not get quantized
+    to buffer boundaries.
+
     Note:
       - pitch before velocity for lexicographical order.
     """
 
     def __new__(cls, pitch, velocity=1.0, frequency=None,
-                temperament=EQUAL_TEMPERAMENT):
+                temperament=EQUAL_TEMPERAMENT, offset=0):
         """Args:
             pitch (int): Pitch number.
 
@@ -22,6 +26,7 @@ class Note(collections.namedtuple('Note', 'pitch velocity frequency')):
             velocity (float): Note velocity.
             frequency (float): Frequency value.
             temperament (Temperament): Tuning for default frequency.
+            offset (int): Sample offset inside the current buffer.
         """
         if not 0 <= pitch < 128:
             raise ValueError('Invalid pitch %s!' % pitch)
@@ -31,8 +36,10 @@ class Note(collections.namedtuple('Note', 'pitch velocity frequency')):
             frequency = temperament.pitch_2_frequency(pitch)
         if frequency < 0:
             raise ValueError('Invalid frequency %s!' % frequency)
+        if offset < 0:
+            raise ValueError('Invalid offset %s!' % offset)
 
-        return super().__new__(cls, pitch, velocity, frequency)
+        return super().__new__(cls, pitch, velocity, frequency, int(offset))
 
     @classmethod
     def from_dict(cls, dct):
@@ -64,6 +71,13 @@ class Note(collections.namedtuple('Note', 'pitch velocity frequency')):
         """Silence note. Get a copy with velocity set to zero."""
         return self._replace(velocity=0.)
 
+    def at(self, offset):
+        """Get a copy placed at sample offset inside the current buffer."""
+        if offset < 0:
+            raise ValueError('Invalid offset %s!' % offset)
+
+        return self._replace(offset=int(offset))
+
     def to_dict(self):
         """Convert note to dict."""
         dct = dict(zip(self._fields, self))
@@ -75,4 +89,7 @@ class Note(collections.namedtuple('Note', 'pitch velocity frequency')):
         return json.dumps(self.to_dict())
 
     def __str__(self):
-        return 'Note(pitch=%d, velocity=%.1f, frequency=%.1f Hz)' % self
+        if self.offset:
+            return 'Note(pitch=%d, velocity=%.1f, frequency=%.1f Hz, offset=%d)' % self
+
+        return 'Note(pitch=%d, velocity=%.1f, frequency=%.1f Hz)' % self[:3]
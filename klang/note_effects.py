@@ -1,17 +1,20 @@
 """All kind of note message effects."""
 from typing import Deque, Tuple, Generator
+import bisect
 import collections
 
 from klang.block import Block
 from klang.clock import ClockMixin
 from klang.connections import MessageInput, MessageOutput
+from klang.context import get_context
 from klang.messages import Note
 
 
 class NoteLengthener(Block, ClockMixin):
 
     """Convert note-ons to actual notes (note-on followed by a note-off later on
-    in the future).
+    in the future). Note-offs get sent in the buffer they fall into with the
+    corresponding sample offset.
     """
 
     def __init__(self, duration: float):
@@ -24,27 +27,35 @@ class NoteLengthener(Block, ClockMixin):
         self.outputs = [MessageOutput(owner=self)]
         self.activeNotes: Deque[Tuple[float, Note]] = collections.deque()
 
-    def outdated_notes(self, now: float) -> Generator[Note, None, None]:
-        """Iterate over outdated notes."""
+    def outdated_notes(self, now: float) -> Generator[Tuple[float, Note], None, None]:
+        """Iterate over outdated (end, note) entries."""
         while self.activeNotes:
             end, note = self.activeNotes[0]  # Peek
-            if now < end:
+            if now <= end:
                 return
 
-            yield note
+            yield end, note
             self.activeNotes.popleft()
 
     def update(self):
+        ctx = get_context()
         now = self.clock()
-        for note in self.outdated_notes(now):
-            noteOff = note.silence()
-            self.output.send(noteOff)
-
+        notes = []
         for note in self.input.receive():
             if note.on:
-                entry = (now + self.duration, note)
-                self.activeNotes.append(entry)
-                self.output.send(note)
+                start = now + note.offset * ctx.dt
+                entry = (start + self.duration, note)
+                bisect.insort(self.activeNotes, entry)
+                notes.append(note)
+
+        # Note-offs falling into the current buffer (short notes included)
+        for end, note in self.outdated_notes(now + ctx.interval):
+            offset = max(0, int((end - now) * ctx.samplingRate))
+            notes.append(note.silence().at(offset))
+
+        # Note-offs before note-ons at the same offset (retriggered pitches)
+        for note in sorted(notes, key=lambda note: (note.offset, note.on)):
+            self.output.send(note)
 
 
 class MaxNotes(Block):
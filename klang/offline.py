@@ -0,0 +1,300 @@
+"""Multi-process offline bouncing.
+
+Independent branches feeding the final mix (e.g. the Mixer in front of the Dac)
+get rendered in separate worker processes. Each worker writes the output values
+of its branch to disk (stems). The parent process then runs the remaining
+blocks with the normal offline audio engine and injects the stems in place of
+the offloaded blocks. Worker processes are forked so that the block network
+does not have to be pickled.
+
+Results are bit-identical to the serial bounce as long as the branches do not
+share any state besides their connections. Note that blocks drawing from the
+global random generator (noise) in more than one branch break this (random
+numbers get drawn in a different order).
+"""
+import logging
+import multiprocessing
+import os
+import tempfile
+
+import numpy as np
+
+from klang.arena import BufferSlot, allocate_buffers
+from klang.audio.klanggeber import offline_cycles, run_audio_engine
+from klang.clock import ClockMixin
+from klang.connections import MessageOutput, terminal_source
+from klang.constants import INF
+from klang.context import get_context
+from klang.execution import downstream_inputs, unravel, upstream_blocks
+from klang.silence import silence_gate
+
+
+__all__ = ['find_independent_branches', 'bounce_in_parallel']
+
+
+def upstream_closure(block, members):
+    """All upstream plan members of block (block included)."""
+    closure = {block}
+    stack = [block]
+    while stack:
+        for src in upstream_blocks(stack.pop(), members):
+            if src not in closure:
+                closure.add(src)
+                stack.append(src)
+
+    return closure
+
+
+def find_mix_block(dac, members):
+    """Walk upstream from the dac until reaching the first block with multiple
+    upstream neighbors (the final mix).
+
+    Returns:
+        tuple: Tail blocks (dac -> mix block) and the branch roots.
+    """
+    tail = [dac]
+    while True:
+        roots = list(dict.fromkeys(upstream_blocks(tail[-1], members)))
+        if len(roots) != 1 or roots[0] in tail:
+            return tail, roots
+
+        tail.append(roots[0])
+
+
+def exported_outputs(group, members):
+    """Outputs of group which get read from blocks outside of group.
+
+    Args:
+        group (set): Branch blocks.
+        members (set): Blocks of the execution plan.
+
+    Returns:
+        list: (block, terminal source) tuples. None if group is connected via
+            messages to the outside world (can not be replaced by stems).
+    """
+    exports = []
+    for block in group:
+        for output in block.outputs:
+            for input_ in downstream_inputs(output, members):
+                if input_.owner in group:
+                    continue
+
+                if isinstance(output, MessageOutput):
+                    return None
+
+                export = (block, terminal_source(output))
+                if export not in exports:
+                    exports.append(export)
+
+    return exports
+
+
+def find_independent_branches(blocks, dac):
+    """Find disjoint upstream sub-networks feeding the final mix in front of
+    dac.
+
+    Args:
+        blocks (list): Flat execution order.
+        dac (Dac): Audio output block.
+
+    Returns:
+        list: Independent branches (sets of blocks).
+    """
+    members = set(blocks)
+    if dac not in members:
+        return []
+
+    tail, roots = find_mix_block(dac, members)
+    groups = []
+    for root in roots:
+        closure = upstream_closure(root, members)
+        if closure.intersection(tail):
+            continue  # Feedback from the tail. Not independent
+
+        overlapping = [grp for grp in groups if grp & closure]
+        for grp in overlapping:
+            groups.remove(grp)
+            closure |= grp
+
+        groups.append(closure)
+
+    return groups
+
+
+def render_stems(blocks, outputs, nCycles, directory):
+    """Render blocks for nCycles buffer cycles and write the values of outputs
+    to .npy stems inside directory. Runs inside a worker process.
+
+    Args:
+        blocks (list): Branch blocks in execution order.
+        outputs (list): Outputs to record.
+        nCycles (int): Number of buffer cycles.
+        directory (str): Stem directory.
+    """
+    # Recorded values have to survive until the end of the cycle
+    for output in outputs:
+        if getattr(output, 'slot', None) is not None:
+            output.slot = BufferSlot()
+
+    updates = [silence_gate(block) for block in blocks]
+    interval = get_context().interval
+    stems = []
+    playTime = 0.
+    for cycle in range(nCycles):
+        ClockMixin.set_current_time(playTime)
+        for update in updates:
+            update()
+
+        for nr, output in enumerate(outputs):
+            value = np.asarray(output.value)
+            if cycle == 0:
+                stems.append(np.lib.format.open_memmap(
+                    stem_path(directory, nr),
+                    mode='w+',
+                    dtype=value.dtype,
+                    shape=(nCycles,) + value.shape,
+                ))
+
+            stem = stems[nr]
+            if value.shape != stem.shape[1:] or value.dtype != stem.dtype:
+                raise ValueError('%s changed its value shape / type!' % output)
+
+            stem[cycle] = value
+
+        playTime += interval
+
+    for stem in stems:
+        stem.flush()
+
+
+def stem_path(directory, nr):
+    """Stem filepath."""
+    return os.path.join(directory, '%d.npy' % nr)
+
+
+def render_branches(branches, blocks, nCycles, directory, nProcesses):
+    """Render all branches in forked worker processes (at most nProcesses at
+    the same time).
+
+    Returns:
+        bool: If all branches got rendered successfully.
+    """
+    ctx = multiprocessing.get_context('fork')
+    processes = []
+    for nr, (group, exports) in enumerate(branches):
+        branchDir = os.path.join(directory, str(nr))
+        os.mkdir(branchDir)
+        processes.append(ctx.Process(
+            target=render_stems,
+            args=(
+                [block for block in blocks if block in group],
+                [src for _, src in exports],
+                nCycles,
+                branchDir,
+            ),
+            name='KlangBranch-%d' % nr,
+        ))
+
+    for start in range(0, len(processes), nProcesses):
+        batch = processes[start:start + nProcesses]
+        for proc in batch:
+            proc.start()
+
+        for proc in batch:
+            proc.join()
+
+    return all(proc.exitcode == 0 for proc in processes)
+
+
+class StemPlayback:
+
+    """Execute the remaining blocks and inject the recorded stems of the
+    offloaded branches at the position of their original blocks.
+
+    Attributes:
+        cycle (int): Current buffer cycle.
+        steps (list): Block updates and stem injections in execution order.
+    """
+
+    def __init__(self, blocks, branches, directory):
+        """Args:
+            blocks (list): Flat execution order.
+            branches (list): Rendered (group, exports) tuples.
+            directory (str): Stem directory.
+        """
+        self.cycle = 0
+        injections = {}
+        offloaded = set()
+        for nr, (group, exports) in enumerate(branches):
+            offloaded |= group
+            branchDir = os.path.join(directory, str(nr))
+            for idx, (block, src) in enumerate(exports):
+                stem = np.load(stem_path(branchDir, idx), mmap_mode='r')
+                injections.setdefault(block, []).append((src, stem))
+
+        self.steps = []
+        for block in blocks:
+            if block in injections:
+                self.steps.append((self.inject, injections[block]))
+            elif block not in offloaded:
+                self.steps.append((silence_gate(block), ()))
+
+    def inject(self, *pairs):
+        """Inject stem samples of current cycle."""
+        for output, stem in pairs:
+            output.set_value(np.array(stem[self.cycle]))
+
+    def __call__(self):
+        for func, args in self.steps:
+            func(*args)
+
+        self.cycle += 1
+
+
+def bounce_in_parallel(execOrder, adc, dac, execute_all_blocks, duration:
+                       float = INF, nProcesses: int = None, **kwargs):
+    """Offline bounce with independent branches rendered in worker processes.
+    Falls back to the serial bounce if there is nothing to parallelize or
+    something went wrong in a worker process.
+
+    Args:
+        execOrder: Global execution order.
+        adc: Sound card input block.
+        dac: Sound card output block.
+        execute_all_blocks: Callback for serial execOrder execution.
+
+    Kwargs:
+        duration: Bounce duration.
+        nProcesses: Maximum number of concurrent worker processes. Number of
+            CPUs by default.
+        See help(klang.audio.run_audio_engine) for more options.
+    """
+    logger = logging.getLogger('Klang')
+    kwargs.update(duration=duration, offline=True)
+    blocks = list(unravel(execOrder))
+    members = set(blocks)
+    branches = []
+    for group in find_independent_branches(blocks, dac):
+        exports = exported_outputs(group, members)
+        if exports is not None:
+            branches.append((group, exports))
+
+    if duration == INF or len(branches) < 2 or os.name != 'posix':
+        logger.info('Nothing to bounce in parallel')
+        return run_audio_engine(adc, dac, execute_all_blocks, **kwargs)
+
+    nProcesses = nProcesses or os.cpu_count() or 1
+    logger.info(
+        'Rendering %d independent branches with up to %d processes',
+        len(branches), nProcesses,
+    )
+    allocate_buffers(blocks)  # Stems and playback run in serial order
+    with tempfile.TemporaryDirectory(prefix='klang-stems-') as directory:
+        nCycles = offline_cycles(duration)
+        if not render_branches(branches, blocks, nCycles, directory, nProcesses):
+            logger.warning('Branch rendering failed. Falling back to serial bounce')
+            execute_all_blocks.compile()  # Restore buffer slots of the plan
+            return run_audio_engine(adc, dac, execute_all_blocks, **kwargs)
+
+        playback = StemPlayback(blocks, branches, directory)
+        return run_audio_engine(adc, dac, playback, **kwargs)
@@ -0,0 +1,207 @@
+"""Block profiling.
+
+Opt-in timing of every block update() and of the whole buffer cycle. Blocks
+inside opaque composites (composites with a custom update() method like
+voices, synthesizers, Tremolo, RingModulator or Arpeggiator) get timed as well
+as long as the composite executes them via klang.execution.execute() or
+execute_one(). Their time is also part of the entry of the surrounding composite. The cycle
+durations are put in relation to the buffer interval (DSP load). A
+report sorted by the most expensive blocks can be logged or dumped to a CSV
+file at shutdown.
+
+Usage:
+    >>> run_klang(dac, profile=True, profileFilepath='profile.csv')
+"""
+import collections
+import csv
+import functools
+import time
+
+import numpy as np
+
+from klang.context import get_context
+
+
+__all__ = ['Timings', 'Profiler']
+
+
+class Timings:
+
+    """Duration statistics. Mean and max over all samples, percentiles over
+    the most recent MAX_SAMPLES samples.
+
+    Attributes:
+        count (int): Number of samples.
+        total (float): Total duration.
+        max (float): Maximum duration.
+        recent (deque): Most recent durations.
+    """
+
+    MAX_SAMPLES = 10000
+    """int: Number of recent samples to keep for percentiles."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+        self.recent = collections.deque(maxlen=self.MAX_SAMPLES)
+
+    def add(self, duration: float):
+        """Add duration sample."""
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.recent.append(duration)
+
+    @property
+    def mean(self) -> float:
+        """Mean duration."""
+        if self.count == 0:
+            return 0.
+
+        return self.total / self.count
+
+    def percentile(self, q: float) -> float:
+        """Percentile of the recent durations."""
+        if not self.recent:
+            return 0.
+
+        return float(np.percentile(self.recent, q))
+
+
+class Profiler:
+
+    """Collects update() timings per block and buffer cycle durations.
+
+    Attributes:
+        blocks (list): Profiled blocks (in execution order).
+        timings (dict): Block -> Timings.
+        cycles (Timings): Buffer cycle durations.
+    """
+
+    clock = time.perf_counter
+
+    def __init__(self):
+        self.blocks = []
+        self.timings = {}
+        self.cycles = Timings()
+
+    def register(self, block) -> Timings:
+        """Timings of block. Registered on first use."""
+        timings = self.timings.get(block)
+        if timings is None:
+            timings = self.timings[block] = Timings()
+            self.blocks.append(block)
+
+        return timings
+
+    def run(self, block):
+        """Execute and time update of a block inside an opaque composite."""
+        timings = self.register(block)
+        start = self.clock()
+        block.update()
+        timings.add(self.clock() - start)
+
+    def wrap(self, block, update=None):
+        """Wrap update method of block with a timer.
+
+        Args:
+            block (Block): Block to profile.
+
+        Kwargs:
+            update (callable): Update function to time. block.update by
+                default.
+
+        Returns:
+            callable: Timed update function.
+        """
+        if update is None:
+            update = block.update
+
+        add = self.register(block).add
+        clock = self.clock
+
+        def timed_update():
+            start = clock()
+            update()
+            add(clock() - start)
+
+        return timed_update
+
+    def record_cycle(self, duration: float):
+        """Record duration of a whole buffer cycle."""
+        self.cycles.add(duration)
+
+    def time_cycles(self, func):
+        """Wrap buffer cycle function (e.g. stream callback) with a timer."""
+        clock = self.clock
+
+        @functools.wraps(func)
+        def timed_cycle(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record_cycle(clock() - start)
+
+        return timed_cycle
+
+    @property
+    def load(self) -> float:
+        """Mean DSP load. Cycle duration relative to buffer interval."""
+        return self.cycles.mean / get_context().interval
+
+    def statistics(self):
+        """Per block statistics sorted by mean duration (most expensive
+        first).
+
+        Returns:
+            list: Rows of (position, name, count, mean, p99, max, share)
+                tuples. Durations in seconds, share of the mean buffer
+                interval.
+        """
+        interval = get_context().interval
+        rows = []
+        for position, block in enumerate(self.blocks, 1):
+            timings = self.timings[block]
+            rows.append((
+                position,
+                str(block),
+                timings.count,
+                timings.mean,
+                timings.percentile(99),
+                timings.max,
+                timings.mean / interval,
+            ))
+
+        return sorted(rows, key=lambda row: row[3], reverse=True)
+
+    def report(self, limit: int = 20) -> str:
+        """Render sorted text report of the most expensive blocks."""
+        interval = get_context().interval
+        lines = [
+            'DSP load: mean %.1f %%, p99 %.1f %%, max %.1f %% of %.2f ms' % (
+                100 * self.load,
+                100 * self.cycles.percentile(99) / interval,
+                100 * self.cycles.max / interval,
+                1000 * interval,
+            ),
+            '%4s %-40s %10s %10s %10s %7s' % (
+                '#', 'Block', 'mean [us]', 'p99 [us]', 'max [us]', 'load'
+            ),
+        ]
+        for position, name, _, mean, p99, max_, share in self.statistics()[:limit]:
+            lines.append('%4d %-40.40s %10.1f %10.1f %10.1f %6.1f%%' % (
+                position, name, 1e6 * mean, 1e6 * p99, 1e6 * max_, 100 * share
+            ))
+
+        return '\n'.join(lines)
+
+    def to_csv(self, filepath: str):
+        """Dump per block statistics to CSV file."""
+        with open(filepath, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow([
+                'position', 'block', 'count', 'mean', 'p99', 'max', 'load',
+            ])
+            writer.writerows(self.statistics())
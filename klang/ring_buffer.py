@@ -3,8 +3,8 @@ from typing import Tuple, Sequence
 
 import numpy as np
 
-from klang.config import BUFFER_SIZE
 from klang.constants import MONO
+from klang.context import get_context
 
 
 class RingBuffer:
@@ -17,20 +17,24 @@ class RingBuffer:
     """
 
     def __init__(self, length: int, capacity: int = None, bufferSize:
-                 int = BUFFER_SIZE, nChannels: int = MONO, dtype: type = float):
+                 int = None, nChannels: int = MONO, dtype: type = float):
         """Args:
             length: Length of ring buffer.
 
         Kwargs:
             capacity: Maximum ring buffer capacity. Same as length by default.
             bufferSize: Amount of over allocation. Should be as big as largest
-                maximum number of samples.
+                maximum number of samples. Buffer size of the engine context
+                by default.
             nChannels: Number of audio channels.
             dtype: Buffer data type.
         """
         if capacity is None:
             capacity = length
 
+        if bufferSize is None:
+            bufferSize = get_context().bufferSize
+
         self._length = length
         self.capacity = capacity
         self.bufferSize = bufferSize
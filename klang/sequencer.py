@@ -7,11 +7,13 @@ import random
 
 import numpy as np
 
+from klang.audio.helpers import phase_crossings
 from klang.audio.oscillators import Phasor
 from klang.block import Block
 from klang.composite import Composite
 from klang.connections import MessageInput, MessageOutput, MessageRelay, Relay
 from klang.constants import TAU
+from klang.context import get_context
 from klang.messages import Note
 from klang.music.note_values import QUARTER_NOTE, SIXTEENTH_NOTE
 from klang.music.rhythm import MicroRhyhtm
@@ -19,8 +21,8 @@ from klang.music.tempo import tempo_2_period
 from klang.note_effects import NoteLengthener, MessageMixer
 
 __all__ = [
-    'random_pattern', 'pizza_slice_number', 'PizzaSlicer', 'PatternLookup',
-    'Sequencer',
+    'random_pattern', 'pizza_slice_number', 'Step', 'PizzaSlicer',
+    'PatternLookup', 'Sequencer',
 ]
 
 
@@ -95,12 +97,30 @@ def atleast_2d(obj) -> Pattern:
     return obj
 
 
+class Step(collections.namedtuple('Step', ['index', 'offset'])):
+
+    """Pattern step message.
+
+    Attributes:
+        index (int): Step index.
+        offset (int): Sample offset inside the current buffer.
+    """
+
+
 class PizzaSlicer(Block):
 
     """Circular phase edge detector.
 
-    Maps float input phase [0, TAU) to discrete index output messages (depending
-    on how many steps).
+    Maps float input phase [0, TAU) to discrete Step output messages (depending
+    on how many steps). Steps which start during the current buffer get
+    sent ahead with their sample offset. Extrapolated with the phase
+    increment of the last buffer.
+
+    Attributes:
+        nSlices (int): Number of pizza slices / steps.
+        currentIdx (int): Index of the last sent step.
+        prevPhase (float): Input phase of the last buffer.
+        nAhead (int): Number of steps sent ahead during the last buffer.
     """
 
     def __init__(self, nSlices: int):
@@ -111,18 +131,37 @@ class PizzaSlicer(Block):
         self.outputs = [MessageOutput(owner=self)]
         self.nSlices = nSlices
         self.currentIdx = -1
+        self.prevPhase = None
+        self.nAhead = 0
 
     def increment(self):
         """Increment current index by one."""
         self.currentIdx = (self.currentIdx + 1) % self.nSlices
 
     def update(self):
-        phase = self.input.value
+        phase = self.input.value % TAU
         idx = pizza_slice_number(phase, self.nSlices)
         missing = (idx - self.currentIdx) % self.nSlices
+        ahead = (self.currentIdx - idx) % self.nSlices
+        if 0 < ahead <= self.nAhead:
+            missing = 0  # Already sent during the last buffer
+
         for _ in range(missing):
             self.increment()
-            self.output.send(self.currentIdx)
+            self.output.send(Step(self.currentIdx, 0))
+
+        self.nAhead = 0
+        if self.prevPhase is not None:
+            bufferSize = get_context().bufferSize
+            increment = (phase - self.prevPhase) % TAU / bufferSize
+            period = TAU / self.nSlices
+            for offset in phase_crossings(phase, increment, bufferSize, period):
+                if offset > 0:
+                    self.increment()
+                    self.output.send(Step(self.currentIdx, offset))
+                    self.nAhead += 1
+
+        self.prevPhase = phase
 
     def __str__(self):
         return '%s(nSlices: %s)' % (type(self).__name__, self.nSlices)
@@ -139,11 +178,11 @@ class PatternLookup(Block):
         self.pattern = pattern
 
     def update(self):
-        for nr in self.input.receive():
+        for step in self.input.receive():
             # TODO: Support for chords
-            for pitch in atleast_1d(self.pattern[nr]):
+            for pitch in atleast_1d(self.pattern[step.index]):
                 if pitch:
-                    note = Note(pitch=pitch, velocity=1.)
+                    note = Note(pitch=pitch, velocity=1.).at(step.offset)
                     self.output.send(note)
 
     def __str__(self):
@@ -205,23 +244,22 @@ class Sequence(Composite):
     def disconnect_phase_insert(self):
         """Disconnect phaseOut & phaseIn connections."""
         for dst in set(self.phaseOut.outgoingConnections):
-            self.phaseOut.disconnect(dst)
+            self.sequencer.unpatch(self.phaseOut, dst)
 
         if self.phaseIn.connected:
             src = self.phaseIn.incomingConnection
-            src.disconnect(self.phaseIn)
+            self.sequencer.unpatch(src, self.phaseIn)
 
     def apply_micro_rhythm(self, microRhythm: MicroRhyhtm):
         """Patch microRhythm to sequence."""
         self.disconnect_phase_insert()
-        self.phaseOut | microRhythm | self.phaseIn
-        self.sequencer.update_internal_exec_order()
+        self.sequencer.patch(self.phaseOut, microRhythm)
+        self.sequencer.patch(microRhythm, self.phaseIn)
 
     def reset_micro_rhythm(self):
         """Dispatch microRhythm from sequence."""
         self.disconnect_phase_insert()
-        self.phaseOut.connect(self.phaseIn)
-        self.sequencer.update_internal_exec_order()
+        self.sequencer.patch(self.phaseOut, self.phaseIn)
 
     def __str__(self):
         infos = [
@@ -271,13 +309,11 @@ class Sequencer(Composite):
         if self.splitOutputs:
             relay = MessageRelay(owner=self)
             self.outputs.append(relay)
-            newSeq | relay
+            self.patch(newSeq, relay)
 
         else:
             self.msgMixer.add_new_channel()
-            newSeq | self.msgMixer.inputs[-1]
-
-        self.update_internal_exec_order()
+            self.patch(newSeq, self.msgMixer.inputs[-1])
 
     @property
     def nChannels(self) -> int:
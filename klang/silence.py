@@ -0,0 +1,119 @@
+"""Silence propagation.
+
+Outputs which carry nothing but silence get set to the shared, read-only
+silence arrays of get_silence(). Downstream blocks can recognize silence by
+identity (is_silence()) without looking at the samples. Blocks declare how
+they behave on silent input (class attribute SILENCE_POLICY):
+  - None: Always process (default).
+  - 'stateless': Silent audio inputs produce silent outputs. Update gets
+    skipped (after one regular update which determines the output shape).
+  - 'tail': Internal state rings out (filters, delays, reverbs). Keeps on
+    processing silent input until the tail has decayed below THRESHOLD (see
+    Block.decayed()). Skipped afterwards.
+
+Control parameters (non-array input values like gains and frequencies) do not
+count. Any non-silent audio array on an input wakes the block up again.
+"""
+import numpy as np
+
+from klang.audio.helpers import get_silence, is_silence
+from klang.connections import Input, Output
+
+
+__all__ = ['THRESHOLD', 'SILENCE_POLICIES', 'silent_inputs', 'mute', 'silence_gate']
+
+
+THRESHOLD = 1e-5
+"""float: Amplitude below which the tail of a block counts as decayed (-100
+dB).
+"""
+
+SILENCE_POLICIES = {None, 'stateless', 'tail'}
+"""set: Valid silence policies."""
+
+
+def silent_inputs(block):
+    """Check if all audio inputs of block are silent. Non-array values get
+    ignored. At least one input has to carry silence.
+    """
+    silent = False
+    for input_ in block.inputs:
+        if not isinstance(input_, Input):
+            continue
+
+        value = input_.value
+        if is_silence(value):
+            silent = True
+        elif isinstance(value, np.ndarray):
+            return False
+
+    return silent
+
+
+def mute(block):
+    """Set value outputs of block to silence. Shape and dtype of the previous
+    output values are kept.
+
+    Returns:
+        bool: If block got muted. False if there are no previous audio values
+            to go by.
+    """
+    silences = []
+    for output in block.outputs:
+        if not isinstance(output, Output):
+            continue
+
+        value = output.value
+        if not isinstance(value, np.ndarray):
+            return False
+
+        silences.append((output, get_silence(value.shape, value.dtype)))
+
+    for output, silence in silences:
+        output.set_value(silence)
+
+    return True
+
+
+def silence_gate(block, update=None, threshold=THRESHOLD):
+    """Wrap update method of block so that it gets skipped on silent input
+    according to its silence policy.
+
+    Args:
+        block (Block): Block to gate.
+
+    Kwargs:
+        update (callable): Update function to wrap. block.update by default.
+        threshold (float): Tail decay threshold.
+
+    Returns:
+        callable: Gated update function (or the plain update function if block
+            has no silence policy).
+    """
+    policy = block.SILENCE_POLICY
+    if policy not in SILENCE_POLICIES:
+        raise ValueError('Unknown silence policy %r of %s' % (policy, block))
+
+    if update is None:
+        update = block.update
+
+    if policy is None:
+        return update
+
+    stateless = (policy == 'stateless')
+    quiet = False
+
+    def gated_update():
+        nonlocal quiet
+        if not silent_inputs(block):
+            quiet = False
+            update()
+            return
+
+        if quiet and mute(block):
+            return
+
+        update()
+        quiet = stateless or block.decayed(threshold)
+
+    return gated_update
@@ -0,0 +1,369 @@
+"""Sub-block rendering.
+
+Offline bounces can run with a much larger buffer size than the real-time
+engine (fewer buffer cycles, less Python overhead per sample). Message driven
+blocks would then only fire once per large block and every note would get
+quantized to the large block grid.
+
+The sub-block execution plan keeps the timing of a smaller control size:
+  - Control blocks (message sources like sequencers, note lengtheners and
+    arpeggiators plus everything upstream of them, e.g. the phasors driving a
+    sequencer) get stepped control size wise with the clock advancing
+    accordingly.
+  - Messages leaving a group of blocks get stamped with their sample offset
+    inside the large block.
+  - Message receiving blocks (synthesizers) get stepped control size wise and
+    receive the messages in the same segment as in the real-time engine. This
+    keeps the render sample equivalent to rendering with the control size
+    (voices get activated / freed and pick up their oscillator phase at the
+    same samples).
+  - Blocks which can not process the large block in one go (see
+    Block.max_block_size(), e.g. short feedback delays) get stepped control
+    size wise as well.
+
+Everything else processes the whole large block at once. Value inputs coming
+from outside of a stepped group get sliced, array outputs get reassembled to
+full length.
+
+Usage:
+    >>> run_klang(dac, offline=True, duration=300., filepath='bounce.wav',
+    ...           blockSize=8192)
+"""
+import bisect
+import functools
+
+import numpy as np
+
+from klang.arena import BufferSlot
+from klang.audio.helpers import get_silence, is_silence
+from klang.clock import ClockMixin
+from klang.connections import (
+    Input, MessageInput, MessageOutput, Output, PatchRevision, terminal_source,
+)
+from klang.context import EngineContext, get_context, set_context
+from klang.execution import ExecutionPlan, downstream_inputs, upstream_blocks
+
+
+__all__ = ['control_blocks', 'hoist', 'SubBlockExecutionPlan']
+
+
+def is_control_source(block):
+    """Check if block produces control values or sends messages."""
+    if block.CONTROL_RATE:
+        return True
+
+    return any(isinstance(output, MessageOutput) for output in block.outputs)
+
+
+def control_blocks(blocks):
+    """Control sources and all their upstream blocks.
+
+    Args:
+        blocks (list): Flat execution order.
+
+    Returns:
+        set: Control blocks.
+    """
+    members = set(blocks)
+    controls = set()
+    stack = [block for block in blocks if is_control_source(block)]
+    while stack:
+        block = stack.pop()
+        if block not in controls:
+            controls.add(block)
+            stack.extend(upstream_blocks(block, members))
+
+    return controls
+
+
+def hoist(blocks, selection):
+    """Move selected blocks to the front of the execution order as far as
+    their dependencies allow (so that they form one contiguous group).
+
+    Args:
+        blocks (list): Flat execution order.
+        selection (set): Blocks to hoist.
+
+    Returns:
+        tuple: Hoisted blocks and remaining blocks (both in execution order).
+    """
+    members = set(blocks)
+    position = {block: idx for idx, block in enumerate(blocks)}
+    hoisted = {}  # Ordered set
+    remaining = []
+    for block in blocks:
+        if block in selection and all(
+            src in hoisted or position[src] >= position[block]
+            for src in upstream_blocks(block, members)
+        ):
+            hoisted[block] = None
+        else:
+            remaining.append(block)
+
+    return list(hoisted), remaining
+
+
+def slice_value(value, start, stop, size):
+    """Slice buffer value of a large block. Silence stays silence, non-buffer
+    values (scalars, ...) stay untouched.
+    """
+    if not isinstance(value, np.ndarray) or value.ndim == 0\
+        or value.shape[-1] != size:
+        return value
+
+    if is_silence(value):
+        return get_silence(value.shape[:-1] + (stop - start,), value.dtype)
+
+    return value[..., start:stop]
+
+
+class Step:
+
+    """Blocks which get executed in segments.
+
+    Attributes:
+        blocks (list): Blocks in execution order.
+        updates (list): Bound update methods.
+        imports (list): Message inputs of blocks.
+        exports (list): Outside message inputs receiving from blocks.
+        sources (list): Outside value sources feeding blocks.
+        outputs (list): Value outputs of blocks.
+    """
+
+    def __init__(self, blocks, updates, members):
+        self.blocks = blocks
+        self.updates = updates
+        self.imports = []
+        self.exports = []
+        self.sources = []
+        self.outputs = []
+        inside = set(blocks)
+        for block in blocks:
+            for input_ in block.inputs:
+                if isinstance(input_, MessageInput):
+                    self.imports.append(input_)
+                elif isinstance(input_, Input) and input_.connected:
+                    src = terminal_source(input_.incomingConnection)
+                    if src.owner not in inside and src not in self.sources:
+                        self.sources.append(src)
+
+            for output in block.outputs:
+                if isinstance(output, Output):
+                    self.outputs.append(output)
+                elif isinstance(output, MessageOutput):
+                    for input_ in downstream_inputs(output, members):
+                        if input_.owner not in inside\
+                            and input_ not in self.exports:
+                            self.exports.append(input_)
+
+
+class SubBlockExecutionPlan(ExecutionPlan):
+
+    """Execution plan for large buffer sizes which keeps the event timing of
+    a smaller control size. Has to be compiled and executed inside the large
+    engine context.
+
+    Attributes:
+        controlSize (int): Control size in samples.
+        steps (list): Step callables in execution order.
+        pending (dict): Message input -> stamped (offset, message) tuples.
+        history (dict): Output -> (segment starts, control values) of the
+            current block.
+        buffers (dict): Output -> reassembly buffer slot.
+    """
+
+    def __init__(self, execOrder, controlSize, profiler=None):
+        """Args:
+            execOrder (list): Global execution order.
+            controlSize (int): Control size in samples (buffer size of the
+                real-time engine).
+
+        Kwargs:
+            profiler (Profiler): Time every block update with this profiler.
+        """
+        bufferSize = get_context().bufferSize
+        if controlSize <= 0 or bufferSize % controlSize:
+            msg = 'Buffer size %d is not a multiple of control size %d!'
+            raise ValueError(msg % (bufferSize, controlSize))
+
+        self.controlSize = controlSize
+        self.controls = set()
+        self.steps = []
+        self.pending = {}
+        self.history = {}
+        self.buffers = {}
+        super().__init__(execOrder, profiler)
+
+    def flatten(self):
+        blocks = super().flatten()
+        self.controls = control_blocks(blocks)
+        hoisted, remaining = hoist(blocks, self.controls)
+        return hoisted + remaining
+
+    def prepare_blocks(self):
+        context = get_context()
+        controlContext = self.segment_context(self.controlSize)
+        for block in self.blocks:
+            target = controlContext if block in self.controls else context
+            if block.context != target:
+                block.prepare(target)
+
+    def needs_grid(self, block):
+        """Check if block has to be stepped control size wise (message input,
+        control value input or limited block size).
+        """
+        for input_ in block.inputs:
+            if isinstance(input_, MessageInput):
+                return True
+
+            if isinstance(input_, Input) and input_.connected:
+                src = terminal_source(input_.incomingConnection)
+                if src.owner in self.controls:
+                    return True
+
+        limit = block.max_block_size()
+        return limit is not None and limit < get_context().bufferSize
+
+    def compile(self):
+        super().compile()
+        members = set(self.blocks)
+        updates = dict(zip(self.blocks, self.updates))
+        self.steps = []
+        group = []
+        for block in self.blocks + [None]:
+            if block in self.controls:
+                group.append(block)
+                continue
+
+            if group:
+                step = Step(group, [updates[b] for b in group], members)
+                self.steps.append(functools.partial(self.run_segments, step))
+                group = []
+
+            if block is None:
+                break
+
+            if self.needs_grid(block):
+                step = Step([block], [updates[block]], members)
+                self.steps.append(functools.partial(self.run_segments, step))
+            else:
+                self.steps.append(updates[block])
+
+    @staticmethod
+    def segment_context(size):
+        """Engine context for segments of a given size."""
+        ctx = get_context()
+        return EngineContext(ctx.samplingRate, size, ctx.dtype)
+
+    def segment_bounds(self, step, events):
+        """Segment start offsets of a step."""
+        bufferSize = get_context().bufferSize
+        offsets = set(range(0, bufferSize, self.controlSize))
+        for stamped in events.values():
+            offsets.update(offset for offset, _ in stamped)
+
+        return sorted(offsets) + [bufferSize]
+
+    def run_segments(self, step):
+        """Run step segment wise."""
+        context = get_context()
+        bufferSize = context.bufferSize
+        t0 = ClockMixin.clock()
+        events = {
+            input_: self.pending.pop(input_)
+            for input_ in step.imports
+            if input_ in self.pending
+        }
+        bounds = self.segment_bounds(step, events)
+        values = [(src, src.value) for src in step.sources]
+        for output in step.outputs:
+            self.history.pop(output, None)
+
+        reassembled = {}
+        try:
+            for start, stop in zip(bounds, bounds[1:]):
+                for input_, stamped in events.items():
+                    while stamped and stamped[0][0] == start:
+                        input_.push(stamped.pop(0)[1])
+
+                for src, value in values:
+                    src.set_value(self.source_value(
+                        src, value, start, stop, bufferSize
+                    ))
+
+                set_context(self.segment_context(stop - start))
+                ClockMixin.set_current_time(t0 + start * context.dt)
+                for update in step.updates:
+                    update()
+
+                for input_ in step.exports:
+                    while input_.queue:
+                        msg = input_.queue.popleft()
+                        self.pending.setdefault(input_, []).append((start, msg))
+
+                if len(bounds) > 2:
+                    self.reassemble(step, start, stop, bufferSize, reassembled)
+
+        finally:
+            set_context(context)
+            ClockMixin.set_current_time(t0)
+            for src, value in values:
+                src.set_value(value)
+
+        for output, (lead, dtype, buffer) in reassembled.items():
+            if buffer is None:
+                output.set_value(get_silence(lead + (bufferSize,), dtype))
+            else:
+                output.set_value(buffer)
+
+    def source_value(self, src, value, start, stop, bufferSize):
+        """Value of an outside source for the segment [start, stop). Control
+        values of previously stepped blocks get looked up in their history.
+        """
+        if src in self.history:
+            starts, history = self.history[src]
+            return history[bisect.bisect_right(starts, start) - 1]
+
+        return slice_value(value, start, stop, bufferSize)
+
+    def reassemble(self, step, start, stop, bufferSize, reassembled):
+        """Copy segment values of array outputs into full length buffers.
+        Record the history of all other (control) values.
+        """
+        for output in step.outputs:
+            value = output.value
+            if not isinstance(value, np.ndarray) or value.ndim == 0:
+                starts, history = self.history.setdefault(output, ([], []))
+                starts.append(start)
+                history.append(value)
+                continue
+
+            if value.shape[-1] == bufferSize:
+                value = value[..., start:stop]  # Not updated / muted
+            elif value.shape[-1] != stop - start:
+                continue
+
+            lead = value.shape[:-1]
+            _, _, buffer = reassembled.get(output, (lead, value.dtype, None))
+            if is_silence(value):
+                if buffer is not None:
+                    buffer[..., start:stop] = 0.
+
+                reassembled.setdefault(output, (lead, value.dtype, None))
+                continue
+
+            if buffer is None:
+                slot = self.buffers.setdefault(output, BufferSlot())
+                buffer = slot.get(lead + (bufferSize,), value.dtype)
+                buffer[..., :start] = 0.
+
+            buffer[..., start:stop] = value
+            reassembled[output] = (lead, buffer.dtype, buffer)
+
+    def __call__(self):
+        """Execute all blocks once."""
+        if self.revision != PatchRevision.current:
+            self.compile()
+
+        for step in self.steps:
+            step()
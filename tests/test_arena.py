@@ -0,0 +1,97 @@
+import unittest
+
+import numpy as np
+
+from klang.arena import BufferSlot, allocate_buffers, output_buffer
+from klang.audio.effects import Gain
+from klang.audio.mixer import Mixer
+from klang.block import Block
+from klang.execution import ExecutionPlan
+
+
+class Ones(Block):
+    def __init__(self):
+        super().__init__(nOutputs=1)
+
+    def update(self):
+        self.output.set_value(np.ones(4))
+
+
+def gain_chain(length):
+    """Source -> Gain -> ... -> Gain."""
+    src = Ones()
+    gains = [Gain(2.) for _ in range(length)]
+    prev = src
+    for gain in gains:
+        prev.output.connect(gain.input)
+        prev = gain
+
+    return src, gains
+
+
+class TestBufferSlot(unittest.TestCase):
+    def test_arrays_get_reused(self):
+        slot = BufferSlot()
+        arr = slot.get((4,))
+
+        self.assertIs(slot.get((4,)), arr)
+        self.assertIsNot(slot.get((4, 2)), arr)
+        self.assertEqual(len(slot), 2)
+
+    def test_output_buffer(self):
+        gain = Gain()
+
+        self.assertIsNone(output_buffer(gain.output, 1., 2.))
+        self.assertEqual(output_buffer(gain.output, 1., np.zeros(4)).shape, (4,))
+        self.assertEqual(output_buffer(gain.output, np.zeros((4, 1)), np.zeros(2)).shape, (4, 2))
+
+        gain.output.slot = None
+
+        self.assertIsNone(output_buffer(gain.output, 1., np.zeros(4)))
+
+
+class TestAllocateBuffers(unittest.TestCase):
+    def test_non_overlapping_lifetimes_share_slots(self):
+        src, (a, b, c, d) = gain_chain(4)
+        nShared = allocate_buffers([src, a, b, c, d])
+
+        self.assertEqual(nShared, 2)
+        self.assertIs(a.output.slot, c.output.slot)
+        self.assertIsNot(a.output.slot, b.output.slot)
+        self.assertIsNot(d.output.slot, a.output.slot)
+        self.assertIsNot(d.output.slot, b.output.slot)
+
+    def test_outputs_with_readers_outside_of_plan_get_pinned(self):
+        src, (a, b) = gain_chain(2)
+        allocate_buffers([src, a])
+
+        self.assertIsNotNone(a.output.slot)
+        self.assertIsNot(a.output.slot, b.output.slot)
+
+    def test_feedback_outputs_get_pinned(self):
+        src, (a, b, c) = gain_chain(3)
+        mixer = Mixer(nInputs=2)
+        a.output.disconnect(b.input)
+        a.output.connect(mixer.inputs[0])
+        c.output.connect(mixer.inputs[1])
+        mixer.output.connect(b.input)
+        blocks = [src, a, mixer, b, c]
+        allocate_buffers(blocks)
+
+        self.assertNotIn(c.output.slot, [blk.output.slot for blk in blocks if blk is not c])
+
+    def test_no_allocations_in_steady_state(self):
+        src, gains = gain_chain(4)
+        plan = ExecutionPlan([src] + gains)
+        plan()
+        buffers = [gain.output.value for gain in gains]
+        plan()
+
+        for gain, buf in zip(gains, buffers):
+            self.assertIs(gain.output.value, buf)
+
+        np.testing.assert_equal(gains[-1].output.value, 16. * np.ones(4))
+
+
+if __name__ == '__main__':
+    unittest.main()
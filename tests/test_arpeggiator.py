@@ -2,6 +2,7 @@ import unittest
 import itertools
 
 from klang.arpeggiator import (
+    Arpeggiator,
     Arpeggio,
     interleave,
     VALID_ORDERS,
@@ -9,6 +10,7 @@ from klang.arpeggiator import (
 )
 from klang.note_effects import NoteLengthener
 from klang.connections import MessageInput
+from klang.context import EngineContext, active_context
 from klang.messages import Note
 
 
@@ -170,6 +172,37 @@ class TestNoteLengthener(unittest.TestCase):
         ])
         self.assertEqual(recv.receive_latest(), C._replace(velocity=0.))
 
+    def test_note_off_offset(self):
+        nl = NoteLengthener(duration=.001)
+        recv = MessageInput()
+        nl.output.connect(recv)
+        nl.set_current_time(0.)
+        nl.input.push(C.at(10))
+        nl.update()
+
+        self.assertEqual(list(recv.receive()), [
+            C.at(10),
+            C.silence().at(10 + 44),
+        ])
+
+
+
+class TestArpeggiator(unittest.TestCase):
+    def test_steps_at_sample_offsets(self):
+        with active_context(EngineContext(samplingRate=1000, bufferSize=100)):
+            arp = Arpeggiator(.2345, initialNotes=[C, E])
+            recv = MessageInput()
+            arp | recv
+            received = []
+            for _ in range(3):
+                arp.update()
+                received.append(list(recv.receive()))
+
+        self.assertEqual(received, [
+            [C.at(0)],
+            [],
+            [C.silence().at(35), E.at(35)],
+        ])
 
 if __name__ == '__main__':
     unittest.main()
@@ -2,7 +2,9 @@ import unittest
 
 import numpy as np
 
-from klang.audio.helpers import get_silence, get_time
+from klang.audio.helpers import get_silence, get_time, is_silence
+from klang.audio.klanggeber import Adc, ChannelMismatch, Dac, input_samples
+from klang.context import EngineContext, active_context
 
 
 class TestCachedSignals(unittest.TestCase):
@@ -22,6 +24,12 @@ class TestCachedSignals(unittest.TestCase):
 
         np.testing.assert_equal(stereo, np.zeros((2, 10)))
 
+    def test_silence_identity(self):
+        self.assertIs(get_silence(10), get_silence((10,)))
+        self.assertTrue(is_silence(get_silence((2, 10))))
+        self.assertFalse(is_silence(np.zeros(10)))
+        self.assertFalse(is_silence(0.))
+
     def test_time(self):
         """Test time array."""
         t = get_time(10, .1)
@@ -29,5 +37,69 @@ class TestCachedSignals(unittest.TestCase):
         np.testing.assert_equal(t, .1 * np.arange(10))
 
 
+class TestAdc(unittest.TestCase):
+    def test_column_views(self):
+        adc = Adc(nChannels=1)
+        raw = np.arange(8, dtype=np.float32).tobytes()
+        samples = input_samples(raw, 4, 2)
+        adc.inject_samples(samples)
+        value = adc.output.value
+
+        np.testing.assert_equal(value, [0., 2., 4., 6.])
+        self.assertTrue(np.shares_memory(value, samples))
+
+    def test_no_input(self):
+        self.assertIsNone(input_samples(None, 4, 1))
+
+
+class TestDac(unittest.TestCase):
+    def setUp(self):
+        self.context = active_context(EngineContext(44100, 4))
+        self.context.__enter__()
+
+    def tearDown(self):
+        self.context.__exit__(None, None, None)
+
+    def test_interleaving(self):
+        dac = Dac(nChannels=3)
+        dac.inputs[0].set_value(np.arange(4.))
+        dac.inputs[1].set_value(np.array([np.ones(4), 2 * np.ones(4)]))
+        samples = dac.collect_samples()
+
+        self.assertEqual(samples.dtype, np.float32)
+        np.testing.assert_equal(samples[:, 0], np.arange(4.))
+        np.testing.assert_equal(samples[:, 1], 1.)
+        np.testing.assert_equal(samples[:, 2], 2.)
+
+    def test_persistent_buffer(self):
+        dac = Dac(nChannels=2)
+        dac.inputs[0].set_value(np.ones((2, 4)))
+        first = dac.collect_samples()
+        dac.inputs[0].set_value(get_silence((2, 4)))
+        second = dac.collect_samples()
+
+        self.assertIs(first, second)
+        np.testing.assert_equal(second, 0.)
+
+    def test_shape_change_updates_layout(self):
+        dac = Dac(nChannels=2)
+        dac.inputs[0].set_value(np.ones(4))
+        dac.inputs[1].set_value(2 * np.ones(4))
+        dac.collect_samples()
+        dac.inputs[0].set_value(np.array([3 * np.ones(4), 4 * np.ones(4)]))
+        samples = dac.collect_samples()
+
+        np.testing.assert_equal(samples[:, 0], 3.)
+        np.testing.assert_equal(samples[:, 1], 4.)
+
+    def test_channel_mismatch(self):
+        dac = Dac(nChannels=2)
+        dac.inputs[0].set_value(0.)
+        dac.inputs[1].set_value(np.ones(4))
+
+        with self.assertRaises(ChannelMismatch):
+            dac.collect_samples()
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,175 @@
+import os
+import tempfile
+import time
+import unittest
+import unittest.mock
+
+import numpy as np
+import pyaudio
+
+from klang.audio.backends import (
+    NullBackend, PyAudioBackend, WaveInput, find_device,
+    validate_sound_card_channels,
+)
+from klang.audio.wavfile import WaveWriter
+
+
+class Channels:
+    def __init__(self, nChannels):
+        self.nChannels = nChannels
+
+
+class FakeStream:
+    def __init__(self, channels, stream_callback=None, **kwargs):
+        self.channels = channels
+        self.callback = stream_callback
+        self.kwargs = kwargs
+
+    def read(self, nFrames, exception_on_overflow=True):
+        return np.arange(nFrames * self.channels, dtype=np.float32).tobytes()
+
+
+class FakePyAudio:
+    DEVICES = [
+        {'index': 0, 'name': 'Built-in Output', 'maxInputChannels': 0, 'maxOutputChannels': 2},
+        {'index': 1, 'name': 'USB Microphone', 'maxInputChannels': 1, 'maxOutputChannels': 0},
+    ]
+
+    def get_device_count(self):
+        return len(self.DEVICES)
+
+    def get_device_info_by_index(self, index):
+        return self.DEVICES[index]
+
+    def get_default_input_device_info(self):
+        return self.DEVICES[1]
+
+    def get_default_output_device_info(self):
+        return self.DEVICES[0]
+
+    def open(self, **kwargs):
+        return FakeStream(**kwargs)
+
+
+class TestPyAudioHelpers(unittest.TestCase):
+    def test_find_device(self):
+        pa = FakePyAudio()
+
+        self.assertEqual(find_device(pa, None, 'output')['index'], 0)
+        self.assertEqual(find_device(pa, 1, 'input')['index'], 1)
+        self.assertEqual(find_device(pa, 'USB', 'input')['index'], 1)
+        with self.assertRaises(ValueError):
+            find_device(pa, 'USB', 'output')
+
+    def test_independent_channel_validation(self):
+        pa = FakePyAudio()
+        validate_sound_card_channels(pa, Channels(1), Channels(2))
+        with self.assertRaises(ValueError):
+            validate_sound_card_channels(pa, Channels(2), Channels(2))
+
+        with self.assertRaises(ValueError):
+            validate_sound_card_channels(pa, Channels(1), Channels(3))
+
+    def test_mono_input_stereo_output_streams(self):
+        def callback(in_data, frame_count, time_info, status):
+            callback.received = np.frombuffer(in_data, dtype=np.float32)
+            return np.ones((frame_count, 2), np.float32), pyaudio.paContinue
+
+        with unittest.mock.patch('pyaudio.PyAudio', FakePyAudio):
+            backend = PyAudioBackend()
+
+        stream = backend.open(44100, 4, nInputs=1, nOutputs=2, callback=callback)
+
+        self.assertEqual(stream.inputStream.channels, 1)
+        self.assertEqual(stream.outputStream.channels, 2)
+        self.assertEqual(stream.inputStream.kwargs['input_device_index'], 1)
+        self.assertEqual(stream.outputStream.kwargs['output_device_index'], 0)
+
+        outData, flag = stream.outputStream.callback(None, 4, None, 0)
+
+        np.testing.assert_equal(callback.received, [0., 1., 2., 3.])
+        self.assertEqual(outData.shape, (4, 2))
+        self.assertEqual(flag, pyaudio.paContinue)
+
+
+class TestWaveInput(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tmpdir.name, 'input.wav')
+        with WaveWriter(self.filepath, samplingRate=44100) as writer:
+            writer.write(np.full((6, 1), .5))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_reads_buffers_and_pads_with_silence(self):
+        device = WaveInput(self.filepath)
+        first = np.frombuffer(device.read(4, 1), np.float32)
+        second = np.frombuffer(device.read(4, 1), np.float32)
+
+        np.testing.assert_allclose(first, .5, atol=1e-4)
+        np.testing.assert_allclose(second[:2], .5, atol=1e-4)
+        np.testing.assert_equal(second[2:], 0.)
+
+    def test_looping(self):
+        device = WaveInput(self.filepath, loop=True)
+        device.read(4, 1)
+        second = np.frombuffer(device.read(4, 1), np.float32)
+
+        np.testing.assert_allclose(second, .5, atol=1e-4)
+
+    def test_channel_validation(self):
+        backend = NullBackend(inputDevice=WaveInput(self.filepath))
+        backend.validate_channels(Channels(1), Channels(2))
+        with self.assertRaises(ValueError):
+            backend.validate_channels(Channels(2), Channels(2))
+
+
+class TestNullBackend(unittest.TestCase):
+    def run_stream(self, callback, backend, timeout=2.):
+        stream = backend.open(
+            rate=44100, framesPerBuffer=64, nInputs=0, nOutputs=1,
+            callback=callback,
+        )
+        stream.start_stream()
+        deadline = time.perf_counter() + timeout
+        while stream.is_active() and time.perf_counter() < deadline:
+            time.sleep(.01)
+
+        stream.stop_stream()
+        stream.close()
+        return stream
+
+    def test_wall_clock_paced_callbacks(self):
+        nCalls = 5
+
+        def callback(in_data, frame_count, time_info, status):
+            flag = pyaudio.paComplete if callback.count == nCalls - 1 else pyaudio.paContinue
+            callback.count += 1
+            return np.zeros((frame_count, 1), np.float32), flag
+
+        callback.count = 0
+        t0 = time.perf_counter()
+        stream = self.run_stream(callback, NullBackend())
+
+        self.assertEqual(stream.nCallbacks, nCalls)
+        self.assertGreaterEqual(time.perf_counter() - t0, (nCalls - 1) * 64 / 44100)
+
+    def test_late_callbacks_get_flagged(self):
+        statuses = []
+
+        def callback(in_data, frame_count, time_info, status):
+            statuses.append(status)
+            time.sleep(2 * frame_count / 44100)
+            flag = pyaudio.paComplete if len(statuses) == 3 else pyaudio.paContinue
+            return np.zeros((frame_count, 1), np.float32), flag
+
+        stream = self.run_stream(callback, NullBackend(jitter=.001, seed=0))
+
+        self.assertEqual(statuses[0], 0)
+        self.assertEqual(statuses[1:], [pyaudio.paOutputUnderflow] * 2)
+        self.assertEqual(stream.nUnderflows, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,6 +6,8 @@ from scipy.signal import lfilter
 
 from klang.audio.envelope import (
     Envelope,
+    EnvelopeBank,
+    Stage,
     calculate_coefficient,
     calculate_transfer_function,
     constant_samples,
@@ -195,6 +197,16 @@ class TestEnvelope(unittest.TestCase):
 
         self.assertAlmostEqual(samples[0], 1., 2)
 
+    def test_stage_transition_inside_buffer(self):
+        env = Envelope(attack=16. / SAMPLING_RATE, decay=1., sustain=.5, release=1.)
+        env.gate(True)
+
+        samples = env.sample(64)
+
+        self.assertEqual(len(samples), 64)
+        self.assertLess(samples[0], .5)
+        self.assertIn(samples.argmax(), range(12, 20))
+
     def test_retrigger(self):
         # TODO: How to test?
         pass
@@ -204,5 +216,79 @@ class TestEnvelope(unittest.TestCase):
         pass
 
 
+class TestEnvelopeBank(unittest.TestCase):
+    def test_matches_envelope(self):
+        params = dict(attack=.01, decay=.02, sustain=.5, release=.03)
+        env = Envelope(**params)
+        bank = EnvelopeBank(2, **params)
+        env.gate(True)
+        bank.gate(0, True)
+
+        def compare(nBuffers):
+            for _ in range(nBuffers):
+                samples = bank.sample(BUFFER_SIZE)
+                np.testing.assert_allclose(samples[0], env.sample(BUFFER_SIZE), atol=1e-9)
+                np.testing.assert_equal(samples[1], 0.)
+
+        compare(10)
+        self.assertEqual(bank.stage[0], Stage.SUSTAINING.value)
+        self.assertEqual(bank.level[0], .5)
+
+        env.gate(False)
+        bank.gate(0, False)
+        compare(20)
+        np.testing.assert_equal(bank.active, [False, False])
+
+    def test_matches_envelope_across_buffer_sizes(self):
+        params = dict(attack=.005, decay=.01, sustain=.3, release=.02)
+        env = Envelope(**params)
+        bank = EnvelopeBank(1, **params)
+        sizes = [100, 37, 256, 1, 64]
+
+        def compare(nBuffers):
+            for i in range(nBuffers):
+                size = sizes[i % len(sizes)]
+                np.testing.assert_allclose(bank.sample(size)[0], env.sample(size), atol=1e-9)
+
+        env.gate(True)
+        bank.gate(0, True)
+        compare(4)
+
+        # Release during decay
+        env.gate(False)
+        bank.gate(0, False)
+        compare(3)
+
+        # Attack from releasing
+        env.gate(True)
+        bank.gate(0, True)
+        compare(12)
+
+        env.gate(False)
+        bank.gate(0, False)
+        compare(30)
+        self.assertEqual(bank.active[0], env.active)
+
+    def test_zero_durations(self):
+        bank = EnvelopeBank(1, attack=0., decay=0., sustain=.7, release=0.)
+        bank.gate(0, True)
+
+        np.testing.assert_equal(bank.sample(16), .7)
+
+        bank.gate(0, False)
+
+        np.testing.assert_equal(bank.sample(16), 0.)
+        self.assertFalse(bank.active[0])
+
+    def test_retrigger(self):
+        bank = EnvelopeBank(1, .1, .1, .5, .1)
+        bank.gate(0, True)
+        bank.sample(BUFFER_SIZE)
+        bank.gate(0, True)
+
+        self.assertGreater(bank.level[0], 0.)
+        self.assertEqual(bank.stage[0], Stage.ATTACKING.value)
+
+
 if __name__ == '__main__':
     unittest.main()
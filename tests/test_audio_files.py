@@ -1,8 +1,13 @@
+import os
+import tempfile
 import unittest
 
 import numpy as np
+import scipy.io.wavfile
 
-from klang.audio.wavfile import convert_samples_to_float, convert_samples_to_int
+from klang.audio.wavfile import (
+    WaveWriter, convert_samples_to_float, convert_samples_to_int, write_wave,
+)
 
 
 class TestSampleConversion(unittest.TestCase):
@@ -19,5 +24,43 @@ class TestSampleConversion(unittest.TestCase):
         )
 
 
+class TestWaveWriter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.directory.name, 'out.wav')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_streamed_frames_match_write_wave(self):
+        audio = .3 * np.random.uniform(-1., 1., size=(1000, 2)).astype(np.float32)
+        reference = os.path.join(self.directory.name, 'ref.wav')
+        write_wave(audio, reference)
+        writer = WaveWriter(self.filepath, nChannels=2, normalize=True)
+        writer.CHUNK_SIZE = 64
+        with writer:
+            for start in range(0, len(audio), 256):
+                writer.write(audio[start:start + 256])
+
+        with open(reference, 'rb') as a, open(self.filepath, 'rb') as b:
+            self.assertEqual(a.read(), b.read())
+
+    def test_without_normalization(self):
+        with WaveWriter(self.filepath, samplingRate=8000) as writer:
+            writer.write(np.array([0., .5, -2.]))
+            writer.write(np.array([1.]))
+
+        self.assertTrue(writer.closed)
+        self.assertEqual(writer.peak, 2.)
+        rate, data = scipy.io.wavfile.read(self.filepath)
+        self.assertEqual(rate, 8000)
+        np.testing.assert_equal(data, [0, 16383, -32767, 32767])
+
+    def test_channel_mismatch(self):
+        with WaveWriter(self.filepath, nChannels=2) as writer:
+            with self.assertRaises(ValueError):
+                writer.write(np.zeros(10))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -3,7 +3,10 @@ import unittest
 import numpy as np
 
 from klang.audio.helpers import DT, INTERVAL
-from klang.audio.oscillators import chirp_phase, sample_phase, Oscillator, Phasor
+from klang.audio.oscillators import (
+    chirp_phase, sample_phase, sample_phases, Oscillator, OscillatorBank, Phasor,
+)
+from klang.audio.waves import sawtooth, square, triangle
 from klang.config import BUFFER_SIZE, SAMPLING_RATE
 from klang.constants import TAU
 
@@ -155,5 +158,51 @@ class TestOscillator(unittest.TestCase):
         np.testing.assert_almost_equal(osc.output.value, should)
 
 
+class TestOscillatorBank(unittest.TestCase):
+    def test_sample_phases_matches_sample_phase(self):
+        freqs = np.array([110., 440., 1234.5])
+        starts = np.array([0., 1., 2.])
+        phases, nextPhases = sample_phases(freqs, starts)
+        for freq, start, phase, nextPhase in zip(freqs, starts, phases, nextPhases):
+            should, shouldNext = sample_phase(freq, start)
+
+            np.testing.assert_almost_equal(phase, should)
+            self.assertAlmostEqual(nextPhase, shouldNext)
+
+    def test_varying_frequencies(self):
+        freqs = np.array([
+            np.linspace(440., 880., BUFFER_SIZE),
+            np.linspace(220., 110., BUFFER_SIZE),
+        ])
+        phases, _ = sample_phases(freqs, np.zeros(2))
+        for freq, phase in zip(freqs, phases):
+            np.testing.assert_almost_equal(phase, sample_phase(freq)[0])
+
+    def test_bank_matches_oscillators(self):
+        freqs = [220., 330., 440.]
+        for wave_func in [np.sin, square, sawtooth, triangle]:
+            bank = OscillatorBank(len(freqs), wave_func=wave_func)
+            bank.frequency.set_value(np.array(freqs))
+            oscillators = [Oscillator(f, wave_func=wave_func) for f in freqs]
+            for _ in range(3):
+                bank.update()
+                for osc, samples in zip(oscillators, bank.output.value):
+                    osc.update()
+
+                    np.testing.assert_almost_equal(samples, osc.output.value)
+
+    def test_enable_mask(self):
+        bank = OscillatorBank(3, frequency=440.)
+        bank.enabled[1] = False
+        bank.update()
+        samples = bank.output.value
+
+        self.assertEqual(samples.shape, (3, BUFFER_SIZE))
+        np.testing.assert_equal(samples[1], 0.)
+        self.assertEqual(bank.phases[1], 0.)
+        self.assertNotEqual(bank.phases[0], 0.)
+        np.testing.assert_almost_equal(samples[0], samples[2])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+
+import numpy as np
+
+from klang.audio.render_ahead import FrameRing, RenderAhead
+
+
+class TestFrameRing(unittest.TestCase):
+    def test_push_and_pop(self):
+        ring = FrameRing(2, (4, 1))
+        out = np.empty((4, 1), np.float32)
+
+        self.assertTrue(ring.empty)
+        self.assertFalse(ring.pop(out))
+        self.assertTrue(ring.push(np.full((4, 1), 1.)))
+        self.assertTrue(ring.push(np.full((4, 1), 2.)))
+        self.assertTrue(ring.full)
+        self.assertFalse(ring.push(np.full((4, 1), 3.)))
+        self.assertEqual(len(ring), 2)
+
+        self.assertTrue(ring.pop(out))
+        np.testing.assert_equal(out, 1.)
+        self.assertTrue(ring.push(np.full((4, 1), 3.)))
+        self.assertTrue(ring.pop(out))
+        np.testing.assert_equal(out, 2.)
+        self.assertTrue(ring.pop(out))
+        np.testing.assert_equal(out, 3.)
+        self.assertTrue(ring.empty)
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            FrameRing(0, (4, 1))
+
+
+class TestRenderAhead(unittest.TestCase):
+    def test_renders_ahead_and_drains(self):
+        count = 0
+
+        def process(samples=None):
+            nonlocal count
+            count += 1
+            return np.full((4, 2), count, np.float32), count == 5
+
+        renderer = RenderAhead(process, nBuffers=3, outputShape=(4, 2))
+        renderer.start(timeout=1.)
+
+        self.assertGreaterEqual(len(renderer.outputRing), 3)
+
+        out = np.empty((4, 2), np.float32)
+        values = []
+        while not renderer.drained:
+            if renderer.pop_output(out):
+                values.append(out[0, 0])
+
+        renderer.stop()
+
+        self.assertEqual(values, [1., 2., 3., 4., 5.])
+        self.assertIsNone(renderer.error)
+
+    def test_input_gets_forwarded(self):
+        received = []
+
+        def process(samples=None):
+            received.append(samples.copy())
+            return np.zeros((4, 1), np.float32), len(received) == 2
+
+        renderer = RenderAhead(
+            process, nBuffers=2, outputShape=(4, 1), inputShape=(4, 1),
+        )
+        renderer.push_input(np.full((4, 1), 7.))
+        renderer.start(timeout=1.)
+        renderer.stop()
+
+        np.testing.assert_equal(received[0], 7.)
+        np.testing.assert_equal(received[1], 0.)  # Silence when starving
+
+    def test_error_gets_stored(self):
+        def process(samples=None):
+            raise RuntimeError('Oops')
+
+        renderer = RenderAhead(process, nBuffers=2, outputShape=(4, 1))
+        renderer.start(timeout=1.)
+        renderer.stop()
+
+        self.assertTrue(renderer.finished)
+        self.assertIsInstance(renderer.error, RuntimeError)
+
+    def test_underruns_get_counted(self):
+        renderer = RenderAhead(None, nBuffers=2, outputShape=(4, 1))
+        out = np.empty((4, 1), np.float32)
+
+        self.assertFalse(renderer.pop_output(out))
+        self.assertEqual(renderer.nUnderruns, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
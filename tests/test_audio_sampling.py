@@ -114,6 +114,12 @@ class TestSample(unittest.TestCase):
                 chunk = provider.callback()
                 assert chunk.shape[0] == BUFFER_SIZE
 
+    def test_loop_wrap_around_order(self):
+        provider = Sample(SAMPLING_RATE, np.arange(10), start=2, stop=8, loop=True)
+
+        np.testing.assert_equal(provider.callback(nFrames=4), [2, 3, 4, 5])
+        np.testing.assert_equal(provider.callback(nFrames=4), [6, 7, 2, 3])
+
     def test_wrong_clipping_arguments(self):
         toLong = len(MONO_SILENCE) + 1
         with self.assertRaises(AssertionError):
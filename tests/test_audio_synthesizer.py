@@ -1,6 +1,17 @@
 import unittest
 
-from klang.audio.synthesizer import NoteScheduler
+import numpy as np
+
+from klang.audio.envelopes import AR
+from klang.audio.oscillators import Oscillator
+from klang.audio.synthesizer import (
+    Kick,
+    MonophonicSynthesizer, NoteScheduler, PolyphonicSynthesizer,
+    VectorizedPolyphonicSynthesizer,
+)
+from klang.audio.voices import Voice
+from klang.config import BUFFER_SIZE
+from klang.context import EngineContext, active_context
 from klang.messages import Note
 from klang.music.tunings import EQUAL_TEMPERAMENT
 
@@ -65,5 +76,149 @@ class TestNoteScheduler(unittest.TestCase):
         self.assertEqual(scheduler.get_next_note(C_OFF), C_OFF)
 
 
+class TestKick(unittest.TestCase):
+    def render(self, bufferSize, nSamples=1024):
+        with active_context(EngineContext(bufferSize=bufferSize)):
+            kick = Kick()
+            buffers = []
+            for _ in range(nSamples // bufferSize):
+                kick.update()
+                buffers.append(kick.output.value.copy())
+
+        return np.concatenate(buffers)
+
+    def test_independent_of_buffer_size(self):
+        np.testing.assert_allclose(self.render(64), self.render(1024), atol=1e-6)
+
+
+class TestMonophonicSynthesizer(unittest.TestCase):
+    def test_held_note_takes_over_at_note_off_offset(self):
+        synth = MonophonicSynthesizer(Voice(Oscillator(), AR()))
+        synth.process_note(C_ON.at(200))
+        synth.process_note(E_ON.at(10))
+        synth.process_note(E_OFF.at(50))
+
+        self.assertEqual(list(synth.voice.input.receive()), [
+            C_ON.at(200), E_ON.at(10), C_ON.at(50),
+        ])
+
+
+class TestPolyphonicSynthesizer(unittest.TestCase):
+    def make_synthesizer(self, maxVoices=PolyphonicSynthesizer.MAX_VOICES):
+        voice = Voice(Oscillator(), AR(attack=0., release=0.))
+        return PolyphonicSynthesizer(voice, maxVoices=maxVoices)
+
+    def test_lazy_voices(self):
+        synth = self.make_synthesizer()
+
+        self.assertEqual(synth.voices, [])
+
+        synth.play_note(C_ON, E_ON)
+
+        self.assertEqual(len(synth.voices), 2)
+        self.assertEqual(len(synth.activeVoices), 2)
+
+    def test_voice_limit(self):
+        synth = self.make_synthesizer(maxVoices=2)
+        synth.play_note(C_ON, E_ON, G_ON)
+
+        self.assertEqual(len(synth.voices), 2)
+
+    def test_free_pool(self):
+        synth = self.make_synthesizer()
+        synth.play_note(C_ON)
+        synth.update()
+        synth.play_note(C_OFF)
+        synth.update()
+
+        self.assertEqual(synth.activeVoices, [])
+        self.assertEqual(len(synth.freeVoices), 1)
+
+        synth.play_note(E_ON)
+
+        self.assertEqual(len(synth.voices), 1)
+        self.assertEqual(synth.freeVoices, [])
+
+    def test_same_pitch_retriggers_voice(self):
+        synth = self.make_synthesizer()
+        synth.play_note(C_ON, C_ON)
+
+        self.assertEqual(len(synth.activeVoices), 1)
+
+    def test_note_off_lookup(self):
+        synth = self.make_synthesizer()
+        synth.play_note(C_ON, E_ON)
+        synth.play_note(C_OFF)
+
+        self.assertEqual(list(synth.pitchVoices), [64])
+
+    def test_stealing_policies(self):
+        for policy, stolen in [('oldest', 64), ('newest', 67), ('lowest', 60), ('highest', 67)]:
+            synth = self.make_synthesizer(maxVoices=3)
+            synth.policy = policy
+            synth.play_note(E_ON, C_ON, G_ON)
+            synth.play_note(make_notes(72)[0])
+
+            self.assertNotIn(stolen, synth.pitchVoices, policy)
+            self.assertEqual(len(synth.voices), 3)
+
+    def test_released_voices_get_stolen_first(self):
+        synth = self.make_synthesizer(maxVoices=2)
+        synth.policy = 'newest'
+        synth.play_note(C_ON, E_ON, C_OFF, G_ON)
+
+        self.assertEqual(sorted(synth.pitchVoices), [64, 67])
+
+    def test_invalid_policy(self):
+        voice = Voice(Oscillator(), AR())
+        with self.assertRaises(ValueError):
+            PolyphonicSynthesizer(voice, policy='loudest')
+
+    def test_active_normalization(self):
+        voice = Voice(Oscillator(), AR(attack=0., release=1.))
+        fixed = PolyphonicSynthesizer(voice, maxVoices=4)
+        active = PolyphonicSynthesizer(voice, maxVoices=4, normalization='active')
+        for synth in [fixed, active]:
+            synth.play_note(C_ON)
+            synth.update()
+
+        np.testing.assert_allclose(active.output.value, 4 * fixed.output.value)
+
+
+class TestVectorizedPolyphonicSynthesizer(unittest.TestCase):
+    def test_silent_without_notes(self):
+        synth = VectorizedPolyphonicSynthesizer(nVoices=4)
+        synth.update()
+
+        np.testing.assert_equal(synth.output.value, 0.)
+
+    def test_voice_allocation(self):
+        synth = VectorizedPolyphonicSynthesizer(nVoices=2, release=0.)
+        synth.play_note(C_ON, E_ON)
+
+        np.testing.assert_equal(synth.pitches, [60, 64])
+
+        synth.play_note(G_ON)  # Steal oldest voice
+
+        np.testing.assert_equal(synth.pitches, [67, 64])
+
+        synth.play_note(E_OFF)
+        synth.update()
+
+        self.assertEqual(synth.pitches[1], -1)
+        np.testing.assert_equal(synth.envelopes.active, [True, False])
+
+    def test_output(self):
+        synth = VectorizedPolyphonicSynthesizer(nVoices=4, attack=0., decay=0., sustain=1.)
+        synth.play_note(C_ON)
+        synth.update()
+        samples = synth.output.value
+        t = np.arange(BUFFER_SIZE) / 44100
+        should = np.sin(2 * np.pi * C_ON.frequency * t) / 4
+
+        self.assertEqual(samples.shape, (BUFFER_SIZE,))
+        np.testing.assert_allclose(samples, should, atol=1e-6)
+
+
 if __name__ == '__main__':
     unittest.main()
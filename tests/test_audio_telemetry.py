@@ -0,0 +1,82 @@
+import unittest
+
+from klang.audio.helpers import INTERVAL
+from klang.audio.telemetry import Telemetry
+from klang.block import Block
+from klang.connections import MessageInput
+
+
+class TestTelemetry(unittest.TestCase):
+    def test_deadline_misses(self):
+        telemetry = Telemetry()
+        telemetry.record(.5 * INTERVAL)
+        telemetry.record(1.2 * INTERVAL)
+        snapshot = telemetry.snapshot()
+
+        self.assertEqual(snapshot.nCallbacks, 2)
+        self.assertEqual(snapshot.nDeadlineMisses, 1)
+        self.assertEqual(snapshot.missRate, .5)
+        self.assertEqual(snapshot.worst, 1.2 * INTERVAL)
+        self.assertIsNotNone(snapshot.lastMissRevision)
+
+    def test_status_flags_get_counted(self):
+        telemetry = Telemetry()
+        telemetry.record(0., status=4)
+        telemetry.record(0., status=4 | 2)
+        flags = telemetry.snapshot().flags
+
+        self.assertEqual(flags['outputUnderflow'], 2)
+        self.assertEqual(flags['inputOverflow'], 1)
+        self.assertEqual(flags['inputUnderflow'], 0)
+
+    def test_rolling_histogram(self):
+        telemetry = Telemetry(window=2)
+        telemetry.record(.05 * INTERVAL)
+        telemetry.record(.95 * INTERVAL)
+        telemetry.record(3. * INTERVAL)
+        snapshot = telemetry.snapshot()
+
+        self.assertEqual(sum(snapshot.histogram), 2)
+        self.assertEqual(snapshot.histogram[0], 0)
+        self.assertEqual(snapshot.histogram[9], 1)
+        self.assertEqual(snapshot.histogram[-1], 1)
+
+    def test_snapshot_is_a_copy(self):
+        telemetry = Telemetry()
+        snapshot = telemetry.snapshot()
+        telemetry.record(0., status=1)
+
+        self.assertEqual(snapshot.flags['inputUnderflow'], 0)
+        self.assertEqual(sum(snapshot.histogram), 0)
+
+    def test_monitored_callback(self):
+        def callback(in_data, frame_count, time_info, status):
+            return 'out', 0
+
+        telemetry = Telemetry()
+        monitored = telemetry.monitor(callback)
+
+        self.assertEqual(monitored(None, 256, None, 8), ('out', 0))
+        self.assertEqual(telemetry.snapshot().flags['outputOverflow'], 1)
+
+    def test_queue_counters(self):
+        block = Block(nInputs=1)
+        block.inputs.append(MessageInput(block, capacity=2))
+        telemetry = Telemetry()
+        telemetry.watch([block])
+        for msg in range(3):
+            block.inputs[1].push(msg)
+
+        queues = telemetry.snapshot().queues
+
+        self.assertEqual(len(queues), 1)
+        stats, = queues.values()
+        self.assertEqual(stats.capacity, 2)
+        self.assertEqual(stats.nReceived, 3)
+        self.assertEqual(stats.nDropped, 1)
+        self.assertEqual(stats.highWater, 2)
+        self.assertEqual(telemetry.snapshot().nDroppedMessages, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -66,6 +66,33 @@ class TestVoice(unittest.TestCase):
 
         self.assertTrue(np.all(voice.output.value != 0.))
 
+    def test_note_offset(self):
+        voice = create_voice()
+        noteOn = Note(60, velocity=.5).at(10)
+        voice.input.push(noteOn)
+        voice.update()
+        env = voice.envelope.output.value
+
+        np.testing.assert_equal(env[:10], 0.)
+        np.testing.assert_allclose(env[10:], 1., atol=.01)
+        np.testing.assert_equal(voice.output.value[:10], 0.)
+        self.assertEqual(voice.amplitude, .5)
+
+    def test_frequency_switches_at_offset(self):
+        voice = create_voice()
+        voice.input.push(Note(60))
+        voice.update()
+        voice.input.push(Note(72).at(10))
+        voice.update()
+        frequency = voice.oscillator.frequency.value
+
+        np.testing.assert_equal(frequency[:10], Note(60).frequency)
+        np.testing.assert_equal(frequency[10:], Note(72).frequency)
+
+        voice.update()
+
+        self.assertEqual(voice.oscillator.frequency.value, Note(72).frequency)
+
     def test_external_block_in_exec_order(self):
         """Check that externally connected LFO block gets executed."""
         osc = PwmOscillator()
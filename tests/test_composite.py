@@ -40,6 +40,46 @@ class TestComposite(unittest.TestCase):
         comp = Composite()
         comp.inputs = [Relay(owner=comp)]
         comp.outputs = [Relay(owner=comp)]
+        a = Block(nInputs=2, nOutputs=1)
+        b = Block(nInputs=1, nOutputs=1)
+        comp.patch(comp.input, a)
+        comp.patch(b, comp.output)
+
+        self.assertEqual(comp.execOrder, [a, b])
+
+        comp.patch(b, a.inputs[1])
+
+        self.assertIs(a.inputs[1].incomingConnection, b.output)
+        self.assertEqual(comp.execOrder, [b, a])
+
+    def test_patching_pulls_in_upstream_blocks(self):
+        comp = Composite()
+        comp.outputs = [Relay(owner=comp)]
+        lfo = Block(nInputs=0, nOutputs=1)
+        a = Block(nInputs=1, nOutputs=1)
+        b = Block(nInputs=2, nOutputs=1)
+        lfo | b.inputs[1]
+        comp.patch(a, comp.output)
+        comp.patch(a, b)
+
+        self.assertEqual(comp.execOrder, [a, lfo, b])
+
+    def test_unpatching_drops_cut_off_blocks(self):
+        comp = Composite()
+        comp.outputs = [Relay(owner=comp)]
+        a = Block(nInputs=1, nOutputs=2)
+        b = Block(nInputs=1, nOutputs=1)
+        c = Block(nInputs=1, nOutputs=1)
+        comp.patch(a, comp.output)
+        comp.patch(a.outputs[1], b)
+        comp.patch(b, c)
+
+        self.assertEqual(comp.execOrder, [a, b, c])
+
+        comp.unpatch(a.outputs[1], b)
+
+        self.assertFalse(a.outputs[1].connected)
+        self.assertEqual(comp.execOrder, [a])
 
 
 if __name__ == '__main__':
@@ -21,6 +21,7 @@ from klang.connections import (
     is_connected,
     is_valid_connection,
 )
+from klang.messages import Note
 
 
 class TestConnections(unittest.TestCase):
@@ -187,6 +188,55 @@ class TestMessageConnections(unittest.TestCase):
         self.assertEqual(input_.receive_latest(), 9)
         self.assertEqual(len(input_.queue), 0)
 
+    def test_drop_oldest(self):
+        input_ = MessageInput(capacity=3)
+        for msg in range(5):
+            input_.push(msg)
+
+        self.assertEqual(list(input_.receive()), [2, 3, 4])
+        self.assertEqual(input_.nReceived, 5)
+        self.assertEqual(input_.nDropped, 2)
+        self.assertEqual(input_.highWater, 3)
+
+    def test_drop_newest(self):
+        input_ = MessageInput(capacity=3, overflow='dropNewest')
+        for msg in range(5):
+            input_.push(msg)
+
+        self.assertEqual(list(input_.receive()), [0, 1, 2])
+        self.assertEqual(input_.nDropped, 2)
+
+    def test_coalesce_keeps_note_offs(self):
+        c, e = Note(60), Note(64)
+        input_ = MessageInput(capacity=2, overflow='coalesce')
+        for msg in [c.silence(), c, e, c.silence(), c.silence()]:
+            input_.push(msg)
+
+        self.assertEqual(list(input_.receive()), [c.silence(), e])
+        self.assertEqual(input_.nDropped, 3)
+
+    def test_coalesce_never_evicts_note_offs(self):
+        noteOffs = [Note(pitch).silence() for pitch in [60, 61, 62]]
+        input_ = MessageInput(capacity=3, overflow='coalesce')
+        for msg in noteOffs + [Note(70)]:
+            input_.push(msg)
+
+        self.assertEqual(list(input_.receive()), noteOffs)
+        self.assertEqual(input_.nDropped, 1)
+
+        for msg in noteOffs + [Note(63).silence()]:
+            input_.push(msg)
+
+        self.assertEqual(len(input_.queue), 4)
+        self.assertEqual(input_.nDropped, 1)
+
+    def test_invalid_queue_settings(self):
+        with self.assertRaises(ValueError):
+            MessageInput(capacity=0)
+
+        with self.assertRaises(ValueError):
+            MessageInput(overflow='dropAll')
+
 
 class TestRelay(TestConnections):
     def test_is_valid_connection_function(self):
@@ -295,6 +345,39 @@ class TestRelay(TestConnections):
 
         self.assertTrue(666 == src.value == relay.value == dst.value)
 
+    def test_relay_chain_gets_resolved(self):
+        src = Output(value=42)
+        first = Relay()
+        second = Relay()
+        dst = Input()
+        first.connect(second)
+        second.connect(dst)
+
+        self.assertIs(dst.source, first)
+
+        src.connect(first)
+
+        self.assertIs(dst.source, src)
+        self.assertIs(second.source, src)
+        self.assertEqual(dst.value, 42)
+
+    def test_relay_fallback_value_after_disconnecting(self):
+        src = Output(value=42)
+        relay = Relay()
+        relay.set_value(666)
+        dst = Input(value=0)
+        src.connect(relay)
+        relay.connect(dst)
+        src.disconnect(relay)
+
+        self.assertIs(dst.source, relay)
+        self.assertEqual(dst.value, 666)
+
+        relay.disconnect(dst)
+
+        self.assertIsNone(dst.source)
+        self.assertEqual(dst.value, 0)
+
     def test_message_flow_with_relay(self):
         src = MessageOutput()
         dst = MessageInput()
@@ -0,0 +1,117 @@
+import unittest
+
+import numpy as np
+
+from klang.audio.effects import Delay, Filter, Gain
+from klang.audio.envelopes import AR
+from klang.audio.helpers import get_silence
+from klang.audio.mixer import Mixer
+from klang.audio.oscillators import Oscillator
+from klang.block import Block
+from klang.context import (
+    DEFAULT_CONTEXT, EngineContext, active_context, get_context, set_context,
+)
+from klang.execution import ExecutionPlan
+
+
+class TestEngineContext(unittest.TestCase):
+    def test_derived_properties(self):
+        ctx = EngineContext(samplingRate=48000, bufferSize=64)
+
+        self.assertEqual(ctx.dt, 1. / 48000)
+        self.assertAlmostEqual(ctx.interval, 64 / 48000)
+        self.assertEqual(ctx.nyquistFrequency, 24000)
+
+    def test_invalid_values(self):
+        with self.assertRaises(ValueError):
+            EngineContext(samplingRate=0)
+
+        with self.assertRaises(ValueError):
+            EngineContext(bufferSize=-1)
+
+        with self.assertRaises(ValueError):
+            EngineContext(dtype=np.int16)
+
+    def test_sample_dtype(self):
+        self.assertIs(DEFAULT_CONTEXT.dtype, np.float64)
+        self.assertIs(EngineContext(dtype='float32').dtype, np.float32)
+
+    def test_set_context_returns_previous(self):
+        ctx = EngineContext(48000, 64)
+        previous = set_context(ctx)
+        try:
+            self.assertIs(get_context(), ctx)
+        finally:
+            self.assertIs(set_context(previous), ctx)
+
+        self.assertIs(get_context(), previous)
+
+    def test_active_context_restores(self):
+        ctx = EngineContext(48000, 64)
+        with self.assertRaises(RuntimeError):
+            with active_context(ctx):
+                self.assertIs(get_context(), ctx)
+                raise RuntimeError
+
+        self.assertEqual(get_context(), DEFAULT_CONTEXT)
+
+
+class TestPrepare(unittest.TestCase):
+    def test_blocks_inherit_active_context(self):
+        ctx = EngineContext(48000, 64)
+        with active_context(ctx):
+            block = Block()
+
+        self.assertEqual(block.context, ctx)
+        self.assertEqual(Block().context, DEFAULT_CONTEXT)
+
+    def test_plan_prepares_blocks_for_active_context(self):
+        osc = Oscillator()
+        delay = Delay(time=.5)
+        filter_ = Filter()
+        gain = Gain()
+        osc | delay | filter_ | gain
+        ctx = EngineContext(48000, 64)
+        with active_context(ctx):
+            plan = ExecutionPlan([osc, delay, filter_, gain])
+            plan()
+
+        for block in [osc, delay, filter_, gain]:
+            self.assertEqual(block.context, ctx)
+
+        self.assertEqual(delay.ring.length, 24000)
+        for block in [osc, delay, filter_, gain]:
+            self.assertEqual(block.output.value.shape, (64,))
+
+
+class TestFloat32SignalPath(unittest.TestCase):
+    def test_blocks_output_context_dtype(self):
+        osc = Oscillator()
+        env = AR()
+        delay = Delay(time=.5)
+        filter_ = Filter()
+        mixer = Mixer(nInputs=2)
+        osc | delay | filter_
+        filter_.output.connect(mixer.inputs[0])
+        env.output.connect(mixer.inputs[1])
+        ctx = EngineContext(dtype=np.float32)
+        with active_context(ctx):
+            plan = ExecutionPlan([osc, env, delay, filter_, mixer])
+            plan()
+            silence = get_silence(4)
+
+        self.assertEqual(silence.dtype, np.float32)
+        self.assertEqual(delay.ring.data.dtype, np.float32)
+        for block in [osc, env, delay, filter_, mixer]:
+            self.assertEqual(block.output.value.dtype, np.float32)
+
+    def test_phase_stays_double(self):
+        osc = Oscillator(frequency=441.)
+        with active_context(EngineContext(dtype=np.float32)):
+            ExecutionPlan([osc])()
+
+        self.assertIsInstance(osc.currentPhase, np.float64)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,17 @@
 import unittest
 
 from klang.block import Block
-from klang.execution import determine_execution_order
+from klang.composite import Composite
+from klang.connections import Relay
+from klang.execution import (
+    ExecutionPlan,
+    ParallelExecutionPlan,
+    dependency_levels,
+    determine_execution_order,
+    insert_connection,
+    remove_connection,
+    unravel,
+)
 
 
 class TestExecutionOrder(unittest.TestCase):
@@ -36,5 +46,200 @@ class TestExecutionOrder(unittest.TestCase):
         self.assertEqual(execOrder, [a, b, c])
 
 
+class TestIncrementalExecutionOrder(unittest.TestCase):
+    def test_new_blocks_get_placed_next_to_their_neighbor(self):
+        a, b, c = Block(1, 1), Block(1, 1), Block(1, 1)
+        execOrder = [a, c]
+        a | b
+        insert_connection(execOrder, a, b)
+
+        self.assertEqual(execOrder, [a, b, c])
+
+        d = Block(1, 1)
+        d | c
+        insert_connection(execOrder, d, c)
+
+        self.assertEqual(execOrder, [a, b, d, c])
+
+    def test_new_source_after_its_placed_predecessors(self):
+        s, dst, p = Block(1, 1), Block(1, 1), Block(1, 1)
+        execOrder = [dst, p]
+        p | s
+        s | dst
+        insert_connection(execOrder, s, dst)
+
+        self.assertEqual(execOrder, [p, s, dst])
+
+    def test_new_destination_before_its_placed_successors(self):
+        x, src, d = Block(1, 1), Block(1, 1), Block(1, 1)
+        execOrder = [x, src]
+        d | x
+        src | d
+        insert_connection(execOrder, src, d)
+
+        self.assertEqual(execOrder, [src, d, x])
+
+    def test_affected_region_gets_reordered(self):
+        a, b, c, d, e = blocks = [Block(2, 1) for _ in range(5)]
+        a | b
+        d | e
+        execOrder = list(blocks)
+        d.output.connect(b.inputs[1])  # Backwards
+        modified = insert_connection(execOrder, d, b)
+
+        self.assertTrue(modified)
+        self.assertEqual(execOrder, [a, d, c, b, e])
+
+    def test_feedback_connection_keeps_order(self):
+        a, b, c = Block(1, 1), Block(1, 1), Block(1, 1)
+        a | b | c
+        execOrder = [a, b, c]
+        c | a
+        modified = insert_connection(execOrder, c, a)
+
+        self.assertFalse(modified)
+        self.assertEqual(execOrder, [a, b, c])
+
+    def test_removing_connection_drops_isolated_blocks(self):
+        a, b, c = Block(1, 1), Block(1, 1), Block(1, 1)
+        a | b | c
+        execOrder = [a, b, c]
+        b.output.disconnect(c.input)
+        remove_connection(execOrder, b, c)
+
+        self.assertEqual(execOrder, [a, b])
+
+
+class Counter(Block):
+
+    """Block which counts its update calls."""
+
+    def __init__(self):
+        super().__init__(nInputs=1, nOutputs=1)
+        self.nUpdates = 0
+
+    def update(self):
+        self.nUpdates += 1
+
+
+class Opaque(Composite):
+
+    """Composite with a custom update method."""
+
+    def update(self):
+        pass
+
+
+def build_composite(cls=Composite):
+    """Composite with two internal blocks a -> b."""
+    comp = cls()
+    comp.inputs = [Relay(owner=comp)]
+    comp.outputs = [Relay(owner=comp)]
+    a = Counter()
+    b = Counter()
+    comp.input | a | b | comp.output
+    comp.update_internal_exec_order()
+    return comp, a, b
+
+
+class TestUnravel(unittest.TestCase):
+    def test_transparent_composite_gets_flattened(self):
+        comp, a, b = build_composite()
+        src = Counter()
+        dst = Counter()
+        src | comp | dst
+
+        self.assertEqual(list(unravel([src, comp, dst])), [src, a, b, dst])
+
+    def test_composite_with_custom_update_stays_in_one_piece(self):
+        comp, _, _ = build_composite(Opaque)
+
+        self.assertEqual(list(unravel([comp])), [comp])
+
+
+class TestExecutionPlan(unittest.TestCase):
+    def test_executes_flattened_blocks(self):
+        comp, a, b = build_composite()
+        src = Counter()
+        src | comp
+        plan = ExecutionPlan(determine_execution_order([src]))
+        plan()
+        plan()
+
+        self.assertEqual(plan.blocks, [src, a, b])
+        self.assertEqual([src.nUpdates, a.nUpdates, b.nUpdates], [2, 2, 2])
+
+    def test_recompiles_after_repatching(self):
+        src = Counter()
+        plan = ExecutionPlan([src])
+        dst = Counter()
+        src | dst
+        plan.execOrder.append(dst)
+        plan()
+
+        self.assertEqual(plan.blocks, [src, dst])
+        self.assertEqual(dst.nUpdates, 1)
+
+
+class TestDependencyLevels(unittest.TestCase):
+    def test_parallel_chains(self):
+        a, b, c, d = [Block(1, 1) for _ in range(4)]
+        mixer = Block(2, 1)
+        a | b | mixer.inputs[0]
+        c | d | mixer.inputs[1]
+
+        self.assertEqual(
+            dependency_levels([a, c, b, d, mixer]),
+            [[a, c], [b, d], [mixer]],
+        )
+
+    def test_relays_of_unraveled_composites_get_followed(self):
+        comp, a, b = build_composite()
+        src = Counter()
+        dst = Counter()
+        src | comp | dst
+
+        self.assertEqual(
+            dependency_levels([src, a, b, dst]),
+            [[src], [a], [b], [dst]],
+        )
+
+    def test_feedback_separates_levels(self):
+        a = Block(1, 1)
+        b = Block(1, 1)
+        b | a
+
+        self.assertEqual(dependency_levels([a, b]), [[a], [b]])
+
+
+class Heavy(Counter):
+
+    """Counter which can run on a worker thread."""
+
+    CONCURRENT = True
+
+
+class TestParallelExecutionPlan(unittest.TestCase):
+    def test_executes_all_blocks(self):
+        sink = Block(nInputs=4)
+        blocks = []
+        for input_ in sink.inputs:
+            src = Heavy()
+            effect = Heavy()
+            src | effect | input_
+            blocks.extend([src, effect])
+
+        plan = ParallelExecutionPlan(blocks + [sink], nWorkers=2)
+        try:
+            plan()
+            plan()
+        finally:
+            plan.close()
+
+        self.assertEqual(len(plan.stages), 3)
+        self.assertEqual(len(plan.stages[0][1]), 4)
+        self.assertEqual([b.nUpdates for b in blocks], 8 * [2])
+
+
 if __name__ == '__main__':
     unittest.main()
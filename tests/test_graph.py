@@ -3,7 +3,15 @@ import unittest
 import numpy as np
 from numpy.testing import assert_equal
 
-from klang.graph import graph_matrix, active_edges, get_sources, topological_sorting
+from klang.graph import (
+    active_edges,
+    adjacency_list,
+    find_back_edges,
+    get_sources,
+    graph_matrix,
+    remove_back_edges,
+    topological_sorting,
+)
 
 
 EDGES = [
@@ -74,6 +82,43 @@ class TestGraphMatrix(unittest.TestCase):
         ])
 
 
+class TestAdjacencyList(unittest.TestCase):
+
+    """Test adjacency_list() function."""
+
+    def test_adjacency_list_with_reference_dag(self):
+        self.assertEqual(adjacency_list(EDGES), [[1, 2, 3], [4], [4], [4], []])
+
+    def test_successors_are_sorted_and_unique(self):
+        edges = [(0, 3), (0, 1), (0, 3), (2, 0)]
+
+        self.assertEqual(adjacency_list(edges), [[1, 3], [], [0], []])
+
+    def test_predefined_order(self):
+        self.assertEqual(adjacency_list([(0, 1)], order=4), [[1], [], [], []])
+        self.assertEqual(adjacency_list([]), [])
+
+
+class TestBackEdges(unittest.TestCase):
+    def test_same_result_for_matrix_and_adjacency_list(self):
+        edges = [(0, 1), (1, 2), (2, 0), (2, 3), (3, 3)]
+
+        self.assertEqual(find_back_edges(graph_matrix(edges)), [(2, 0), (3, 3)])
+        self.assertEqual(find_back_edges(adjacency_list(edges)), [(2, 0), (3, 3)])
+
+    def test_remove_back_edges_keeps_representation(self):
+        edges = [(0, 1), (1, 0)]
+
+        assert_equal(remove_back_edges(graph_matrix(edges)), [[0, 1], [0, 0]])
+        self.assertEqual(remove_back_edges(adjacency_list(edges)), [[1], []])
+
+    def test_long_cycle_does_not_hit_recursion_limit(self):
+        nNodes = 10000
+        edges = [(i, i + 1) for i in range(nNodes - 1)] + [(nNodes - 1, 0)]
+
+        self.assertEqual(find_back_edges(adjacency_list(edges)), [(nNodes - 1, 0)])
+
+
 class TestActiveEdges(unittest.TestCase):
 
     """Test active_edges() function."""
@@ -242,6 +287,18 @@ class TopologicalSorting(unittest.TestCase):
 
         self.assertEqual(order, [0, 3, 4, 5, 1, 2])
 
+    def test_adjacency_list_gives_same_order(self):
+        edges = [
+            (0, 1), (1, 2), (2, 6),
+            (3, 4), (4, 5), (5, 6),
+            (2, 4), (5, 1),
+        ]
+
+        self.assertEqual(
+            topological_sorting(adjacency_list(edges)),
+            topological_sorting(graph_matrix(edges)),
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
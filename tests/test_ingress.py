@@ -0,0 +1,108 @@
+import threading
+import unittest
+
+from klang.audio.helpers import DT, INTERVAL
+from klang.audio.telemetry import Telemetry
+from klang.connections import MessageInput
+from klang.ingress import EventIngress, EventRing
+from klang.messages import Note
+
+
+class TestEventRing(unittest.TestCase):
+    def test_push_and_pop(self):
+        ring = EventRing(2)
+
+        self.assertTrue(ring.empty)
+        self.assertIs(ring.pop(), None)
+        self.assertTrue(ring.push('a'))
+        self.assertTrue(ring.push('b'))
+        self.assertTrue(ring.full)
+        self.assertFalse(ring.push('c'))
+        self.assertEqual(ring.nDropped, 1)
+        self.assertEqual(ring.peek(), 'a')
+        self.assertEqual(ring.pop(), 'a')
+        self.assertTrue(ring.push('c'))
+        self.assertEqual([ring.pop(), ring.pop()], ['b', 'c'])
+        self.assertTrue(ring.empty)
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            EventRing(0)
+
+
+class TestEventIngress(unittest.TestCase):
+    def make_ingress(self):
+        ingress = EventIngress()
+        ingress.now = 0.
+        ingress.clock = lambda: ingress.now
+        recv = MessageInput(capacity=EventIngress.MAX_EVENTS)
+        ingress.output.connect(recv)
+        return ingress, recv
+
+    def test_sample_offsets(self):
+        ingress, recv = self.make_ingress()
+        ingress.update()  # Anchor timeline. Window [-INTERVAL, 0)
+        ingress.post(Note(60), timestamp=10.5 * DT)
+        ingress.post(Note(64), timestamp=100.5 * DT)
+        ingress.now = INTERVAL
+        ingress.update()
+
+        self.assertEqual(list(recv.receive()), [
+            Note(60).at(10),
+            Note(64).at(100),
+        ])
+
+    def test_bursts_keep_event_spacing(self):
+        ingress, recv = self.make_ingress()
+        ingress.update()
+        ingress.post(Note(60), timestamp=10.5 * DT)
+        ingress.post(Note(64), timestamp=INTERVAL + 20.5 * DT)
+        ingress.now = 2 * INTERVAL
+        ingress.update()  # Two cycles in a row at the same time
+        ingress.update()
+
+        self.assertEqual(list(recv.receive()), [
+            Note(60).at(10),
+            Note(64).at(20),
+        ])
+
+    def test_future_events_wait_for_next_cycle(self):
+        ingress, recv = self.make_ingress()
+        ingress.post('later', timestamp=INTERVAL)
+        ingress.update()
+
+        self.assertEqual(list(recv.receive()), [])
+
+        ingress.now = INTERVAL
+        ingress.update()
+        ingress.update()
+
+        self.assertEqual(list(recv.receive()), ['later'])
+
+    def test_post_from_other_thread(self):
+        ingress, recv = self.make_ingress()
+        worker = threading.Thread(target=lambda: [
+            ingress.post(pitch) for pitch in range(100)
+        ])
+        worker.start()
+        worker.join()
+        ingress.now = INTERVAL
+        ingress.update()
+
+        self.assertEqual(list(recv.receive()), list(range(100)))
+
+    def test_dropped_events_in_telemetry(self):
+        ingress = EventIngress(capacity=1)
+        telemetry = Telemetry()
+        telemetry.watch([ingress])
+        ingress.post('a')
+        ingress.post('b')
+        stats, = telemetry.snapshot().queues.values()
+
+        self.assertEqual(stats.nReceived, 2)
+        self.assertEqual(stats.nDropped, 1)
+        self.assertEqual(stats.highWater, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
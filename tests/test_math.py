@@ -1,6 +1,8 @@
 import unittest
 
-from klang.math import linear_mapping
+import numpy as np
+
+from klang.math import blend, linear_mapping
 
 
 class TestLinearMapping(unittest.TestCase):
@@ -14,5 +16,27 @@ class TestLinearMapping(unittest.TestCase):
         self.assertEqual(a * xmax + b, ymax)
 
 
+class TestBlend(unittest.TestCase):
+    def test_blending_into_output_array(self):
+        a = np.linspace(-1., 1., 8)
+        b = np.cos(a)
+        out = np.empty_like(a)
+
+        for x in [0., .3, 1.]:
+            ret = blend(a, b, x, out=out)
+
+            self.assertIs(ret, out)
+            np.testing.assert_array_equal(out, blend(a, b, x))
+
+    def test_blending_into_b(self):
+        a = np.linspace(-1., 1., 8)
+        b = np.cos(a)
+        expected = blend(a, b, .3)
+
+        blend(a, b, .3, out=b)
+
+        np.testing.assert_allclose(b, expected)
+
+
 if __name__ == '__main__':
     unittest.main()
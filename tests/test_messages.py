@@ -21,6 +21,16 @@ class TestNote(unittest.TestCase):
 
         self.assertEqual(c, Note.from_dict(dct))
 
+    def test_offset(self):
+        note = Note(pitch=60)
+
+        self.assertEqual(note.offset, 0)
+        self.assertEqual(note.at(32).offset, 32)
+        self.assertEqual(note.at(32).silence().offset, 32)
+
+        with self.assertRaises(ValueError):
+            note.at(-1)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from numpy.testing import assert_equal
+import scipy.io.wavfile
+
+from klang.audio.effects import Filter, Gain
+from klang.audio.klanggeber import Dac
+from klang.audio.mixer import Mixer
+from klang.audio.oscillators import Oscillator
+from klang.block import Block
+from klang.execution import determine_execution_order, unravel
+from klang.klang import run_klang
+from klang.offline import find_independent_branches
+
+
+def build_arrangement(nTracks=3):
+    """Oscillator -> Filter tracks mixed together."""
+    mixer = Mixer(nInputs=0)
+    for nr in range(nTracks):
+        mixer += Oscillator(frequency=110. * (nr + 1)) | Filter(frequency=500.)
+
+    return mixer | Dac()
+
+
+def build_shared_source_arrangement(nGains=4):
+    """One oscillator feeding two gain chains. A single branch only."""
+    osc = Oscillator(frequency=220.)
+    mixer = Mixer(nInputs=0)
+    for _ in range(2):
+        chain = osc
+        for nr in range(nGains):
+            chain = chain | Gain(gain=.9 - .1 * nr)
+
+        mixer += chain
+
+    return mixer | Dac()
+
+
+def bounce(dac, filepath, **kwargs):
+    run_klang(dac, offline=True, duration=.5, filepath=filepath, **kwargs)
+    return scipy.io.wavfile.read(filepath)[1]
+
+
+class TestFindIndependentBranches(unittest.TestCase):
+    def test_tracks_are_independent(self):
+        dac = build_arrangement(nTracks=3)
+        blocks = list(unravel(determine_execution_order([dac])))
+        branches = find_independent_branches(blocks, dac)
+
+        self.assertEqual(len(branches), 3)
+        self.assertEqual([len(branch) for branch in branches], [2, 2, 2])
+
+    def test_shared_source_merges_branches(self):
+        src = Block(nOutputs=1)
+        a = Block(nInputs=1, nOutputs=1)
+        b = Block(nInputs=1, nOutputs=1)
+        c = Block(nOutputs=1)
+        mixer = Block(nInputs=3, nOutputs=1)
+        dac = Block(nInputs=1)
+        src | a | mixer.inputs[0]
+        src | b | mixer.inputs[1]
+        c | mixer.inputs[2]
+        mixer | dac
+        blocks = [src, a, b, c, mixer, dac]
+
+        branches = find_independent_branches(blocks, dac)
+
+        self.assertEqual(branches, [{src, a, b}, {c}])
+
+
+class TestBounceInParallel(unittest.TestCase):
+    def test_bit_identical_to_serial_bounce(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            serial = bounce(build_arrangement(), os.path.join(tmpdir, 'a.wav'))
+            parallel = bounce(
+                build_arrangement(), os.path.join(tmpdir, 'b.wav'), nProcesses=2
+            )
+
+        self.assertTrue(np.any(serial))
+        assert_equal(parallel, serial)
+
+    def test_serial_fallback_keeps_parallel_buffer_slots(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            serial = bounce(
+                build_shared_source_arrangement(), os.path.join(tmpdir, 'a.wav')
+            )
+            fallback = bounce(
+                build_shared_source_arrangement(),
+                os.path.join(tmpdir, 'b.wav'),
+                nWorkers=2,
+                nProcesses=2,
+            )
+
+        self.assertTrue(np.any(serial))
+        assert_equal(fallback, serial)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from klang.block import Block
+from klang.composite import Composite
+from klang.execution import ExecutionPlan, execute_one
+from klang.profiling import Profiler, Timings
+
+
+class FakeClock:
+
+    """Clock which advances by one second per call."""
+
+    def __init__(self):
+        self.now = 0.
+
+    def __call__(self):
+        self.now += 1.
+        return self.now
+
+
+class Opaque(Composite):
+
+    """Composite with a custom update method and an internal block."""
+
+    def __init__(self):
+        super().__init__()
+        self.inner = Block()
+
+    def update(self):
+        execute_one(self.inner)
+
+
+class TestTimings(unittest.TestCase):
+    def test_statistics(self):
+        timings = Timings()
+        for duration in [1., 2., 3., 10.]:
+            timings.add(duration)
+
+        self.assertEqual(timings.count, 4)
+        self.assertEqual(timings.mean, 4.)
+        self.assertEqual(timings.max, 10.)
+        self.assertAlmostEqual(timings.percentile(50), 2.5)
+
+    def test_empty_timings(self):
+        timings = Timings()
+
+        self.assertEqual(timings.mean, 0.)
+        self.assertEqual(timings.percentile(99), 0.)
+
+
+class TestProfiler(unittest.TestCase):
+    def test_execution_plan_times_every_block(self):
+        a = Block(nOutputs=1)
+        b = Block(nInputs=1)
+        a | b
+        profiler = Profiler()
+        profiler.clock = FakeClock()
+        plan = ExecutionPlan([a, b], profiler=profiler)
+        execute_cycle = profiler.time_cycles(plan)
+        execute_cycle()
+        execute_cycle()
+
+        self.assertEqual(profiler.blocks, [a, b])
+        self.assertEqual(profiler.timings[a].count, 2)
+        self.assertEqual(profiler.timings[a].mean, 1.)
+        self.assertEqual(profiler.cycles.count, 2)
+        self.assertEqual(profiler.cycles.mean, 5.)
+
+    def test_blocks_inside_opaque_composites_get_timed(self):
+        comp = Opaque()
+        profiler = Profiler()
+        profiler.clock = FakeClock()
+        plan = ExecutionPlan([comp], profiler=profiler)
+        plan()
+        plan.close()
+
+        self.assertEqual(profiler.blocks, [comp, comp.inner])
+        self.assertEqual(profiler.timings[comp.inner].count, 1)
+        self.assertEqual(profiler.timings[comp].mean, 3.)
+
+        plan = ExecutionPlan([comp])
+        plan()
+
+        self.assertEqual(profiler.timings[comp.inner].count, 1)
+
+    def test_csv_dump(self):
+        profiler = Profiler()
+        block = Block()
+        profiler.wrap(block)()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, 'profile.csv')
+            profiler.to_csv(filepath)
+            with open(filepath) as f:
+                rows = list(csv.reader(f))
+
+        self.assertEqual(rows[0][:3], ['position', 'block', 'count'])
+        self.assertEqual(rows[1][:3], ['1', str(block), '1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
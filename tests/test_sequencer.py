@@ -6,9 +6,11 @@ from numpy.testing import assert_equal
 from klang.block import Block
 from klang.connections import MessageInput
 from klang.constants import TAU
+from klang.context import get_context
 from klang.sequencer import (
     PizzaSlicer,
     Sequence,
+    Step,
     Sequencer,
     atleast_1d,
     atleast_2d,
@@ -61,7 +63,25 @@ class TestPizzaSlicer(unittest.TestCase):
         pizza.update()
 
         self.assertEqual(pizza.currentIdx, 0)
-        self.compare_messages([0])
+        self.compare_messages([Step(0, 0)])
+
+    def test_steps_ahead_at_sample_offsets(self):
+        pizza = PizzaSlicer(4)
+        pizza | self.receiver
+        received = []
+        for phase in [0., .1 * TAU, .2 * TAU, .3 * TAU]:
+            pizza.input.set_value(phase)
+            pizza.update()
+            received.append(list(self.receiver.receive()))
+
+        bufferSize = get_context().bufferSize
+        first, second, (step,), fourth = received
+
+        self.assertEqual(first, [Step(0, 0)])
+        self.assertEqual(second, [])
+        self.assertEqual(step.index, 1)
+        self.assertAlmostEqual(step.offset, bufferSize / 2, delta=1)
+        self.assertEqual(fourth, [])
 
     def test_pattern_of_four(self):
         pizza = PizzaSlicer(4)
@@ -0,0 +1,123 @@
+import unittest
+
+import numpy as np
+
+from klang.audio.effects import Delay, Gain
+from klang.audio.helpers import get_silence, is_silence
+from klang.block import Block
+from klang.config import BUFFER_SIZE
+from klang.execution import ExecutionPlan
+from klang.silence import mute, silence_gate, silent_inputs
+
+
+class Source(Block):
+    def __init__(self):
+        super().__init__(nOutputs=1)
+        self.samples = np.ones(BUFFER_SIZE)
+
+    def update(self):
+        self.output.set_value(self.samples)
+
+
+class Counting(Block):
+    SILENCE_POLICY = 'stateless'
+
+    def __init__(self):
+        super().__init__(nInputs=2, nOutputs=1)
+        self.nUpdates = 0
+
+    def update(self):
+        self.nUpdates += 1
+        self.output.set_value(np.zeros(BUFFER_SIZE))
+
+
+class TestSilentInputs(unittest.TestCase):
+    def test_control_values_get_ignored(self):
+        block = Block(nInputs=2)
+        block.inputs[0].set_value(get_silence(BUFFER_SIZE))
+        block.inputs[1].set_value(.5)
+
+        self.assertTrue(silent_inputs(block))
+
+        block.inputs[1].set_value(np.ones(BUFFER_SIZE))
+
+        self.assertFalse(silent_inputs(block))
+
+        self.assertFalse(silent_inputs(Block(nInputs=1)))
+
+    def test_mute(self):
+        block = Block(nOutputs=1)
+
+        self.assertFalse(mute(block))
+
+        block.output.set_value(np.ones((2, 4)))
+
+        self.assertTrue(mute(block))
+        self.assertIs(block.output.value, get_silence((2, 4)))
+
+
+class TestSilenceGate(unittest.TestCase):
+    def test_stateless_blocks_get_skipped(self):
+        src = Source()
+        block = Counting()
+        src.output.connect(block.input)
+        plan = ExecutionPlan([src, block])
+        plan()
+        src.samples = get_silence(BUFFER_SIZE)
+        plan()
+        plan()
+        plan()
+
+        self.assertEqual(block.nUpdates, 2)
+        self.assertTrue(is_silence(block.output.value))
+
+        src.samples = np.ones(BUFFER_SIZE)
+        plan()
+
+        self.assertEqual(block.nUpdates, 3)
+
+    def test_tail_blocks_ring_out(self):
+        src = Source()
+        delay = Delay(time=.01, feedback=.5)
+        src.output.connect(delay.input)
+        update = silence_gate(delay)
+        src.update()
+        update()
+        src.samples = get_silence(BUFFER_SIZE)
+        src.update()
+        for _ in range(10):
+            update()
+            self.assertFalse(is_silence(delay.output.value))
+
+        delay.ring.data[:] = 0.
+        update()
+        update()
+
+        self.assertTrue(is_silence(delay.output.value))
+
+    def test_blocks_without_policy_do_not_get_gated(self):
+        block = Block()
+
+        self.assertEqual(silence_gate(block), block.update)
+
+        block.SILENCE_POLICY = 'always'
+        with self.assertRaises(ValueError):
+            silence_gate(block)
+
+    def test_gain(self):
+        src = Source()
+        gain = Gain(2.)
+        src.output.connect(gain.input)
+        src.samples = get_silence(BUFFER_SIZE)
+        plan = ExecutionPlan([src, gain])
+        plan()
+
+        self.assertIsInstance(gain.output.value, np.ndarray)
+
+        plan()
+
+        self.assertTrue(is_silence(gain.output.value))
+
+
+if __name__ == '__main__':
+    unittest.main()
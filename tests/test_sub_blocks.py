@@ -0,0 +1,103 @@
+import unittest
+
+import numpy as np
+
+from klang.audio.effects import Delay, Gain
+from klang.audio.envelopes import AR
+from klang.audio.klanggeber import Dac
+from klang.audio.oscillators import Oscillator
+from klang.audio.synthesizer import PolyphonicSynthesizer
+from klang.audio.voices import Voice
+from klang.clock import ClockMixin
+from klang.context import EngineContext, active_context
+from klang.execution import (
+    ExecutionPlan, determine_execution_order, unravel,
+)
+from klang.sequencer import Sequencer
+from klang.sub_blocks import SubBlockExecutionPlan, control_blocks, hoist
+
+
+CONTROL_SIZE = 256
+BLOCK_SIZE = 2048
+
+
+def build_patch():
+    """Sequencer -> synthesizer -> delay -> dac."""
+    seq = Sequencer([[60, 0, 64, 0, 67, 0, 72, 0]], tempo=240)
+    voice = Voice(envelope=AR(attack=.01, release=.02), oscillator=Oscillator())
+    synth = PolyphonicSynthesizer(voice)
+    delay = Delay(time=.01, feedback=.5)
+    dac = Dac(nChannels=1)
+    seq | synth | delay | Gain() | dac
+    return seq, synth, delay, dac
+
+
+def render(blockSize, controlSize=None, nSamples=20 * BLOCK_SIZE):
+    """Render patch and return samples and delay block."""
+    ClockMixin.set_current_time(0.)
+    ctx = EngineContext(bufferSize=blockSize)
+    with active_context(ctx):
+        _, _, delay, dac = build_patch()
+        execOrder = determine_execution_order([dac])
+        if controlSize is None:
+            plan = ExecutionPlan(execOrder)
+        else:
+            plan = SubBlockExecutionPlan(execOrder, controlSize)
+
+        samples = []
+        for cycle in range(nSamples // blockSize):
+            ClockMixin.set_current_time(cycle * ctx.interval)
+            plan()
+            samples.append(dac.collect_samples().copy())
+
+    return np.concatenate(samples), delay
+
+
+def onsets(samples, window=64, threshold=1e-3):
+    """Windows in which the signal rises above threshold after silence."""
+    nSamples = len(samples) // window * window
+    peaks = np.abs(samples[:nSamples]).reshape(-1, window).max(axis=1)
+    loud = peaks > threshold
+    return np.flatnonzero(loud[1:] & ~loud[:-1]) + 1
+
+
+class TestControlBlocks(unittest.TestCase):
+    def test_sequencer_blocks_are_control_blocks(self):
+        seq, synth, delay, dac = build_patch()
+        blocks = list(unravel(determine_execution_order([dac])))
+        controls = control_blocks(blocks)
+
+        self.assertEqual(controls, set(unravel([seq])))
+        for block in [synth, delay, dac]:
+            self.assertNotIn(block, controls)
+
+    def test_hoist_keeps_dependencies(self):
+        seq, synth, delay, dac = build_patch()
+        blocks = list(unravel(determine_execution_order([dac])))
+        controls = control_blocks(blocks)
+        hoisted, remaining = hoist(blocks, controls)
+
+        self.assertEqual(set(hoisted), controls)
+        self.assertEqual(len(hoisted) + len(remaining), len(blocks))
+        self.assertLess(remaining.index(synth), remaining.index(delay))
+
+
+class TestSubBlockExecutionPlan(unittest.TestCase):
+    def test_block_size_has_to_be_multiple_of_control_size(self):
+        with active_context(EngineContext(bufferSize=1000)):
+            with self.assertRaises(ValueError):
+                SubBlockExecutionPlan([], controlSize=256)
+
+    def test_note_onsets_keep_control_size_timing(self):
+        reference, _ = render(CONTROL_SIZE)
+        large, delay = render(BLOCK_SIZE, CONTROL_SIZE)
+
+        self.assertEqual(large.shape, reference.shape)
+        np.testing.assert_equal(onsets(large), onsets(reference))
+        np.testing.assert_allclose(large, reference, atol=1e-6)
+        self.assertLess(delay.max_block_size(), BLOCK_SIZE)
+        self.assertEqual(delay.output.value.shape[-1], BLOCK_SIZE)
+
+
+if __name__ == '__main__':
+    unittest.main()